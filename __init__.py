@@ -1,11 +1,79 @@
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, ConversationHandler, filters
+import logging
+import time
+from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, ChatMemberHandler, ConversationHandler, filters
 
 from bot.commands import (
     start, help_command, ban_user, mute_user, unmute_user, stats_command, 
     admin_panel, button_callback, verify_phone_start, phone_input, 
     code_input, cancel_verification, PHONE_INPUT, CODE_INPUT
 )
-from bot.handlers import welcome_new_members, auto_reply, handle_button_callback, handle_private_chat
+from bot.handlers import welcome_new_members, auto_reply, handle_button_callback, handle_private_chat, track_chat_member_updates
+from bot import data_access, scheduler
+from bot.log_writer import message_log_writer
+from bot.update_log import install_update_logging
+from utils.sms_sender import sms_gateway
+from config import (
+    MESSAGE_LOG_MAINTENANCE_INTERVAL, MESSAGE_STATS_ROLLUP_INTERVAL, MUTE_STATE_SYNC_INTERVAL,
+    VERIFICATION_CODE_SWEEP_INTERVAL, VERIFIED_USER_SYNC_INTERVAL, BOT_HEARTBEAT_INTERVAL,
+    GROUP_INDEX_SYNC_INTERVAL
+)
+
+# 导入 app 模块以记录机器人心跳
+try:
+    from app import bot_status
+except ImportError:
+    bot_status = {}
+
+logger = logging.getLogger(__name__)
+
+async def _on_startup(application) -> None:
+    """机器人启动时预热缓存，启动消息日志写入任务和定时维护任务"""
+    message_log_writer.start()
+    # 各个缓存的预热失败只记录警告，不影响启动
+    await data_access.warm_up()
+    
+    # 心跳：证明事件循环仍在运行，并记录是否在轮询更新，供 /readyz 检查
+    async def heartbeat() -> None:
+        bot_status["heartbeat_at"] = time.monotonic()
+        bot_status["polling"] = bool(application.updater and application.updater.running)
+    scheduler.run_repeating(application, heartbeat, interval=BOT_HEARTBEAT_INTERVAL, name="heartbeat")
+    # 重建群组搜索索引并同步其他进程修改的群组（搜索时只应用本进程内的修改，不会全量重建）
+    scheduler.run_repeating(
+        application, data_access.sync_group_index,
+        interval=GROUP_INDEX_SYNC_INTERVAL, first=GROUP_INDEX_SYNC_INTERVAL, name="group_index_sync"
+    )
+    # 同步其他进程修改的群组禁言状态
+    scheduler.run_repeating(
+        application, data_access.sync_muted_chats,
+        interval=MUTE_STATE_SYNC_INTERVAL, first=MUTE_STATE_SYNC_INTERVAL, name="mute_state_sync"
+    )
+    # 同步其他进程新增的手机验证记录
+    scheduler.run_repeating(
+        application, data_access.sync_phone_verifications,
+        interval=VERIFIED_USER_SYNC_INTERVAL, first=VERIFIED_USER_SYNC_INTERVAL, name="phone_verification_sync"
+    )
+    # 清理过期的验证码
+    scheduler.run_repeating(
+        application, data_access.clean_expired_verification_codes,
+        interval=VERIFICATION_CODE_SWEEP_INTERVAL, first=VERIFICATION_CODE_SWEEP_INTERVAL, name="verification_code_sweep"
+    )
+    # 每小时把消息日志汇总到统计表
+    scheduler.run_repeating(
+        application, data_access.rollup_message_stats,
+        interval=MESSAGE_STATS_ROLLUP_INTERVAL, first=30, name="message_stats_rollup"
+    )
+    # 消息日志维护：创建分区、清理已汇总的过期日志
+    scheduler.run_repeating(
+        application, data_access.maintain_message_log,
+        interval=MESSAGE_LOG_MAINTENANCE_INTERVAL, first=60, name="message_log_maintenance"
+    )
+
+async def _on_shutdown(application) -> None:
+    """机器人停止时写完剩余的消息日志，然后释放数据库和短信连接等资源"""
+    await scheduler.stop()
+    await sms_gateway.close()
+    await message_log_writer.stop()
+    data_access.shutdown()
 
 def create_bot(token):
     """
@@ -18,7 +86,7 @@ def create_bot(token):
         The configured bot application.
     """
     # Create the Application
-    application = ApplicationBuilder().token(token).build()
+    application = ApplicationBuilder().token(token).post_init(_on_startup).post_shutdown(_on_shutdown).build()
     
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
@@ -35,7 +103,7 @@ def create_bot(token):
     application.add_handler(CallbackQueryHandler(button_callback, pattern=r"^mute_"))
     application.add_handler(CallbackQueryHandler(button_callback, pattern=r"^unmute_user$"))
     # Private chat navigation and group search callbacks
-    application.add_handler(CallbackQueryHandler(handle_button_callback, pattern=r"^(main_menu|group_|search_)"))
+    application.add_handler(CallbackQueryHandler(handle_button_callback, pattern=r"^(main_menu$|view_channels$|group_|search_|spage\|)"))
     
     # 添加手机验证对话处理器
     verify_conv_handler = ConversationHandler(
@@ -48,9 +116,15 @@ def create_bot(token):
     )
     application.add_handler(verify_conv_handler)
     
+    # 管理员变动时刷新管理员缓存
+    application.add_handler(ChatMemberHandler(track_chat_member_updates, ChatMemberHandler.ANY_CHAT_MEMBER))
+    
     # Add message handlers
     application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, welcome_new_members))
     application.add_handler(MessageHandler(filters.ChatType.PRIVATE & filters.TEXT & ~filters.COMMAND, handle_private_chat))
     application.add_handler(MessageHandler(filters.ChatType.GROUPS & filters.TEXT & ~filters.COMMAND, auto_reply))
     
+    # 记录每个处理的更新（处理器、耗时等），必须在添加完所有处理器之后调用
+    install_update_logging(application)
+    
     return application
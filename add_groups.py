@@ -9,7 +9,8 @@
 import os
 import logging
 from app import app, db
-from models import Group, Keyword
+from models import Group, Keyword, db_utcnow
+from utils.group_category import classify_group
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, 
@@ -188,6 +189,7 @@ def add_groups_to_database():
                 existing_group.name = group_data["name"]
                 existing_group.link = group_data["link"]
                 existing_group.description = group_data["description"]
+                existing_group.category = classify_group(group_data["description"])
             else:
                 logger.info(f"添加新群组: {group_data['group_number']} - {group_data['name']}")
                 # 创建新群组
@@ -195,7 +197,8 @@ def add_groups_to_database():
                     group_number=group_data["group_number"],
                     name=group_data["name"],
                     link=group_data["link"],
-                    description=group_data["description"]
+                    description=group_data["description"],
+                    category=classify_group(group_data["description"])
                 )
                 db.session.add(new_group)
                 groups_added += 1
@@ -222,6 +225,10 @@ def add_groups_to_database():
                             # 将关键词与群组关联
                             if keyword not in group_obj.keywords:
                                 group_obj.keywords.append(keyword)
+                        
+                        # 关键词关联不会自动更新 updated_at，手动更新以便机器人进程同步搜索索引。
+                        # 与列的默认值一样使用数据库时间，机器人进程按数据库时间的水位增量同步
+                        group_obj.updated_at = db_utcnow()
         
         # 最终提交所有更改
         db.session.commit()
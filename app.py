@@ -1,15 +1,51 @@
 import os
+import time
 import logging
-from datetime import datetime
-from flask import Flask, render_template_string
+from datetime import datetime, timedelta
+from flask import Flask, Response, jsonify, render_template, request
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
+from config import DASHBOARD_CACHE_TTL, DASHBOARD_KEYWORDS_PER_PAGE, READY_HEARTBEAT_MAX_AGE
+from utils.cache import TTLCache, cache_event_counter
+from utils.metrics import Counter, Histogram, registry, render_metric
+
+# 群消息自动回复的各个阶段
+AUTO_REPLY_STAGES = ("received", "no_keyword", "public_reply", "muted_silenced", "not_admin", "admin_reply")
 
 # 机器人状态信息 - 放在最前面，避免循环导入问题
+# 机器人线程和数据库线程池频繁更新的计数使用按线程分片的 Counter/Histogram，读取时合并
 bot_status = {
     "started_at": datetime.now(),
     "is_running": True,
-    "messages_processed": 0
+    # 各处理器处理的文本消息数
+    "messages_processed": registry.register(
+        "telegram_bot_messages_processed_total", "Text messages processed, by handler", Counter(("handler",))
+    ),
+    # 机器人心跳：定时任务最近一次执行的时间（time.monotonic()）和当时是否在轮询更新
+    "heartbeat_at": None,
+    "polling": False,
+    # 各处理器处理每个更新的耗时（秒）
+    "handler_latency": registry.register(
+        "telegram_bot_handler_duration_seconds", "Time spent handling each update, by handler", Histogram(("handler",))
+    ),
+    # 数据库线程池中等待或正在执行的查询数，以及超时次数
+    "db_pool": {"pending": 0, "timeouts": 0},
+    # 关键词回复缓存统计
+    "keyword_cache": cache_event_counter("hits", "misses", "rebuilds"),
+    # 机器人设置缓存统计
+    "bot_settings_cache": cache_event_counter("hits", "misses", "rebuilds"),
+    "channel_cache": cache_event_counter("hits", "misses", "rebuilds"),
+    # 手机验证记录缓存统计（filtered 为布隆过滤器直接排除的未验证用户）
+    "phone_verification_cache": cache_event_counter("filtered", "hits", "misses"),
+    # 群组编号查询缓存统计
+    "group_lookup_cache": cache_event_counter("hits", "misses"),
+    # 消息日志异步写入统计
+    "message_log": {"queued": 0, "written": 0, "dropped": 0, "failed": 0},
+    # 群消息自动回复各阶段计数
+    "auto_reply_stages": registry.register(
+        "telegram_bot_auto_reply_total", "Group messages by the auto-reply stage they ended at",
+        Counter(("stage",), known=[(stage,) for stage in AUTO_REPLY_STAGES])
+    )
 }
 
 class Base(DeclarativeBase):
@@ -31,9 +67,73 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 # 初始化数据库
 db.init_app(app)
 
+# 管理面板的数据库数据缓存 {"summary": 概览数据, ("keywords", 页码): 关键词分页}
+# 保活脚本频繁访问首页，缓存期内不查询数据库
+_dashboard_cache = TTLCache(maxsize=64, ttl=DASHBOARD_CACHE_TTL)
+
+def _row_to_dict(row):
+    """把模型对象转换为字典（保留 datetime 类型），缓存的数据不依赖数据库会话"""
+    return {column.name: getattr(row, column.name) for column in row.__table__.columns}
+
+def _dashboard_summary():
+    """管理面板概览数据：机器人设置、统计数、最新的群组和消息日志"""
+    summary = _dashboard_cache.get("summary")
+    if summary is not None:
+        return summary
+    
+    from models import Group, MessageLog, BotSettings, PhoneVerification
+    from message_stats import count_messages
+    
+    # 分页显示，每页10条数据
+    per_page = 10
+    
+    bot_settings = BotSettings.query.first()
+    summary = {
+        # 获取最新的10条消息日志
+        "message_logs": [_row_to_dict(log) for log in MessageLog.query.order_by(MessageLog.processed_at.desc()).limit(per_page)],
+        "groups": [_row_to_dict(group) for group in Group.query.order_by(Group.group_number).limit(per_page)],
+        "is_admin_only": bot_settings.is_admin_only if bot_settings else True,
+        "welcome_message": bot_settings.welcome_message if bot_settings else "",
+        "private_chat_welcome": bot_settings.private_chat_welcome if bot_settings else "",
+        # 最近24小时的消息数来自按小时汇总的统计表
+        "messages_24h": count_messages(datetime.utcnow() - timedelta(hours=24)),
+        # 已验证手机号的数量
+        "phone_verifications": PhoneVerification.query.filter_by(is_verified=True).count()
+    }
+    _dashboard_cache.set("summary", summary)
+    return summary
+
+def _dashboard_keywords(page):
+    """关键词回复分页，页码超出范围时返回最后一页"""
+    from models import KeywordResponse
+    
+    total = _dashboard_cache.get("keyword_total")
+    if total is None:
+        total = KeywordResponse.query.count()
+        _dashboard_cache.set("keyword_total", total)
+    pages = max(1, -(-total // DASHBOARD_KEYWORDS_PER_PAGE))
+    page = min(max(page, 1), pages)
+    
+    keywords = _dashboard_cache.get(("keywords", page))
+    if keywords is None:
+        keywords = [
+            _row_to_dict(kr) for kr in KeywordResponse.query.order_by(KeywordResponse.id)
+            .offset((page - 1) * DASHBOARD_KEYWORDS_PER_PAGE).limit(DASHBOARD_KEYWORDS_PER_PAGE)
+        ]
+        _dashboard_cache.set(("keywords", page), keywords)
+    return {"keyword_responses": keywords, "keyword_page": page, "keyword_pages": pages, "keyword_total": total}
+
+def _handler_stats():
+    """各处理器处理的更新数和平均耗时（毫秒），按更新数从多到少排列"""
+    stats = [
+        {"handler": handler, "count": count, "avg_ms": total_sum / count * 1000 if count else 0}
+        for (handler,), (_, total_sum, count) in bot_status["handler_latency"].snapshots().items()
+    ]
+    return sorted(stats, key=lambda item: item["count"], reverse=True)
+
 @app.route('/')
 def index():
-    """显示机器人状态页面"""
+    """显示机器人状态页面，模板在第一次渲染时编译并缓存，数据库数据缓存 DASHBOARD_CACHE_TTL 秒"""
     status_text = "运行中" if bot_status["is_running"] else "未运行"
     uptime = "N/A"
     
@@ -44,580 +144,98 @@ def index():
         seconds = int(uptime_seconds % 60)
         uptime = f"{hours}小时 {minutes}分钟 {seconds}秒"
     
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>好旺公群机器人管理面板</title>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <link rel="stylesheet" href="https://cdn.replit.com/agent/bootstrap-agent-dark-theme.min.css">
-        <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.5/font/bootstrap-icons.css">
-        <style>
-            body {
-                background: linear-gradient(135deg, #ff9d6c 0%, #bb4e75 100%);
-                min-height: 100vh;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                color: white;
-                padding: 20px 0;
-            }
-            .card {
-                background-color: rgba(0, 0, 0, 0.6);
-                border-radius: 15px;
-                overflow: hidden;
-                box-shadow: 0 10px 20px rgba(0, 0, 0, 0.3);
-                margin-bottom: 20px;
-            }
-            .card-header {
-                background-color: rgba(0, 0, 0, 0.3);
-                border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-            }
-            .status-indicator {
-                display: inline-block;
-                width: 10px;
-                height: 10px;
-                border-radius: 50%;
-                margin-right: 8px;
-            }
-            .status-running {
-                background-color: #28a745;
-            }
-            .status-stopped {
-                background-color: #dc3545;
-            }
-            .info-section {
-                border-top: 1px solid rgba(255, 255, 255, 0.1);
-                padding-top: 15px;
-                margin-top: 15px;
-            }
-            .bot-image {
-                max-width: 100px;
-                border-radius: 50%;
-                margin: 0 auto 15px;
-                display: block;
-                border: 3px solid white;
-                box-shadow: 0 3px 10px rgba(0, 0, 0, 0.2);
-            }
-            .nav-pills .nav-link {
-                color: rgba(255, 255, 255, 0.8);
-                background-color: rgba(0, 0, 0, 0.2);
-                margin-right: 5px;
-                border-radius: 10px;
-                transition: all 0.3s;
-            }
-            .nav-pills .nav-link:hover {
-                color: white;
-                background-color: rgba(0, 0, 0, 0.4);
-            }
-            .nav-pills .nav-link.active {
-                color: white;
-                background-color: rgba(187, 78, 117, 0.8);
-            }
-            .stat-card {
-                background-color: rgba(0, 0, 0, 0.3);
-                border-radius: 10px;
-                padding: 15px;
-                margin-bottom: 15px;
-                text-align: center;
-                transition: all 0.3s;
-            }
-            .stat-card:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 5px 15px rgba(0, 0, 0, 0.3);
-            }
-            .stat-icon {
-                font-size: 2rem;
-                margin-bottom: 10px;
-            }
-            .control-btn {
-                margin: 5px;
-                min-width: 120px;
-            }
-            .tab-content {
-                padding: 20px 0;
-            }
-            .action-btn {
-                min-width: 140px;
-                margin: 5px;
-            }
-            .progress {
-                height: 10px;
-                border-radius: 5px;
-                margin-top: 5px;
-            }
-            .table {
-                color: rgba(255, 255, 255, 0.9);
-            }
-            .table thead th {
-                border-color: rgba(255, 255, 255, 0.1);
-            }
-            .table tbody td {
-                border-color: rgba(255, 255, 255, 0.05);
-            }
-            .table-dark {
-                background-color: rgba(0, 0, 0, 0.2);
-            }
-            .form-control, .form-select {
-                background-color: rgba(0, 0, 0, 0.3);
-                border-color: rgba(255, 255, 255, 0.1);
-                color: white;
-            }
-            .form-control:focus, .form-select:focus {
-                background-color: rgba(0, 0, 0, 0.4);
-                color: white;
-                border-color: rgba(255, 255, 255, 0.3);
-                box-shadow: 0 0 0 0.25rem rgba(255, 255, 255, 0.1);
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container py-3">
-            <div class="card mb-4">
-                <div class="card-header d-flex justify-content-between align-items-center">
-                    <h3 class="mb-0">好旺公群机器人控制中心</h3>
-                    <span class="badge {{ 'bg-success' if status == '运行中' else 'bg-danger' }}">
-                        <i class="bi {{ 'bi-robot' if status == '运行中' else 'bi-robot' }}"></i> {{ status }}
-                    </span>
-                </div>
-                <div class="card-body">
-                    <div class="row align-items-center mb-4">
-                        <div class="col-md-3 text-center">
-                            <img src="https://ui-avatars.com/api/?name=HW&background=bb4e75&color=fff&size=128" class="bot-image">
-                        </div>
-                        <div class="col-md-9">
-                            <div class="row">
-                                <div class="col-md-4">
-                                    <div class="stat-card">
-                                        <i class="bi bi-clock-history stat-icon text-warning"></i>
-                                        <h5>运行时间</h5>
-                                        <p class="mb-0">{{ uptime }}</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-4">
-                                    <div class="stat-card">
-                                        <i class="bi bi-chat-dots stat-icon text-info"></i>
-                                        <h5>处理消息数</h5>
-                                        <p class="mb-0">{{ messages }}</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-4">
-                                    <div class="stat-card">
-                                        <i class="bi bi-people stat-icon text-success"></i>
-                                        <h5>用户数量</h5>
-                                        <p class="mb-0">{{ phone_verifications }}</p>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-
-                    <ul class="nav nav-pills mb-3" id="pills-tab" role="tablist">
-                        <li class="nav-item" role="presentation">
-                            <button class="nav-link active" id="pills-dashboard-tab" data-bs-toggle="pill" data-bs-target="#pills-dashboard" type="button" role="tab" aria-controls="pills-dashboard" aria-selected="true">
-                                <i class="bi bi-speedometer2"></i> 控制面板
-                            </button>
-                        </li>
-                        <li class="nav-item" role="presentation">
-                            <button class="nav-link" id="pills-groups-tab" data-bs-toggle="pill" data-bs-target="#pills-groups" type="button" role="tab" aria-controls="pills-groups" aria-selected="false">
-                                <i class="bi bi-people-fill"></i> 群组管理
-                            </button>
-                        </li>
-                        <li class="nav-item" role="presentation">
-                            <button class="nav-link" id="pills-keywords-tab" data-bs-toggle="pill" data-bs-target="#pills-keywords" type="button" role="tab" aria-controls="pills-keywords" aria-selected="false">
-                                <i class="bi bi-chat-square-text"></i> 关键词
-                            </button>
-                        </li>
-                        <li class="nav-item" role="presentation">
-                            <button class="nav-link" id="pills-logs-tab" data-bs-toggle="pill" data-bs-target="#pills-logs" type="button" role="tab" aria-controls="pills-logs" aria-selected="false">
-                                <i class="bi bi-journal-text"></i> 日志
-                            </button>
-                        </li>
-                        <li class="nav-item" role="presentation">
-                            <button class="nav-link" id="pills-settings-tab" data-bs-toggle="pill" data-bs-target="#pills-settings" type="button" role="tab" aria-controls="pills-settings" aria-selected="false">
-                                <i class="bi bi-gear"></i> 设置
-                            </button>
-                        </li>
-                    </ul>
-                    
-                    <div class="tab-content" id="pills-tabContent">
-                        <!-- 控制面板 -->
-                        <div class="tab-pane fade show active" id="pills-dashboard" role="tabpanel" aria-labelledby="pills-dashboard-tab">
-                            <div class="row">
-                                <div class="col-md-6">
-                                    <div class="card">
-                                        <div class="card-header">
-                                            <h5 class="mb-0"><i class="bi bi-lightning-charge"></i> 快速操作</h5>
-                                        </div>
-                                        <div class="card-body">
-                                            <div class="d-flex flex-wrap justify-content-center">
-                                                <button class="btn btn-success control-btn">
-                                                    <i class="bi bi-power"></i> 重启机器人
-                                                </button>
-                                                <button class="btn btn-warning control-btn">
-                                                    <i class="bi bi-arrow-clockwise"></i> 刷新缓存
-                                                </button>
-                                                <button class="btn btn-danger control-btn">
-                                                    <i class="bi bi-stop-circle"></i> 停止机器人
-                                                </button>
-                                                <button class="btn btn-info control-btn">
-                                                    <i class="bi bi-broadcast"></i> 发送广播
-                                                </button>
-                                            </div>
-                                        </div>
-                                    </div>
-                                </div>
-                                <div class="col-md-6">
-                                    <div class="card">
-                                        <div class="card-header">
-                                            <h5 class="mb-0"><i class="bi bi-activity"></i> 系统状态</h5>
-                                        </div>
-                                        <div class="card-body">
-                                            <div>
-                                                <div class="d-flex justify-content-between">
-                                                    <span>CPU 使用率</span>
-                                                    <span>42%</span>
-                                                </div>
-                                                <div class="progress">
-                                                    <div class="progress-bar bg-info" role="progressbar" style="width: 42%" aria-valuenow="42" aria-valuemin="0" aria-valuemax="100"></div>
-                                                </div>
-                                            </div>
-                                            <div class="mt-3">
-                                                <div class="d-flex justify-content-between">
-                                                    <span>内存使用率</span>
-                                                    <span>68%</span>
-                                                </div>
-                                                <div class="progress">
-                                                    <div class="progress-bar bg-warning" role="progressbar" style="width: 68%" aria-valuenow="68" aria-valuemin="0" aria-valuemax="100"></div>
-                                                </div>
-                                            </div>
-                                            <div class="mt-3">
-                                                <div class="d-flex justify-content-between">
-                                                    <span>数据库连接</span>
-                                                    <span>活跃</span>
-                                                </div>
-                                                <div class="progress">
-                                                    <div class="progress-bar bg-success" role="progressbar" style="width: 100%" aria-valuenow="100" aria-valuemin="0" aria-valuemax="100"></div>
-                                                </div>
-                                            </div>
-                                        </div>
-                                    </div>
-                                </div>
-                            </div>
-                            
-                            <div class="row mt-4">
-                                <div class="col-12">
-                                    <div class="card">
-                                        <div class="card-header">
-                                            <h5 class="mb-0"><i class="bi bi-info-circle"></i> 机器人信息</h5>
-                                        </div>
-                                        <div class="card-body">
-                                            <div class="table-responsive">
-                                                <table class="table table-dark table-striped">
-                                                    <tbody>
-                                                        <tr>
-                                                            <th scope="row" style="width: 30%;">用户名</th>
-                                                            <td>@qunguan_bot</td>
-                                                        </tr>
-                                                        <tr>
-                                                            <th scope="row">启动时间</th>
-                                                            <td>{{ bot_start_time }}</td>
-                                                        </tr>
-                                                        <tr>
-                                                            <th scope="row">API状态</th>
-                                                            <td><span class="badge bg-success">正常</span></td>
-                                                        </tr>
-                                                        <tr>
-                                                            <th scope="row">自动回复模式</th>
-                                                            <td>{{ '仅管理员' if is_admin_only else '所有用户' }}</td>
-                                                        </tr>
-                                                        <tr>
-                                                            <th scope="row">软件版本</th>
-                                                            <td>v1.3.0</td>
-                                                        </tr>
-                                                    </tbody>
-                                                </table>
-                                            </div>
-                                        </div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <!-- 群组管理 -->
-                        <div class="tab-pane fade" id="pills-groups" role="tabpanel" aria-labelledby="pills-groups-tab">
-                            <div class="d-flex justify-content-between mb-3">
-                                <h5>群组列表</h5>
-                                <button class="btn btn-sm btn-primary">
-                                    <i class="bi bi-plus-circle"></i> 添加群组
-                                </button>
-                            </div>
-                            <div class="table-responsive">
-                                <table class="table table-dark table-hover">
-                                    <thead>
-                                        <tr>
-                                            <th>#</th>
-                                            <th>群组编号</th>
-                                            <th>群组名称</th>
-                                            <th>群组链接</th>
-                                            <th>操作</th>
-                                        </tr>
-                                    </thead>
-                                    <tbody>
-                                        {% for group in groups %}
-                                        <tr>
-                                            <td>{{ group.id }}</td>
-                                            <td>{{ group.group_number }}</td>
-                                            <td>{{ group.name }}</td>
-                                            <td><a href="{{ group.link }}" target="_blank" class="text-info">{{ group.link }}</a></td>
-                                            <td>
-                                                <button class="btn btn-sm btn-warning"><i class="bi bi-pencil"></i></button>
-                                                <button class="btn btn-sm btn-danger"><i class="bi bi-trash"></i></button>
-                                            </td>
-                                        </tr>
-                                        {% endfor %}
-                                    </tbody>
-                                </table>
-                            </div>
-                            <nav>
-                                <ul class="pagination justify-content-center">
-                                    <li class="page-item disabled">
-                                        <a class="page-link" href="#" tabindex="-1">上一页</a>
-                                    </li>
-                                    <li class="page-item active"><a class="page-link" href="#">1</a></li>
-                                    <li class="page-item"><a class="page-link" href="#">2</a></li>
-                                    <li class="page-item"><a class="page-link" href="#">3</a></li>
-                                    <li class="page-item">
-                                        <a class="page-link" href="#">下一页</a>
-                                    </li>
-                                </ul>
-                            </nav>
-                        </div>
-                        
-                        <!-- 关键词管理 -->
-                        <div class="tab-pane fade" id="pills-keywords" role="tabpanel" aria-labelledby="pills-keywords-tab">
-                            <div class="d-flex justify-content-between mb-3">
-                                <h5>关键词回复配置</h5>
-                                <button class="btn btn-sm btn-primary">
-                                    <i class="bi bi-plus-circle"></i> 添加关键词
-                                </button>
-                            </div>
-                            <div class="table-responsive">
-                                <table class="table table-dark table-hover">
-                                    <thead>
-                                        <tr>
-                                            <th>#</th>
-                                            <th>关键词</th>
-                                            <th>回复内容</th>
-                                            <th>状态</th>
-                                            <th>操作</th>
-                                        </tr>
-                                    </thead>
-                                    <tbody>
-                                        {% for kr in keyword_responses %}
-                                        <tr>
-                                            <td>{{ kr.id }}</td>
-                                            <td>{{ kr.keyword }}</td>
-                                            <td>{{ kr.response[:30] }}{% if kr.response|length > 30 %}...{% endif %}</td>
-                                            <td>
-                                                <span class="badge {{ 'bg-success' if kr.is_active else 'bg-secondary' }}">
-                                                    {{ '启用' if kr.is_active else '禁用' }}
-                                                </span>
-                                            </td>
-                                            <td>
-                                                <button class="btn btn-sm btn-warning"><i class="bi bi-pencil"></i></button>
-                                                <button class="btn btn-sm btn-info"><i class="bi bi-toggle-on"></i></button>
-                                                <button class="btn btn-sm btn-danger"><i class="bi bi-trash"></i></button>
-                                            </td>
-                                        </tr>
-                                        {% endfor %}
-                                    </tbody>
-                                </table>
-                            </div>
-                        </div>
-                        
-                        <!-- 日志 -->
-                        <div class="tab-pane fade" id="pills-logs" role="tabpanel" aria-labelledby="pills-logs-tab">
-                            <div class="d-flex justify-content-between mb-3">
-                                <h5>消息日志</h5>
-                                <div>
-                                    <button class="btn btn-sm btn-info me-2">
-                                        <i class="bi bi-download"></i> 导出日志
-                                    </button>
-                                    <button class="btn btn-sm btn-danger">
-                                        <i class="bi bi-trash"></i> 清除日志
-                                    </button>
-                                </div>
-                            </div>
-                            <div class="table-responsive">
-                                <table class="table table-dark table-hover">
-                                    <thead>
-                                        <tr>
-                                            <th>#</th>
-                                            <th>时间</th>
-                                            <th>群组</th>
-                                            <th>用户</th>
-                                            <th>消息</th>
-                                            <th>触发关键词</th>
-                                        </tr>
-                                    </thead>
-                                    <tbody>
-                                        {% for log in message_logs %}
-                                        <tr>
-                                            <td>{{ log.id }}</td>
-                                            <td>{{ log.processed_at.strftime('%Y-%m-%d %H:%M:%S') }}</td>
-                                            <td>{{ log.chat_title }}</td>
-                                            <td>{{ log.username }}</td>
-                                            <td>{{ log.message_text[:30] }}{% if log.message_text|length > 30 %}...{% endif %}</td>
-                                            <td>{{ log.trigger_keyword }}</td>
-                                        </tr>
-                                        {% endfor %}
-                                    </tbody>
-                                </table>
-                            </div>
-                            <nav>
-                                <ul class="pagination justify-content-center">
-                                    <li class="page-item disabled">
-                                        <a class="page-link" href="#" tabindex="-1">上一页</a>
-                                    </li>
-                                    <li class="page-item active"><a class="page-link" href="#">1</a></li>
-                                    <li class="page-item"><a class="page-link" href="#">2</a></li>
-                                    <li class="page-item"><a class="page-link" href="#">3</a></li>
-                                    <li class="page-item">
-                                        <a class="page-link" href="#">下一页</a>
-                                    </li>
-                                </ul>
-                            </nav>
-                        </div>
-                        
-                        <!-- 设置 -->
-                        <div class="tab-pane fade" id="pills-settings" role="tabpanel" aria-labelledby="pills-settings-tab">
-                            <div class="row">
-                                <div class="col-md-6">
-                                    <div class="card">
-                                        <div class="card-header">
-                                            <h5 class="mb-0"><i class="bi bi-chat-quote"></i> 自动回复设置</h5>
-                                        </div>
-                                        <div class="card-body">
-                                            <div class="form-check form-switch mb-3">
-                                                <input class="form-check-input" type="checkbox" id="adminOnlyMode" {{ 'checked' if is_admin_only else '' }}>
-                                                <label class="form-check-label" for="adminOnlyMode">仅管理员模式</label>
-                                                <small class="form-text text-muted d-block">当启用时，仅群组管理员触发的关键词会被回复</small>
-                                            </div>
-                                            <div class="mb-3">
-                                                <label for="welcomeMessage" class="form-label">入群欢迎消息</label>
-                                                <textarea class="form-control" id="welcomeMessage" rows="3">{{ welcome_message }}</textarea>
-                                            </div>
-                                            <div class="mb-3">
-                                                <label for="privateChatWelcome" class="form-label">私聊欢迎消息</label>
-                                                <textarea class="form-control" id="privateChatWelcome" rows="3">{{ private_chat_welcome }}</textarea>
-                                            </div>
-                                            <button class="btn btn-primary">保存设置</button>
-                                        </div>
-                                    </div>
-                                </div>
-                                <div class="col-md-6">
-                                    <div class="card">
-                                        <div class="card-header">
-                                            <h5 class="mb-0"><i class="bi bi-shield-lock"></i> 安全设置</h5>
-                                        </div>
-                                        <div class="card-body">
-                                            <div class="form-check form-switch mb-3">
-                                                <input class="form-check-input" type="checkbox" id="enablePhoneVerification" checked>
-                                                <label class="form-check-label" for="enablePhoneVerification">启用手机验证</label>
-                                                <small class="form-text text-muted d-block">当启用时，用户需要通过手机验证才能获取群组信息</small>
-                                            </div>
-                                            <div class="mb-3">
-                                                <label for="verificationCodeLength" class="form-label">验证码长度</label>
-                                                <select class="form-select" id="verificationCodeLength">
-                                                    <option value="4">4位数字</option>
-                                                    <option value="6" selected>6位数字</option>
-                                                    <option value="8">8位数字</option>
-                                                </select>
-                                            </div>
-                                            <div class="mb-3">
-                                                <label for="verificationCodeExpiry" class="form-label">验证码有效期（分钟）</label>
-                                                <input type="number" class="form-control" id="verificationCodeExpiry" value="10">
-                                            </div>
-                                            <button class="btn btn-primary">保存设置</button>
-                                        </div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                <div class="card-footer text-center">
-                    <small>© 2025 好旺公群机器人团队 | 版本 1.3.0</small>
-                </div>
-            </div>
-        </div>
-        
-        <!-- JavaScript 依赖 -->
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-        <script>
-            // 初始化工具提示
-            document.addEventListener('DOMContentLoaded', function() {
-                // 获取所有tooltips
-                var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'))
-                var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
-                    return new bootstrap.Tooltip(tooltipTriggerEl)
-                })
-            });
-        </script>
-    </body>
-    </html>
-    """
-    
-    # 获取数据库数据用于显示
-    from models import Group, Keyword, KeywordResponse, Channel, MessageLog, BotSettings, PhoneVerification
-    
-    # 分页显示，每页10条数据
-    page = 1
-    per_page = 10
-    
-    # 获取最新的10条消息日志
-    message_logs = MessageLog.query.order_by(MessageLog.processed_at.desc()).limit(per_page).all()
-    
-    # 获取群组总数
-    groups = Group.query.order_by(Group.group_number).limit(per_page).all()
-    
-    # 获取关键词回复
-    keyword_responses = KeywordResponse.query.all()
-    
-    # 获取机器人设置
-    bot_settings = BotSettings.query.first()
-    is_admin_only = True
-    welcome_message = ""
-    private_chat_welcome = ""
-    
-    if bot_settings:
-        is_admin_only = bot_settings.is_admin_only
-        welcome_message = bot_settings.welcome_message
-        private_chat_welcome = bot_settings.private_chat_welcome
-    
-    # 获取已验证手机号的数量
-    phone_verifications_count = PhoneVerification.query.filter_by(is_verified=True).count()
-    
     # 格式化机器人启动时间
     bot_start_time = bot_status["started_at"].strftime("%Y-%m-%d %H:%M:%S") if bot_status["started_at"] else "未知"
     
-    return render_template_string(
-        html, 
+    return render_template(
+        "dashboard.html",
         status=status_text, 
         uptime=uptime, 
-        messages=bot_status["messages_processed"],
-        groups=groups,
-        message_logs=message_logs,
-        keyword_responses=keyword_responses,
-        is_admin_only=is_admin_only,
-        welcome_message=welcome_message,
-        private_chat_welcome=private_chat_welcome,
-        phone_verifications=phone_verifications_count,
-        bot_start_time=bot_start_time
+        messages=int(bot_status["messages_processed"].total()),
+        handler_stats=_handler_stats(),
+        keyword_cache=bot_status["keyword_cache"].by_label(),
+        bot_settings_cache=bot_status["bot_settings_cache"].by_label(),
+        channel_cache=bot_status["channel_cache"].by_label(),
+        phone_verification_cache=bot_status["phone_verification_cache"].by_label(),
+        group_lookup_cache=bot_status["group_lookup_cache"].by_label(),
+        message_log=bot_status["message_log"],
+        auto_reply_stages=bot_status["auto_reply_stages"].by_label(),
+        bot_start_time=bot_start_time,
+        **_dashboard_summary(),
+        **_dashboard_keywords(request.args.get("kw_page", 1, type=int))
     )
 
+@app.route('/healthz')
+def healthz():
+    """存活检查：只确认 Web 进程能够响应，不访问数据库"""
+    return jsonify(status="ok")
+
+@app.route('/readyz')
+def readyz():
+    """就绪检查：数据库可以访问，并且机器人心跳正常、正在轮询更新。不就绪时返回 503"""
+    checks = {}
+    try:
+        db.session.execute(db.text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        logging.warning(f"就绪检查数据库访问失败: {str(e)}")
+        checks["database"] = "error"
+    
+    heartbeat_at = bot_status.get("heartbeat_at")
+    if heartbeat_at is None:
+        checks["bot"] = "not started"
+    elif time.monotonic() - heartbeat_at > READY_HEARTBEAT_MAX_AGE:
+        checks["bot"] = "heartbeat stale"
+    elif not bot_status.get("polling"):
+        checks["bot"] = "not polling"
+    else:
+        checks["bot"] = "ok"
+    
+    ready = all(value == "ok" for value in checks.values())
+    return jsonify(status="ok" if ready else "unavailable", checks=checks), 200 if ready else 503
+
+# bot_status 中按 event 标签计数的缓存统计 {指标中的缓存名称: bot_status 键}
+_CACHE_STATS = {
+    "keyword_response": "keyword_cache",
+    "bot_settings": "bot_settings_cache",
+    "channel": "channel_cache",
+    "phone_verification": "phone_verification_cache",
+    "group_lookup": "group_lookup_cache",
+}
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 文本格式的运行指标，只读取内存中的统计，不访问数据库"""
+    uptime = (datetime.now() - bot_status["started_at"]).total_seconds() if bot_status["started_at"] else 0
+    message_log = bot_status["message_log"]
+    db_pool = bot_status["db_pool"]
+    heartbeat_at = bot_status.get("heartbeat_at")
+    parts = [
+        render_metric("telegram_bot_up", "gauge", "Whether the bot is marked as running",
+                      [(None, int(bool(bot_status["is_running"])))]),
+        render_metric("telegram_bot_polling", "gauge", "Whether the bot was polling at the last heartbeat",
+                      [(None, int(bool(bot_status.get("polling"))))]),
+        render_metric("telegram_bot_heartbeat_age_seconds", "gauge", "Seconds since the last bot heartbeat",
+                      [(None, time.monotonic() - heartbeat_at)] if heartbeat_at is not None else []),
+        render_metric("telegram_bot_uptime_seconds", "gauge", "Seconds since the bot started",
+                      [(None, uptime)]),
+        render_metric("telegram_bot_cache_events_total", "counter", "Cache lookups by result (hits, misses, rebuilds, filtered)",
+                      [({"cache": cache, "event": event}, count)
+                       for cache, key in _CACHE_STATS.items()
+                       for event, count in bot_status[key].by_label().items()]),
+        render_metric("telegram_bot_message_log_total", "counter", "Message log entries by outcome",
+                      [({"result": result}, count) for result, count in message_log.items()]),
+        render_metric("telegram_bot_message_log_queue_depth", "gauge", "Message log entries waiting to be written",
+                      [(None, max(0, message_log.get("queued", 0) - message_log.get("written", 0) - message_log.get("failed", 0)))]),
+        render_metric("telegram_bot_db_pending_queries", "gauge", "Database calls queued or running in the worker pool",
+                      [(None, db_pool["pending"])]),
+        render_metric("telegram_bot_db_timeouts_total", "counter", "Database calls that exceeded their timeout",
+                      [(None, db_pool["timeouts"])]),
+        # 按线程分片的计数器和直方图
+        registry.render(),
+    ]
+    return Response("".join(parts), mimetype="text/plain; version=0.0.4")
+
 # 导入并初始化数据库模型
 with app.app_context():
     # 导入模型
@@ -627,6 +245,15 @@ with app.app_context():
     # 创建数据库表
     db.create_all()
     
+    # 旧数据库没有群组分类列时添加该列并回填分类
+    from migrate_group_category import ensure_category_column, backfill_group_categories
+    if ensure_category_column():
+        backfill_group_categories(only_missing=True)
+    
+    # 补充消息日志表的列和索引，PostgreSQL 上的空表直接转换为按月分区的表
+    from migrate_message_log import upgrade_message_log
+    upgrade_message_log()
+    
     # 检查并初始化基本设置
     def init_default_data():
         # 初始化机器人设置
@@ -665,12 +292,14 @@ with app.app_context():
         # 初始化群组数据
         if Group.query.count() == 0:
             from config import GROUP_DATABASE
+            from utils.group_category import classify_group
             for group_number, group_data in GROUP_DATABASE["数字编号"].items():
                 group = Group(
                     group_number=group_number,
                     name=group_data["name"],
                     link=group_data["link"],
-                    description=group_data["description"]
+                    description=group_data["description"],
+                    category=classify_group(group_data["description"])
                 )
                 db.session.add(group)
                 
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+群组关键词搜索性能基准测试
+在临时 SQLite 数据库中生成数千个共享热门关键词（如 "好旺"、"USDT"）的群组，
+比较原有逐个关键词加载群组的实现（N+1 查询）、单次联表查询和进程内搜索索引的
+SQL 语句数量和耗时。联表查询的语句数量应当不随群组数量增长，
+并校验分页查询逐页翻完的结果与不分页的结果一致。
+
+运行方式：
+    python bench_group_search.py
+"""
+
+import os
+import random
+import tempfile
+import time
+
+# 必须在导入 app 之前设置数据库地址
+_db_file = os.path.join(tempfile.mkdtemp(), "bench_group_search.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+from sqlalchemy import event
+
+from app import app, db
+import models
+from bot import data_access
+
+SIZES = [1000, 5000]
+# 每个群组除热门关键词外再关联的随机关键词数量
+EXTRA_KEYWORDS = 3
+POPULAR_KEYWORDS = ["好旺", "USDT", "担保"]
+# "词" 会命中大量随机关键词，原实现需要为每个关键词单独加载群组
+QUERIES = ["好旺", "USDT", "担保", "旺", "词", "不存在的关键词"]
+ROUNDS = 3
+
+def legacy_search(keyword):
+    """原有实现：每个关键词单独加载关联的群组，并用列表推导去重"""
+    found_groups = []
+    db_keywords = models.Keyword.query.filter(models.Keyword.word.ilike(f"%{keyword}%")).all()
+    for kw in db_keywords:
+        for group in kw.groups:
+            if group.group_number not in [g.get("number") for g in found_groups]:
+                found_groups.append({
+                    "number": group.group_number,
+                    "name": group.name,
+                    "description": group.description,
+                    "link": group.link
+                })
+    if not found_groups:
+        db_groups = models.Group.query.filter(
+            (models.Group.name.ilike(f"%{keyword}%")) |
+            (models.Group.description.ilike(f"%{keyword}%"))
+        ).all()
+        for group in db_groups:
+            if group.group_number not in [g.get("number") for g in found_groups]:
+                found_groups.append({
+                    "number": group.group_number,
+                    "name": group.name,
+                    "description": group.description,
+                    "link": group.link
+                })
+    return found_groups
+
+def seed(rng, size):
+    """生成 size 个群组，每个群组关联一个热门关键词和若干随机关键词"""
+    db.drop_all()
+    db.create_all()
+    keywords = {word: models.Keyword(word=word) for word in POPULAR_KEYWORDS}
+    keywords.update({f"词{i}": models.Keyword(word=f"词{i}") for i in range(size // 2)})
+    pool = list(keywords.values())
+    for i in range(size):
+        group = models.Group(
+            group_number=str(i + 1),
+            name=f"测试群{i + 1}",
+            link=f"https://t.me/test_{i + 1}",
+            description=f"第 {i + 1} 个测试群组"
+        )
+        group.keywords = list({keywords[rng.choice(POPULAR_KEYWORDS)], *rng.sample(pool, EXTRA_KEYWORDS)})
+        db.session.add(group)
+    db.session.commit()
+    db.session.expunge_all()
+
+class StatementCounter:
+    """统计执行的 SQL 语句数量"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def measure(counter, func, keyword):
+    """返回 (结果, SQL 语句数量, 最好耗时毫秒)"""
+    best = None
+    for _ in range(ROUNDS):
+        db.session.expunge_all()
+        counter.count = 0
+        start = time.perf_counter()
+        result = func(keyword)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, counter.count, best
+
+def main():
+    rng = random.Random(42)
+    with app.app_context():
+        counter = StatementCounter(db.engine)
+        header = f"{'群组数量':>8} | {'关键词':>12} | {'命中':>5} | {'原实现 SQL/ms':>16} | {'联表 SQL/ms':>14} | {'索引 ms':>8}"
+        print(header)
+        print("-" * 96)
+        for size in SIZES:
+            seed(rng, size)
+            data_access._group_index_state["built"] = False
+            data_access._sync_group_index()
+
+            for keyword in QUERIES:
+                legacy, legacy_sql, legacy_ms = measure(counter, legacy_search, keyword)
+                (joined, _), joined_sql, joined_ms = measure(
+                    counter, lambda k: data_access._query_groups_page(k, page_size=None), keyword
+                )
+                indexed, _, index_ms = measure(counter, data_access.group_index.search, keyword)
+
+                # 不限制数量时联表查询与原实现结果一致；索引总是同时匹配名称和描述，结果可能更多
+                legacy_numbers = {g["number"] for g in legacy}
+                assert legacy_numbers == {g["number"] for g in joined}
+                assert legacy_numbers <= {g["number"] for g in indexed}
+
+                # 逐页翻完的结果与不分页的结果一致，每页最多 GROUP_SEARCH_PAGE_SIZE 个群组
+                for search_page in (data_access._query_groups_page, data_access._search_group_index):
+                    paged, cursor = [], None
+                    while True:
+                        page, cursor = search_page(keyword, cursor)
+                        assert len(page) <= data_access.GROUP_SEARCH_PAGE_SIZE
+                        paged.extend(page)
+                        if cursor is None:
+                            break
+                    full = joined if search_page is data_access._query_groups_page else indexed
+                    assert [g["number"] for g in paged] == [g["number"] for g in full]
+
+                print(
+                    f"{size:>8} | {keyword:>12} | {len(legacy):>5} | "
+                    f"{legacy_sql:>6} / {legacy_ms:>7.1f} | {joined_sql:>4} / {joined_ms:>7.1f} | {index_ms:>8.2f}"
+                )
+
+if __name__ == "__main__":
+    main()
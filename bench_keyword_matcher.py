@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+关键词匹配性能基准测试
+比较逐个关键词 `in` 扫描和 Aho-Corasick 自动机在不同关键词数量下的单条消息匹配耗时。
+自动机的耗时应当基本不随关键词数量增长。
+
+运行方式：
+    python bench_keyword_matcher.py
+"""
+
+import random
+import time
+from utils.keyword_matcher import KeywordMatcher
+
+# 常用汉字，用于生成随机关键词和消息
+CHARSET = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处府研质"
+
+SIZES = [40, 500, 5000, 50000]
+MESSAGES = 2000
+ROUNDS = 3
+
+def random_word(rng, min_len=2, max_len=5):
+    """生成一个随机关键词"""
+    return "".join(rng.choice(CHARSET) for _ in range(rng.randint(min_len, max_len)))
+
+def build_items(rng, size):
+    """生成指定数量的 (关键词, 回复) 列表"""
+    return [(random_word(rng), f"回复{i}") for i in range(size)]
+
+def naive_match(items, message_text):
+    """原有实现：逐个关键词检查是否出现在消息中"""
+    message_lower = message_text.lower()
+    for keyword, response in items:
+        if keyword.lower() in message_lower:
+            return response
+    return None
+
+def time_per_message(func, messages):
+    """返回每条消息的平均耗时（微秒），取多轮中的最好成绩"""
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for message in messages:
+            func(message)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(messages) * 1_000_000
+
+def main():
+    rng = random.Random(42)
+    # 普通聊天消息，长度 10-60 个字符，大部分不会命中任何关键词
+    messages = ["".join(rng.choice(CHARSET) for _ in range(rng.randint(10, 60))) for _ in range(MESSAGES)]
+
+    print(f"{'关键词数量':>10} | {'编译耗时(ms)':>12} | {'逐个扫描(us/条)':>16} | {'自动机(us/条)':>14}")
+    print("-" * 64)
+    for size in SIZES:
+        items = build_items(rng, size)
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(items)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        # 两种实现的结果必须一致
+        for message in messages[:200]:
+            assert naive_match(items, message) == matcher.match(message)
+
+        naive_us = time_per_message(lambda m: naive_match(items, m), messages)
+        matcher_us = time_per_message(matcher.match, messages)
+        print(f"{size:>10} | {compile_ms:>12.1f} | {naive_us:>16.1f} | {matcher_us:>14.1f}")
+
+if __name__ == "__main__":
+    main()
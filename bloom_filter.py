@@ -0,0 +1,49 @@
+import hashlib
+import math
+import threading
+from typing import Hashable
+
+class BloomFilter:
+    """
+    布隆过滤器。
+
+    判断元素"一定不存在"或"可能存在"：不在过滤器中的元素查询结果一定为 False，
+    已添加的元素查询结果一定为 True，未添加的元素有 error_rate 的概率误判为 True。
+    元素数量超过 capacity 后误判率会升高，但不会出现漏判。
+    可以在多个线程中同时添加和查询：设置位是先读后写，添加时加锁以免并发添加互相覆盖；查询不加锁。
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Args:
+            capacity: 预计的元素数量
+            error_rate: 元素数量不超过 capacity 时的误判率
+        """
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, item: Hashable):
+        # 双重哈希：由一次 blake2b 的两个 64 位结果生成 hash_count 个位置
+        digest = hashlib.blake2b(repr(item).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: Hashable) -> None:
+        """添加元素"""
+        positions = list(self._positions(item))
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item: Hashable) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        """添加过的元素次数（重复添加会重复计数）"""
+        return self.count
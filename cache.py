@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+def cache_event_counter(*events: str) -> Counter:
+    """创建按 event 标签记录缓存命中、未命中等次数的计数器，没有计数的事件也以 0 显示"""
+    return Counter(("event",), known=[(event,) for event in events])
+
+class VersionedSnapshot:
+    """
+    进程内数据快照。
+
+    快照只在以下情况下重新加载：
+    1. 第一次访问；
+    2. 数据版本号发生变化（由数据库变更事件递增）；
+    3. 距离上次加载超过 TTL（兜底，用于感知其他进程的修改）。
+    """
+
+    def __init__(self, loader: Callable[[], Any], version_getter: Callable[[], int],
+                 ttl: float, stats: Optional[Counter] = None, name: str = "snapshot"):
+        """
+        Args:
+            loader: 加载快照数据的函数
+            version_getter: 返回当前数据版本号的函数
+            ttl: 快照最长有效时间（秒）
+            stats: 按 event 标签记录命中/未命中/重建次数的计数器
+            name: 快照名称，用于日志
+        """
+        self._loader = loader
+        self._version_getter = version_getter
+        self._ttl = ttl
+        self._name = name
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._loaded = False
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self.stats = stats if stats is not None else cache_event_counter("hits", "misses", "rebuilds")
+
+    def _is_fresh(self, version: int) -> bool:
+        return (
+            self._loaded
+            and self._version == version
+            and time.monotonic() - self._loaded_at < self._ttl
+        )
+
+    def peek(self) -> Tuple[bool, Any]:
+        """
+        不加载数据，只检查当前快照是否仍然有效。
+
+        Returns:
+            (是否有效, 快照数据)，快照无效时数据为 None
+        """
+        if self._is_fresh(self._version_getter()):
+            self.stats.inc("hits")
+            return True, self._value
+        return False, None
+
+    def get(self) -> Any:
+        """
+        获取快照数据，必要时重新加载。
+
+        Returns:
+            快照数据。加载失败时如果已有旧快照则返回旧快照，否则抛出异常。
+        """
+        version = self._version_getter()
+        if self._is_fresh(version):
+            self.stats.inc("hits")
+            return self._value
+
+        with self._lock:
+            # 等待锁期间可能已经被其他线程重建
+            if self._is_fresh(version):
+                self.stats.inc("hits")
+                return self._value
+
+            self.stats.inc("misses")
+            try:
+                value = self._loader()
+            except Exception as e:
+                if not self._loaded:
+                    raise
+                # 加载失败时继续使用旧快照，TTL 之后再重试
+                logger.warning(f"{self._name} 快照重建失败，继续使用旧数据: {str(e)}")
+                self._version = version
+                self._loaded_at = time.monotonic()
+                return self._value
+
+            self._value = value
+            self._loaded = True
+            self._version = version
+            self._loaded_at = time.monotonic()
+            self.stats.inc("rebuilds")
+            return value
+
+    def invalidate(self) -> None:
+        """使快照失效，下次访问时重新加载"""
+        with self._lock:
+            self._version = None
+
+class TTLCache:
+    """
+    带过期时间的 LRU 缓存。
+
+    超过 maxsize 时淘汰最久未使用的条目，过期的条目在访问时删除。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Args:
+            maxsize: 最多缓存的条目数
+            ttl: 默认过期时间（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，不存在或已过期时返回 default"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存值，ttl 为空时使用默认过期时间"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """删除并返回缓存值"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
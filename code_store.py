@@ -0,0 +1,198 @@
+"""
+验证码存储
+验证码按用户保存，支持两种存储方式：
+1. memory：进程内字典加按过期时间排序的最小堆，清理时只弹出已过期的条目；
+2. database：保存在 verification_code 表中，重启后不会丢失，多个机器人进程共享。
+验证码发送和验证尝试的限流令牌桶保存在同一个存储中。
+过期的验证码和已恢复满的令牌桶由定时任务调用 sweep() 清理。
+"""
+
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import case
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+class MemoryCodeStore:
+    """进程内验证码存储，过期时间保存在最小堆中，清理时不需要扫描全部验证码"""
+
+    def __init__(self):
+        # {user_id: {"code": 验证码, "phone": 手机号, "expires_at": 过期时间}}
+        self._codes: Dict[int, Dict[str, Any]] = {}
+        # [(过期时间, user_id)]，重新发送验证码后旧条目留在堆中，清理时跳过
+        self._expiry_heap: List[Tuple[datetime, int]] = []
+        # 限流令牌桶 {key: [剩余令牌数, 上次更新时间, 恢复满的时间]}
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def set(self, user_id: int, code: str, phone: str, expires_at: datetime) -> None:
+        """保存用户的验证码，覆盖之前的验证码"""
+        with self._lock:
+            self._codes[user_id] = {"code": code, "phone": phone, "expires_at": expires_at}
+            heapq.heappush(self._expiry_heap, (expires_at, user_id))
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """获取用户未过期的验证码 {code, phone, expires_at}，不存在或已过期时返回 None"""
+        with self._lock:
+            info = self._codes.get(user_id)
+        if info is None or info["expires_at"] <= datetime.utcnow():
+            return None
+        return dict(info)
+
+    def delete(self, user_id: int, code: Optional[str] = None) -> bool:
+        """删除用户的验证码，指定 code 时只在验证码一致时删除。返回是否删除"""
+        with self._lock:
+            info = self._codes.get(user_id)
+            if info is None or (code is not None and info["code"] != code):
+                return False
+            del self._codes[user_id]
+            return True
+
+    def take_token(self, key: str, capacity: int, window: float) -> bool:
+        """
+        从令牌桶中取一个令牌。桶最多有 capacity 个令牌，每 window 秒恢复 capacity 个。
+
+        Returns:
+            是否取到令牌，取不到时说明超过了限制
+        """
+        now = time.time()
+        rate = capacity / window
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens < 1:
+                return False
+            tokens -= 1
+            self._buckets[key] = [tokens, now, now + (capacity - tokens) / rate]
+            return True
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """删除已过期的验证码和已恢复满的令牌桶，返回删除的条目数"""
+        now = now or datetime.utcnow()
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, user_id = heapq.heappop(self._expiry_heap)
+                info = self._codes.get(user_id)
+                # 用户已重新获取验证码时堆中的旧条目与当前验证码不一致
+                if info is not None and info["expires_at"] == expires_at:
+                    del self._codes[user_id]
+                    removed += 1
+            # 令牌桶数量不超过限流窗口内的活跃用户和手机号数量，直接遍历
+            timestamp = time.time()
+            full = [key for key, bucket in self._buckets.items() if bucket[2] <= timestamp]
+            for key in full:
+                del self._buckets[key]
+        return removed + len(full)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+class DatabaseCodeStore:
+    """数据库验证码存储，每个操作在 Flask 应用上下文中执行一条语句"""
+
+    def set(self, user_id: int, code: str, phone: str, expires_at: datetime) -> None:
+        """保存用户的验证码，覆盖之前的验证码"""
+        from app import app, db
+        from models import VerificationCode
+        with app.app_context():
+            db.session.merge(VerificationCode(
+                user_id=user_id, code=code, phone_number=phone,
+                expires_at=expires_at, created_at=datetime.utcnow()
+            ))
+            db.session.commit()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """获取用户未过期的验证码 {code, phone, expires_at}，不存在或已过期时返回 None"""
+        from app import app
+        from models import VerificationCode
+        with app.app_context():
+            row = VerificationCode.query.filter(
+                VerificationCode.user_id == user_id, VerificationCode.expires_at > datetime.utcnow()
+            ).first()
+            if row is None:
+                return None
+            return {"code": row.code, "phone": row.phone_number, "expires_at": row.expires_at}
+
+    def delete(self, user_id: int, code: Optional[str] = None) -> bool:
+        """
+        删除用户的验证码，指定 code 时只在验证码一致时删除。返回是否删除。
+        多个进程同时验证同一个验证码时只有一个能删除成功，验证码不会被重复使用。
+        """
+        from app import app, db
+        from models import VerificationCode
+        with app.app_context():
+            query = VerificationCode.query.filter(VerificationCode.user_id == user_id)
+            if code is not None:
+                query = query.filter(VerificationCode.code == code)
+            deleted = query.delete(synchronize_session=False)
+            db.session.commit()
+            return deleted > 0
+
+    def take_token(self, key: str, capacity: int, window: float) -> bool:
+        """
+        从令牌桶中取一个令牌。桶最多有 capacity 个令牌，每 window 秒恢复 capacity 个。
+        恢复令牌和扣减令牌在一条 UPDATE 语句中完成，多个进程同时取令牌时不会超出限制。
+
+        Returns:
+            是否取到令牌，取不到时说明超过了限制
+        """
+        from app import app, db
+        from models import RateLimitBucket
+
+        now = time.time()
+        rate = capacity / window
+        # 其他进程可能刚用更晚的时间更新了令牌桶，此时不恢复令牌，更新时间也不回退
+        updated_at = case((RateLimitBucket.updated_at < now, now), else_=RateLimitBucket.updated_at)
+        refilled = RateLimitBucket.tokens + (updated_at - RateLimitBucket.updated_at) * rate
+        tokens = case((refilled > capacity, capacity), else_=refilled)
+        with app.app_context():
+            # 最多尝试两次：第一次取令牌时创建令牌桶，其他进程同时创建导致主键冲突时再扣减一次
+            for attempt in range(2):
+                taken = RateLimitBucket.query.filter(RateLimitBucket.key == key, tokens >= 1).update({
+                    RateLimitBucket.tokens: tokens - 1,
+                    RateLimitBucket.updated_at: updated_at,
+                    RateLimitBucket.full_at: updated_at + (capacity - (tokens - 1)) / rate
+                }, synchronize_session=False)
+                if taken or attempt or db.session.get(RateLimitBucket, key) is not None:
+                    break
+                db.session.add(RateLimitBucket(key=key, tokens=capacity - 1, updated_at=now, full_at=now + 1 / rate))
+                try:
+                    db.session.commit()
+                    return True
+                except IntegrityError:
+                    db.session.rollback()
+            db.session.commit()
+            return taken > 0
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """删除已过期的验证码（expires_at 有索引）和已恢复满的令牌桶，返回删除的条目数"""
+        from app import app, db
+        from models import RateLimitBucket, VerificationCode
+        with app.app_context():
+            deleted = VerificationCode.query.filter(
+                VerificationCode.expires_at <= (now or datetime.utcnow())
+            ).delete(synchronize_session=False)
+            deleted += RateLimitBucket.query.filter(
+                RateLimitBucket.full_at <= time.time()
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            return deleted
+
+def create_code_store(backend: str):
+    """
+    根据配置创建验证码存储。
+
+    Args:
+        backend: memory 或 database
+    """
+    if backend == "memory":
+        return MemoryCodeStore()
+    if backend == "database":
+        return DatabaseCodeStore()
+    raise ValueError(f"未知的验证码存储方式: {backend}")
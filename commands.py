@@ -4,13 +4,22 @@ from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, CallbackQueryHandler, ConversationHandler
 from telegram.error import TelegramError
+from telegram.helpers import escape_markdown
 from bot.helpers import is_user_admin
-from app import db
-from models import PhoneVerification
+from bot.data_access import get_phone_verification, save_phone_verification, get_chat_message_stats, run_db
 from utils.verification import send_verification_code, verify_code
 
 logger = logging.getLogger(__name__)
 
+async def _is_phone_verified(user_id: int) -> bool:
+    """检查用户是否已完成手机验证，查询失败时视为未验证"""
+    try:
+        verification = await get_phone_verification(user_id)
+    except Exception as e:
+        logger.warning(f"查询手机验证状态失败: {str(e)}")
+        return False
+    return bool(verification and verification["is_verified"])
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /start is issued."""
     user_id = update.effective_user.id
@@ -18,8 +27,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     
     if chat_type == "private":
         # 检查用户是否已验证手机
-        existing_verification = PhoneVerification.query.filter_by(user_id=user_id).first()
-        is_verified = existing_verification and existing_verification.is_verified
+        is_verified = await _is_phone_verified(user_id)
         
         welcome_text = (
             "👋 *欢迎使用好旺公群管理机器人！* 👋\n\n"
@@ -111,6 +119,19 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         date_str = now.strftime("%Y年%m月%d日")
         time_str = now.strftime("%H:%M:%S")
         
+        # 最近7天的消息统计来自按小时汇总的统计表，不扫描原始日志
+        activity = ""
+        try:
+            message_stats = await get_chat_message_stats(chat.id, days=7)
+            activity = f"*近7天消息:* {message_stats['message_count']} 条\n"
+            if message_stats["top_keywords"]:
+                keywords = "、".join(
+                    f"{escape_markdown(keyword)}({count})" for keyword, count in message_stats["top_keywords"]
+                )
+                activity += f"*热门关键词:* {keywords}\n"
+        except Exception as e:
+            logger.warning(f"获取消息统计失败: {str(e)}")
+        
         # Format statistics message
         stats_message = f"""
 📊 *群组统计信息* 📊
@@ -119,7 +140,7 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 *群组成员:* {member_count} 人
 *群组类型:* {'超级群组' if chat.type == 'supergroup' else '普通群组'}
 *群组ID:* `{chat.id}`
-
+{activity}
 *生成时间:* {date_str} {time_str}
 """
         
@@ -426,8 +447,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         user_id = update.effective_user.id
         
         # 检查用户是否已验证手机
-        existing_verification = PhoneVerification.query.filter_by(user_id=user_id).first()
-        is_verified = existing_verification and existing_verification.is_verified
+        is_verified = await _is_phone_verified(user_id)
         
         welcome_text = (
             "👋 *欢迎使用好旺公群管理机器人！* 👋\n\n"
@@ -790,12 +810,17 @@ async def verify_phone_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     username = update.effective_user.username
     
     # 检查用户是否已经验证
-    existing_verification = PhoneVerification.query.filter_by(user_id=user_id).first()
-    if existing_verification and existing_verification.is_verified:
+    try:
+        existing_verification = await get_phone_verification(user_id)
+    except Exception as e:
+        logger.warning(f"查询手机验证状态失败: {str(e)}")
+        existing_verification = None
+    
+    if existing_verification and existing_verification["is_verified"]:
         await update.message.reply_text(
             "✅ 您已经完成了手机号验证，无需重复验证。\n\n"
-            f"验证手机: {existing_verification.phone_number}\n"
-            f"验证时间: {existing_verification.verification_date.strftime('%Y-%m-%d %H:%M:%S') if existing_verification.verification_date else '未知'}"
+            f"验证手机: {existing_verification['phone_number']}\n"
+            f"验证时间: {existing_verification['verification_date'].strftime('%Y-%m-%d %H:%M:%S') if existing_verification['verification_date'] else '未知'}"
         )
         return ConversationHandler.END
     
@@ -840,7 +865,7 @@ async def phone_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     
     # 发送验证码
     phone_number = user_message.strip()
-    result = send_verification_code(user_id, phone_number)
+    result = await send_verification_code(user_id, phone_number)
     
     if result["success"]:
         # 保存电话号码到上下文
@@ -882,36 +907,25 @@ async def code_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         )
         return CODE_INPUT
     
-    # 验证输入的验证码
+    # 验证输入的验证码（验证码可能保存在数据库中，在数据库线程池中执行）
     verification_code = user_message.strip()
-    result = verify_code(user_id, verification_code)
+    try:
+        result = await run_db(verify_code, user_id, verification_code)
+    except Exception as e:
+        logger.error(f"验证验证码时出错: {str(e) or type(e).__name__}")
+        await update.message.reply_text(
+            "⚠️ 验证服务暂时不可用，请稍后重新输入验证码。\n\n"
+            "输入 /cancel 可取消验证流程。"
+        )
+        return CODE_INPUT
     
     if result["success"]:
         # 验证成功，保存到数据库
         phone_number = context.user_data.get('phone_number') or result.get('phone')
         
         try:
-            # 检查是否已存在验证记录
-            existing_verification = PhoneVerification.query.filter_by(user_id=user_id).first()
-            
-            if existing_verification:
-                # 更新现有记录
-                existing_verification.phone_number = phone_number
-                existing_verification.telegram_username = username
-                existing_verification.is_verified = True
-                existing_verification.verification_date = datetime.now()
-            else:
-                # 创建新记录
-                new_verification = PhoneVerification(
-                    user_id=user_id,
-                    telegram_username=username,
-                    phone_number=phone_number,
-                    is_verified=True,
-                    verification_date=datetime.now()
-                )
-                db.session.add(new_verification)
-            
-            db.session.commit()
+            # 保存验证记录（已存在则更新）
+            await save_phone_verification(user_id, username, phone_number)
             
             # 向用户发送验证成功的消息
             await update.message.reply_text(
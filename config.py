@@ -3,6 +3,105 @@ import os
 # Bot configuration
 DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
 
+# 关键词回复缓存的最长有效时间（秒），数据库变更时会立即失效，此项用于感知其他进程的修改
+KEYWORD_CACHE_TTL = int(os.environ.get("KEYWORD_CACHE_TTL", "300"))
+
+# 机器人设置缓存的最长有效时间（秒），本进程内修改设置时会立即失效，此项用于感知其他进程的修改
+BOT_SETTINGS_CACHE_TTL = int(os.environ.get("BOT_SETTINGS_CACHE_TTL", "300"))
+# 频道列表缓存的最长有效时间（秒），含义同上
+CHANNEL_CACHE_TTL = int(os.environ.get("CHANNEL_CACHE_TTL", "300"))
+
+# 群组禁言状态保存在内存中，每隔多少秒同步一次其他进程修改的禁言状态
+MUTE_STATE_SYNC_INTERVAL = int(os.environ.get("MUTE_STATE_SYNC_INTERVAL", "10"))
+
+# 手机验证记录缓存：LRU 缓存的用户数和缓存时间（秒），布隆过滤器预计的用户数（超过后误判率升高，只会多查询数据库），
+# 以及同步其他进程新增的验证记录的间隔（秒）
+VERIFIED_USER_CACHE_SIZE = int(os.environ.get("VERIFIED_USER_CACHE_SIZE", "10000"))
+VERIFIED_USER_CACHE_TTL = int(os.environ.get("VERIFIED_USER_CACHE_TTL", "3600"))
+VERIFIED_USER_BLOOM_CAPACITY = int(os.environ.get("VERIFIED_USER_BLOOM_CAPACITY", "1000000"))
+VERIFIED_USER_SYNC_INTERVAL = int(os.environ.get("VERIFIED_USER_SYNC_INTERVAL", "60"))
+
+# 验证码存储方式：database 保存在数据库中（重启不丢失，多进程共享），memory 只保存在进程内
+VERIFICATION_CODE_STORE = os.environ.get("VERIFICATION_CODE_STORE", "database")
+# 验证码限流（令牌桶）：每个用户每 VERIFICATION_SEND_WINDOW 秒最多发送的验证码数量，
+# 每个手机号每 VERIFICATION_PHONE_SEND_WINDOW 秒最多接收的验证码数量，
+# 每个用户每 VERIFICATION_ATTEMPT_WINDOW 秒最多尝试验证的次数
+VERIFICATION_SEND_LIMIT = int(os.environ.get("VERIFICATION_SEND_LIMIT", "3"))
+VERIFICATION_SEND_WINDOW = int(os.environ.get("VERIFICATION_SEND_WINDOW", "600"))
+VERIFICATION_PHONE_SEND_LIMIT = int(os.environ.get("VERIFICATION_PHONE_SEND_LIMIT", "5"))
+VERIFICATION_PHONE_SEND_WINDOW = int(os.environ.get("VERIFICATION_PHONE_SEND_WINDOW", "3600"))
+VERIFICATION_ATTEMPT_LIMIT = int(os.environ.get("VERIFICATION_ATTEMPT_LIMIT", "5"))
+VERIFICATION_ATTEMPT_WINDOW = int(os.environ.get("VERIFICATION_ATTEMPT_WINDOW", "600"))
+# 清理过期验证码的间隔（秒）
+VERIFICATION_CODE_SWEEP_INTERVAL = int(os.environ.get("VERIFICATION_CODE_SWEEP_INTERVAL", "300"))
+
+# 短信服务商：twilio 或 fake（本地测试用，不发送短信，只在日志中输出短信内容）
+SMS_PROVIDER = os.environ.get("SMS_PROVIDER", "twilio")
+# 最多同时发送的短信数量和单条短信的发送超时时间（秒）
+SMS_MAX_CONCURRENCY = int(os.environ.get("SMS_MAX_CONCURRENCY", "5"))
+SMS_TIMEOUT = float(os.environ.get("SMS_TIMEOUT", "10"))
+
+# 机器人心跳间隔（秒）；/readyz 在心跳超过 READY_HEARTBEAT_MAX_AGE 秒未更新或机器人未在轮询时返回 503
+BOT_HEARTBEAT_INTERVAL = int(os.environ.get("BOT_HEARTBEAT_INTERVAL", "15"))
+READY_HEARTBEAT_MAX_AGE = int(os.environ.get("READY_HEARTBEAT_MAX_AGE", "60"))
+
+# 管理面板数据库数据的缓存时间（秒）和关键词列表每页显示的条数
+DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", "10"))
+DASHBOARD_KEYWORDS_PER_PAGE = int(os.environ.get("DASHBOARD_KEYWORDS_PER_PAGE", "20"))
+
+# 数据库查询线程池大小（不应超过 SQLAlchemy 连接池大小）和单次查询超时时间（秒）
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+DB_QUERY_TIMEOUT = float(os.environ.get("DB_QUERY_TIMEOUT", "5"))
+
+# 群组搜索方式：index 使用进程内搜索索引，database 直接查询数据库
+GROUP_SEARCH_BACKEND = os.environ.get("GROUP_SEARCH_BACKEND", "index")
+# 搜索索引定时同步的间隔（秒）：重建索引（关键词变化后）并检查其他进程（如 add_groups.py）的修改，本进程内的群组修改在搜索时立即同步
+GROUP_INDEX_SYNC_INTERVAL = int(os.environ.get("GROUP_INDEX_SYNC_INTERVAL", "60"))
+# 按 updated_at 增量同步其他进程的修改时，重新读取水位之前这段时间（秒）内的修改，
+# 覆盖写入事务开始（updated_at 取值）到提交之间的时间，避免漏掉提交较晚的修改
+CHANGE_SYNC_OVERLAP = int(os.environ.get("CHANGE_SYNC_OVERLAP", "60"))
+# 关键词搜索结果每页显示的群组数量，更多结果通过"下一页"按钮翻页
+GROUP_SEARCH_PAGE_SIZE = int(os.environ.get("GROUP_SEARCH_PAGE_SIZE", "10"))
+
+# 群组编号查询结果缓存：最多缓存的编号数、缓存时间（秒）和不存在的编号的缓存时间（秒）
+# 本进程内修改群组时缓存会立即清空，缓存时间用于感知其他进程（如 add_groups.py）的修改
+GROUP_LOOKUP_CACHE_SIZE = int(os.environ.get("GROUP_LOOKUP_CACHE_SIZE", "5000"))
+GROUP_LOOKUP_CACHE_TTL = int(os.environ.get("GROUP_LOOKUP_CACHE_TTL", "600"))
+GROUP_LOOKUP_NEGATIVE_TTL = int(os.environ.get("GROUP_LOOKUP_NEGATIVE_TTL", "30"))
+
+# 消息日志异步写入：队列最多容纳的条数（满时丢弃新日志）、每批写入的条数和最长等待时间（秒）
+MESSAGE_LOG_QUEUE_SIZE = int(os.environ.get("MESSAGE_LOG_QUEUE_SIZE", "10000"))
+MESSAGE_LOG_BATCH_SIZE = int(os.environ.get("MESSAGE_LOG_BATCH_SIZE", "200"))
+MESSAGE_LOG_FLUSH_INTERVAL = float(os.environ.get("MESSAGE_LOG_FLUSH_INTERVAL", "1"))
+
+# 消息日志保留天数（0 表示永久保留）、提前创建的月分区数量（仅 PostgreSQL）和维护任务执行间隔（秒）
+MESSAGE_LOG_RETENTION_DAYS = int(os.environ.get("MESSAGE_LOG_RETENTION_DAYS", "90"))
+MESSAGE_LOG_PARTITION_MONTHS_AHEAD = int(os.environ.get("MESSAGE_LOG_PARTITION_MONTHS_AHEAD", "2"))
+MESSAGE_LOG_MAINTENANCE_INTERVAL = int(os.environ.get("MESSAGE_LOG_MAINTENANCE_INTERVAL", "86400"))
+# 消息日志按小时汇总到 message_stats 的执行间隔（秒）
+MESSAGE_STATS_ROLLUP_INTERVAL = int(os.environ.get("MESSAGE_STATS_ROLLUP_INTERVAL", "3600"))
+# 每次汇总时重新汇总最近几个小时，计入延迟写入的日志（其他进程时钟偏差、写入积压）；
+# 这些小时的原始日志不会被维护任务删除，晚于该时间写入的日志不会计入统计
+MESSAGE_STATS_ROLLUP_LOOKBACK_HOURS = int(os.environ.get("MESSAGE_STATS_ROLLUP_LOOKBACK_HOURS", "24"))
+
+# 群组管理员列表缓存时间（秒）和最多缓存的群组数，管理员变动时会立即失效
+ADMIN_CACHE_TTL = int(os.environ.get("ADMIN_CACHE_TTL", "600"))
+ADMIN_CACHE_MAX_CHATS = int(os.environ.get("ADMIN_CACHE_MAX_CHATS", "10000"))
+
+# 群组分类规则 - 按顺序匹配群组描述，第一个命中任一关键词的分类生效（不区分大小写）
+# 分类在写入群组时计算并保存在 Group.category，修改规则后运行 migrate_group_category.py 重新计算
+GROUP_CATEGORY_RULES = [
+    ("卡商", ["卡商", "pos机"]),
+    ("代收代付", ["代收", "代付", "支付"]),
+    ("白资", ["白资"]),
+    ("承兑", ["承兑", "usdt", "互换"]),
+    ("换汇", ["换汇", "货币"]),
+    ("包网", ["包网", "搭建"]),
+    ("技术", ["技术", "开发"]),
+]
+# 没有命中任何规则时的默认分类
+DEFAULT_GROUP_CATEGORY = "钱钱"
+
 # Default responses
 DEFAULT_WELCOME_MESSAGE = "欢迎加入群组！请阅读规则并享受您的时光。"
 
@@ -0,0 +1,687 @@
+"""
+数据访问层
+所有同步的 SQLAlchemy 查询都通过有界线程池执行，并设置超时时间，
+避免慢查询阻塞 python-telegram-bot 的事件循环。
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func as db_func
+from sqlalchemy.orm import selectinload
+
+from config import (
+    DB_POOL_SIZE, DB_QUERY_TIMEOUT, GROUP_SEARCH_BACKEND, GROUP_SEARCH_PAGE_SIZE, CHANGE_SYNC_OVERLAP,
+    BOT_SETTINGS_CACHE_TTL, CHANNEL_CACHE_TTL, VERIFIED_USER_CACHE_SIZE, VERIFIED_USER_CACHE_TTL,
+    VERIFIED_USER_BLOOM_CAPACITY
+)
+from utils.bloom_filter import BloomFilter
+from utils.cache import TTLCache, VersionedSnapshot, cache_event_counter
+from utils.group_search import GroupSearchIndex
+
+logger = logging.getLogger(__name__)
+
+# 数据库查询线程池，线程数不超过 SQLAlchemy 连接池大小
+_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db-worker")
+
+# 导入 app 模块以记录线程池和缓存统计
+try:
+    from app import bot_status
+except ImportError:
+    # 如果导入失败，统计只保存在本模块中
+    bot_status = {}
+
+_db_pool_stats = bot_status.setdefault("db_pool", {})
+_db_pool_stats.setdefault("pending", 0)
+_db_pool_stats.setdefault("timeouts", 0)
+_db_pool_lock = threading.Lock()
+
+def _on_db_call_done(future) -> None:
+    with _db_pool_lock:
+        _db_pool_stats["pending"] -= 1
+
+def _call_in_app_context(func: Callable, *args, **kwargs) -> Any:
+    """在 Flask 应用上下文中执行函数，退出上下文时会自动释放数据库会话"""
+    from app import app
+    with app.app_context():
+        return func(*args, **kwargs)
+
+async def run_db(func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    在数据库线程池中执行同步的数据库操作。
+
+    Args:
+        func: 要执行的同步函数
+        timeout: 超时时间（秒），默认为 DB_QUERY_TIMEOUT
+
+    Returns:
+        函数的返回值
+
+    Raises:
+        TimeoutError: 执行超时
+    """
+    call = functools.partial(_call_in_app_context, func, *args, **kwargs)
+    with _db_pool_lock:
+        _db_pool_stats["pending"] += 1
+    # 超时后线程中的查询仍在执行，在线程结束时才减少计数
+    future = _executor.submit(call)
+    future.add_done_callback(_on_db_call_done)
+    try:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout=DB_QUERY_TIMEOUT if timeout is None else timeout
+        )
+    except asyncio.TimeoutError:
+        with _db_pool_lock:
+            _db_pool_stats["timeouts"] += 1
+        raise
+
+def shutdown() -> None:
+    """关闭数据库线程池"""
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+# ---- 群组 ----
+
+def _group_to_info(group) -> Dict[str, Any]:
+    return {
+        "number": group.group_number,
+        "name": group.name,
+        "description": group.description,
+        "link": group.link,
+        "category": group.category
+    }
+
+def _query_group_by_number(group_number: str) -> Optional[Dict[str, Any]]:
+    from models import Group
+    group = Group.query.filter_by(group_number=group_number).first()
+    return _group_to_info(group) if group else None
+
+def _keyset_page(query, after_number: Optional[str], limit: Optional[int]) -> list:
+    """
+    按群组编号分页查询：纯数字编号按 (长度, 编号) 排序，即按数值大小排序。
+    只返回排在 after_number 之后的群组，多查询一行用于判断是否还有下一页。
+    """
+    from models import Group
+    length = db_func.length(Group.group_number)
+    if after_number is not None:
+        query = query.filter(
+            (length > len(after_number))
+            | ((length == len(after_number)) & (Group.group_number > after_number))
+        )
+    query = query.order_by(length, Group.group_number)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query.all()
+
+def _query_groups_page(keyword: str, cursor: Optional[str] = None,
+                       page_size: Optional[int] = GROUP_SEARCH_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    数据库搜索一页群组，优先匹配关键词表，没有任何匹配时再匹配群组名称和描述。
+
+    游标格式为 "阶段 + 上一页最后一个群组编号"，阶段 k 表示关键词匹配，n 表示名称和描述匹配。
+    """
+    from models import Group, Keyword
+    pattern = f"%{keyword}%"
+    phase, after_number = (cursor[0], cursor[1:]) if cursor else ("k", None)
+    if phase not in ("k", "n") or (cursor and not after_number):
+        raise ValueError(f"无效的搜索游标: {cursor}")
+
+    rows = []
+    if phase == "k":
+        # 用 EXISTS 子查询匹配关键词，一次查询取回群组，不需要逐个加载关联关系或去重
+        query = Group.query.filter(Group.keywords.any(Keyword.word.ilike(pattern)))
+        rows = _keyset_page(query, after_number, page_size)
+        # 如果没有找到，再尝试搜索群组名称和描述
+        if not rows and after_number is None:
+            phase = "n"
+    if phase == "n":
+        query = Group.query.filter(Group.name.ilike(pattern) | Group.description.ilike(pattern))
+        rows = _keyset_page(query, after_number, page_size)
+
+    groups = [_group_to_info(group) for group in rows[:page_size]]
+    has_more = page_size is not None and len(rows) > page_size
+    next_cursor = f"{phase}{groups[-1]['number']}" if has_more else None
+    return groups, next_cursor
+
+# ---- 群组搜索索引 ----
+
+# 进程内群组搜索索引
+group_index = GroupSearchIndex()
+# 索引同步状态：本进程内提交的群组变更通过数据变更事件记录在 pending_ids 中
+_group_index_state = {
+    "built": False,
+    "full_rebuild": False,
+    "pending_ids": set(),
+    "watermark": None,
+    "listening": False
+}
+_group_index_state_lock = threading.Lock()
+_group_index_sync_lock = threading.Lock()
+# watch_group_changes 注册的监听器，定时同步发现其他进程修改的群组后也会调用
+_group_change_watchers: List[Callable] = []
+
+def _group_to_document(group) -> Dict[str, Any]:
+    return {**_group_to_info(group), "id": group.id, "keywords": [kw.word for kw in group.keywords]}
+
+def _on_group_change(changed_ids, deleted_ids) -> None:
+    """群组变更后记录需要更新的群组，删除的群组直接从索引中移除"""
+    with _group_index_state_lock:
+        if changed_ids is None:
+            _group_index_state["full_rebuild"] = True
+        else:
+            _group_index_state["pending_ids"].update(changed_ids)
+    for group_id in deleted_ids:
+        group_index.remove(group_id)
+
+def _on_keyword_change(changed_ids, deleted_ids) -> None:
+    """关键词被修改或删除会影响多个群组，重建索引"""
+    with _group_index_state_lock:
+        _group_index_state["full_rebuild"] = True
+
+def _listen_group_changes() -> None:
+    from models import Group, Keyword, on_data_change
+    with _group_index_state_lock:
+        if not _group_index_state["listening"]:
+            on_data_change(Group.__tablename__, _on_group_change)
+            on_data_change(Keyword.__tablename__, _on_keyword_change)
+            _group_index_state["listening"] = True
+
+def _update_index_groups(group_ids) -> None:
+    """重新读取指定的群组并更新索引，已经不存在的群组从索引中移除"""
+    from models import Group
+    groups = Group.query.options(selectinload(Group.keywords)).filter(Group.id.in_(group_ids)).all()
+    for group in groups:
+        group_index.upsert(_group_to_document(group))
+    for group_id in set(group_ids) - {group.id for group in groups}:
+        group_index.remove(group_id)
+
+def _sync_group_index() -> None:
+    """
+    同步群组搜索索引，由启动预热和定时任务调用：第一次调用或关键词发生变化时全量构建，之后只更新发生变化的群组。
+    其他进程的修改通过比较群组总数和 updated_at（数据库时间）同步，每次重新读取水位之前 CHANGE_SYNC_OVERLAP 秒内的修改。
+    """
+    from models import Group
+
+    _listen_group_changes()
+    with _group_index_sync_lock:
+        with _group_index_state_lock:
+            state = _group_index_state
+            full_rebuild = not state["built"] or state["full_rebuild"]
+            pending_ids = state["pending_ids"]
+            state["pending_ids"] = set()
+            state["full_rebuild"] = False
+
+        try:
+            # 群组数量不一致说明其他进程删除或新增了群组
+            if not full_rebuild and Group.query.count() != len(group_index):
+                full_rebuild = True
+            polled_ids = set()
+            if not full_rebuild and state["watermark"] is not None:
+                since = state["watermark"] - timedelta(seconds=CHANGE_SYNC_OVERLAP)
+                updated = Group.query.with_entities(Group.id).filter(Group.updated_at >= since).all()
+                polled_ids = {row.id for row in updated}
+                pending_ids.update(polled_ids)
+
+            # 先读取水位再读取群组，读取期间提交的修改下次还会再读取
+            latest = Group.query.with_entities(db_func.max(Group.updated_at)).scalar()
+            if full_rebuild:
+                groups = Group.query.options(selectinload(Group.keywords)).all()
+                group_index.rebuild(_group_to_document(group) for group in groups)
+                logger.info(f"群组搜索索引已重建，共 {len(groups)} 个群组")
+            elif pending_ids:
+                _update_index_groups(pending_ids)
+                logger.debug(f"群组搜索索引已更新 {len(pending_ids)} 个群组")
+
+            if latest is not None:
+                state["watermark"] = latest
+            state["built"] = True
+        except Exception:
+            # 同步失败时保留待更新的群组，下次重试
+            with _group_index_state_lock:
+                state["pending_ids"].update(pending_ids)
+                state["full_rebuild"] = state["full_rebuild"] or full_rebuild
+            raise
+
+    # 其他进程的修改不会触发本进程的数据变更事件，同步后通知监听器（全量重建时无法得知具体的群组）
+    if full_rebuild or polled_ids:
+        _notify_group_watchers(None if full_rebuild else polled_ids)
+
+def _notify_group_watchers(changed_ids) -> None:
+    for listener in list(_group_change_watchers):
+        try:
+            listener(changed_ids, set())
+        except Exception as e:
+            logger.warning(f"群组变更监听器执行失败: {str(e)}")
+
+def _apply_group_index_changes() -> bool:
+    """
+    搜索前把本进程内提交的群组修改更新到索引中，只读取修改过的群组。
+    全量构建只在定时任务中执行，不占用用户搜索的时间；定时任务正在同步时直接使用当前索引。
+
+    Returns:
+        索引是否可用，还没有构建或关键词变化后等待重建时返回 False
+    """
+    _listen_group_changes()
+    if not _group_index_sync_lock.acquire(blocking=False):
+        return _group_index_state["built"]
+    try:
+        with _group_index_state_lock:
+            state = _group_index_state
+            if not state["built"] or state["full_rebuild"]:
+                return False
+            pending_ids = state["pending_ids"]
+            state["pending_ids"] = set()
+        if pending_ids:
+            try:
+                _update_index_groups(pending_ids)
+            except Exception:
+                with _group_index_state_lock:
+                    state["pending_ids"].update(pending_ids)
+                raise
+        return True
+    finally:
+        _group_index_sync_lock.release()
+
+def _search_group_index(keyword: str, cursor: Optional[str] = None,
+                        page_size: Optional[int] = GROUP_SEARCH_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    在搜索索引中搜索一页群组。
+
+    游标格式为 "i得分.编号"，即上一页最后一个群组的排序键。
+    """
+    after = None
+    if cursor:
+        if not cursor.startswith("i") or "." not in cursor:
+            raise ValueError(f"无效的搜索游标: {cursor}")
+        score, number = cursor[1:].split(".", 1)
+        after = (int(score), number)
+
+    limit = None if page_size is None else page_size + 1
+    rows = group_index.search(keyword, limit=limit, after=after)
+    groups = rows[:page_size]
+    has_more = page_size is not None and len(rows) > page_size
+    next_cursor = f"i{groups[-1]['score']}.{groups[-1]['number']}" if has_more else None
+    return groups, next_cursor
+
+def _search_groups(keyword: str, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    优先使用搜索索引；索引不可用时查询数据库。
+    游标以 i 开头的翻页继续使用索引，保证同一次搜索的各页来自同一种搜索方式。
+    """
+    ready = _apply_group_index_changes()
+    if (cursor and cursor.startswith("i")) or (not cursor and ready):
+        return _search_group_index(keyword, cursor)
+    return _query_groups_page(keyword, cursor)
+
+def watch_group_changes(listener: Callable) -> None:
+    """
+    注册群组变更监听器，调用 listener(changed_ids, deleted_ids)：
+    本进程内提交群组修改后立即调用；其他进程（如 add_groups.py）的修改在群组索引定时同步发现后调用，
+    全量重建索引时 changed_ids 为 None。
+    """
+    from models import Group, on_data_change
+    on_data_change(Group.__tablename__, listener)
+    _group_change_watchers.append(listener)
+
+async def find_group_by_number(group_number: str) -> Optional[Dict[str, Any]]:
+    """按群组编号查询群组，返回 {number, name, description, link}，不存在时返回 None"""
+    return await run_db(_query_group_by_number, group_number)
+
+async def search_groups_page(keyword: str, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    按关键词分页搜索群组，每页最多 GROUP_SEARCH_PAGE_SIZE 个群组。
+    默认使用进程内搜索索引，按关键词、名称、描述的命中情况排序，索引还没有构建或等待重建时查询数据库；
+    GROUP_SEARCH_BACKEND 为 database 时直接查询数据库，优先匹配关键词表，其次匹配群组名称和描述。
+
+    Args:
+        keyword: 搜索关键词
+        cursor: 上一次调用返回的游标，为空时返回第一页
+
+    Returns:
+        (群组列表, 下一页游标)，没有更多结果时游标为 None
+
+    Raises:
+        ValueError: 游标无效（例如切换了搜索方式）
+    """
+    if GROUP_SEARCH_BACKEND == "database":
+        return await run_db(_query_groups_page, keyword, cursor)
+    return await run_db(_search_groups, keyword, cursor)
+
+async def sync_group_index() -> None:
+    """同步群组搜索索引：构建或重建索引，并读取其他进程修改的群组。由定时任务调用"""
+    if GROUP_SEARCH_BACKEND != "database":
+        await run_db(_sync_group_index, timeout=WARM_UP_TIMEOUT)
+
+# 全量加载缓存（手机验证记录、群组搜索索引）可能需要扫描整张表，超时时间比普通查询长
+WARM_UP_TIMEOUT = max(DB_QUERY_TIMEOUT, 60)
+
+async def warm_up() -> None:
+    """
+    启动时预先编译关键词匹配器，加载机器人设置、频道列表、群组禁言状态和手机验证记录，并构建群组搜索索引。
+    每个缓存单独加载，一个加载失败不影响其他缓存，失败的缓存在第一次使用或下一次定时同步时再加载。
+    """
+    # 关键词回复模块依赖本模块，在这里导入
+    from bot.responses import keyword_cache
+
+    steps = [
+        ("关键词回复", lambda: run_db(keyword_cache.get)),
+        ("机器人设置", lambda: run_db(_bot_settings_snapshot.get)),
+        ("群组禁言状态", sync_muted_chats),
+        ("手机验证记录", sync_phone_verifications),
+        ("频道列表", lambda: run_db(_channels_snapshot.get)),
+    ]
+    if GROUP_SEARCH_BACKEND != "database":
+        steps.append(("群组搜索索引", sync_group_index))
+
+    for name, load in steps:
+        try:
+            await load()
+        except Exception as e:
+            logger.warning(f"预热{name}缓存失败: {str(e) or type(e).__name__}")
+
+# ---- 群组聊天设置 ----
+
+# 禁言群组的内存集合。第一次同步时全量加载，之后按 updated_at（数据库时间）增量同步其他进程的修改，
+# 本进程内的修改在写入数据库后直接更新集合
+_muted_chats = set()
+_muted_chats_state = {"loaded": False, "watermark": None}
+_muted_chats_lock = threading.Lock()
+
+def _sync_muted_chats() -> int:
+    """
+    从数据库同步禁言状态。
+
+    Returns:
+        状态发生变化的群组数量
+    """
+    from models import GroupChatSettings
+
+    with _muted_chats_lock:
+        state = _muted_chats_state
+        query = GroupChatSettings.query.with_entities(
+            GroupChatSettings.chat_id, GroupChatSettings.is_muted, GroupChatSettings.updated_at
+        )
+        if state["loaded"]:
+            if state["watermark"] is None:
+                rows = query.all()
+            else:
+                # 重新读取水位之前 CHANGE_SYNC_OVERLAP 秒内的修改，避免漏掉事务开始较早、提交较晚的修改，重复处理是幂等的
+                since = state["watermark"] - timedelta(seconds=CHANGE_SYNC_OVERLAP)
+                rows = query.filter(GroupChatSettings.updated_at >= since).all()
+            muted = set(_muted_chats)
+            for row in rows:
+                if row.is_muted:
+                    muted.add(row.chat_id)
+                else:
+                    muted.discard(row.chat_id)
+        else:
+            rows = query.all()
+            muted = {row.chat_id for row in rows if row.is_muted}
+
+        changed = len(muted ^ _muted_chats)
+        _muted_chats.clear()
+        _muted_chats.update(muted)
+        latest = max((row.updated_at for row in rows if row.updated_at), default=None)
+        if latest and (state["watermark"] is None or latest > state["watermark"]):
+            state["watermark"] = latest
+        if not state["loaded"]:
+            logger.info(f"已加载群组禁言状态，共 {len(_muted_chats)} 个禁言群组")
+        state["loaded"] = True
+        return changed
+
+def _save_group_mute_state(chat_id: int, chat_title: Optional[str], user_id: Optional[int], is_muted: bool) -> None:
+    """
+    用一条 INSERT ... ON CONFLICT (chat_id) DO UPDATE 语句写入禁言状态，
+    多个管理员同时操作时不会因为先查询再插入而产生重复行或唯一约束冲突。
+    """
+    from app import db
+    from models import GroupChatSettings, db_utcnow
+
+    now = datetime.utcnow()
+    # updated_at 使用数据库时间，其他进程按它增量同步
+    values = {"chat_title": chat_title, "is_muted": is_muted, "updated_at": db_utcnow()}
+    if is_muted:
+        values.update(muted_at=now, muted_by=user_id)
+    else:
+        values.update(unmuted_at=now, unmuted_by=user_id)
+
+    dialect = db.engine.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(GroupChatSettings).values(chat_id=chat_id, created_at=now, **values)
+        statement = statement.on_conflict_do_update(index_elements=[GroupChatSettings.chat_id], set_=values)
+        db.session.execute(statement)
+    else:
+        # 其他数据库不支持 ON CONFLICT，先更新，没有设置时再插入
+        updated = GroupChatSettings.query.filter_by(chat_id=chat_id).update(values, synchronize_session=False)
+        if not updated:
+            db.session.add(GroupChatSettings(chat_id=chat_id, created_at=now, **values))
+    db.session.commit()
+    with _muted_chats_lock:
+        if is_muted:
+            _muted_chats.add(chat_id)
+        else:
+            _muted_chats.discard(chat_id)
+
+async def sync_muted_chats() -> int:
+    """从数据库同步禁言状态（启动时全量加载，之后只读取修改过的群组设置），返回状态变化的群组数量"""
+    return await run_db(_sync_muted_chats)
+
+async def is_group_muted(chat_id: int) -> bool:
+    """检查群组是否处于禁言状态，只读内存中的禁言集合；启动时没有加载成功则先加载"""
+    if not _muted_chats_state["loaded"]:
+        await sync_muted_chats()
+    return chat_id in _muted_chats
+
+async def set_group_mute_state(chat_id: int, chat_title: Optional[str], user_id: Optional[int], is_muted: bool) -> None:
+    """设置群组禁言状态，群组设置不存在时自动创建。写入数据库后立即更新内存中的禁言集合"""
+    await run_db(_save_group_mute_state, chat_id, chat_title, user_id, is_muted)
+
+# ---- 机器人设置和频道 ----
+
+def _query_bot_settings() -> Optional[Dict[str, Any]]:
+    from models import BotSettings
+    settings = BotSettings.query.first()
+    return settings.to_dict() if settings else None
+
+def _bot_settings_version() -> int:
+    """机器人设置表的数据版本号"""
+    from models import BotSettings, get_data_version
+    return get_data_version(BotSettings.__tablename__)
+
+# 机器人设置的进程内快照，只在 BotSettings 发生变更或超过 TTL 时重新查询
+_bot_settings_snapshot = VersionedSnapshot(
+    _query_bot_settings,
+    _bot_settings_version,
+    ttl=BOT_SETTINGS_CACHE_TTL,
+    stats=bot_status.setdefault("bot_settings_cache", cache_event_counter("hits", "misses", "rebuilds")),
+    name="机器人设置"
+)
+
+def _query_channels() -> List[Dict[str, Any]]:
+    from models import Channel
+    return [c.to_dict() for c in Channel.query.order_by(Channel.display_order).all()]
+
+def _channels_version() -> int:
+    """频道表的数据版本号"""
+    from models import Channel, get_data_version
+    return get_data_version(Channel.__tablename__)
+
+# 频道列表的进程内快照，只在 Channel 发生变更或超过 TTL 时重新查询
+_channels_snapshot = VersionedSnapshot(
+    _query_channels,
+    _channels_version,
+    ttl=CHANNEL_CACHE_TTL,
+    stats=bot_status.setdefault("channel_cache", cache_event_counter("hits", "misses", "rebuilds")),
+    name="频道列表"
+)
+
+async def get_bot_settings() -> Optional[Dict[str, Any]]:
+    """
+    获取机器人设置，没有设置时返回 None。
+    设置缓存在进程内，缓存有效时不访问数据库也不占用数据库线程。返回的字典为共享数据，调用方不应修改。
+    """
+    fresh, settings = _bot_settings_snapshot.peek()
+    if fresh:
+        return settings
+    return await run_db(_bot_settings_snapshot.get)
+
+async def get_channels() -> List[Dict[str, Any]]:
+    """
+    获取按 display_order 排序的频道列表。
+    列表缓存在进程内，重新加载前每次返回同一个列表对象，调用方可以据此缓存由列表生成的数据，但不应修改列表。
+    """
+    fresh, channels = _channels_snapshot.peek()
+    if fresh:
+        return channels
+    return await run_db(_channels_snapshot.get)
+
+# ---- 手机验证 ----
+
+# 手机验证记录缓存。布隆过滤器记录所有有验证记录的用户，不在过滤器中的用户一定没有记录，不需要查询数据库；
+# 有记录的用户的验证信息缓存在 LRU 中。验证记录只会新增或更新不会删除，因此过滤器不需要删除元素。
+# 启动时全量加载，之后按 updated_at（数据库时间）增量同步其他进程新增的记录
+_phone_user_filter = BloomFilter(VERIFIED_USER_BLOOM_CAPACITY)
+_phone_verification_cache = TTLCache(maxsize=VERIFIED_USER_CACHE_SIZE, ttl=VERIFIED_USER_CACHE_TTL)
+_phone_users_state = {"loaded": False, "watermark": None}
+_phone_users_lock = threading.Lock()
+_phone_cache_stats = bot_status.setdefault("phone_verification_cache", cache_event_counter("filtered", "hits", "misses"))
+
+def _verification_to_dict(verification) -> Dict[str, Any]:
+    return {
+        "user_id": verification.user_id,
+        "phone_number": verification.phone_number,
+        "is_verified": bool(verification.is_verified),
+        "verification_date": verification.verification_date
+    }
+
+def _query_phone_verification(user_id: int) -> Optional[Dict[str, Any]]:
+    from models import PhoneVerification
+    verification = PhoneVerification.query.filter_by(user_id=user_id).first()
+    return _verification_to_dict(verification) if verification else None
+
+def _sync_phone_verifications() -> int:
+    """
+    同步手机验证记录到布隆过滤器和 LRU 缓存。
+    记录按 updated_at 从旧到新读取，LRU 最终保留最近验证的用户。
+
+    Returns:
+        读取的记录数
+    """
+    from models import PhoneVerification
+
+    with _phone_users_lock:
+        state = _phone_users_state
+        query = PhoneVerification.query.with_entities(
+            PhoneVerification.user_id, PhoneVerification.phone_number, PhoneVerification.is_verified,
+            PhoneVerification.verification_date, PhoneVerification.updated_at
+        )
+        if state["loaded"] and state["watermark"] is not None:
+            # 重新读取水位之前 CHANGE_SYNC_OVERLAP 秒内的记录，避免漏掉提交较晚的修改
+            since = state["watermark"] - timedelta(seconds=CHANGE_SYNC_OVERLAP)
+            query = query.filter(PhoneVerification.updated_at >= since)
+
+        count = 0
+        for row in query.order_by(PhoneVerification.updated_at).yield_per(5000):
+            _phone_user_filter.add(row.user_id)
+            _phone_verification_cache.set(row.user_id, _verification_to_dict(row))
+            if row.updated_at and (state["watermark"] is None or row.updated_at > state["watermark"]):
+                state["watermark"] = row.updated_at
+            count += 1
+
+        if not state["loaded"]:
+            logger.info(f"已加载手机验证记录，共 {count} 条")
+        state["loaded"] = True
+        return count
+
+def _save_phone_verification(user_id: int, username: Optional[str], phone_number: str) -> None:
+    from app import db
+    from models import PhoneVerification
+
+    # 检查是否已存在验证记录
+    verification = PhoneVerification.query.filter_by(user_id=user_id).first()
+    if not verification:
+        verification = PhoneVerification(user_id=user_id)
+        db.session.add(verification)
+
+    verification.phone_number = phone_number
+    verification.telegram_username = username
+    verification.is_verified = True
+    verification.verification_date = datetime.now()
+    # 提交后访问属性会重新查询，在提交前生成缓存数据
+    cached = _verification_to_dict(verification)
+    db.session.commit()
+    _phone_user_filter.add(user_id)
+    _phone_verification_cache.set(user_id, cached)
+
+async def sync_phone_verifications() -> int:
+    """同步手机验证记录缓存（启动时全量加载，之后只读取新增和修改的记录），返回读取的记录数"""
+    # 全量加载需要读取整张表，使用较长的超时时间
+    timeout = None if _phone_users_state["loaded"] else WARM_UP_TIMEOUT
+    return await run_db(_sync_phone_verifications, timeout=timeout)
+
+async def get_phone_verification(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    获取用户的手机验证记录，返回 {user_id, phone_number, is_verified, verification_date}。
+    没有验证记录的用户由布隆过滤器直接排除，最近访问的记录缓存在 LRU 中，只有缓存未命中时才查询数据库。
+    其他进程新增的记录在下一次同步（VERIFIED_USER_SYNC_INTERVAL）后可见。返回的字典为共享数据，调用方不应修改。
+    """
+    if _phone_users_state["loaded"]:
+        if user_id not in _phone_user_filter:
+            _phone_cache_stats.inc("filtered")
+            return None
+        verification = _phone_verification_cache.get(user_id)
+        if verification is not None:
+            _phone_cache_stats.inc("hits")
+            return verification
+
+    _phone_cache_stats.inc("misses")
+    verification = await run_db(_query_phone_verification, user_id)
+    if verification:
+        _phone_verification_cache.set(user_id, verification)
+    return verification
+
+async def save_phone_verification(user_id: int, username: Optional[str], phone_number: str) -> None:
+    """保存用户的手机验证成功记录"""
+    await run_db(_save_phone_verification, user_id, username, phone_number)
+
+async def clean_expired_verification_codes() -> int:
+    """清理过期的验证码和限流记录，返回清理的数量"""
+    from utils.verification import clean_expired_codes
+    return await run_db(clean_expired_codes)
+
+# ---- 消息日志维护 ----
+
+# 维护任务可能需要删除大量日志，超时时间比普通查询长
+MAINTENANCE_TIMEOUT = 600
+
+async def maintain_message_log() -> Dict[str, Any]:
+    """创建消息日志分区并删除超过保留期且已汇总的日志"""
+    from migrate_message_log import maintain_message_log as maintain
+    return await run_db(maintain, timeout=MAINTENANCE_TIMEOUT)
+
+async def rollup_message_stats() -> int:
+    """把已结束的小时内的消息日志汇总到 message_stats"""
+    from message_stats import rollup_message_stats as rollup
+    return await run_db(rollup, timeout=MAINTENANCE_TIMEOUT)
+
+def _query_chat_message_stats(chat_id: int, days: int) -> Dict[str, Any]:
+    from message_stats import count_messages, top_keywords
+    since = datetime.utcnow() - timedelta(days=days)
+    return {
+        "message_count": count_messages(since, chat_id=chat_id),
+        "top_keywords": top_keywords(since, chat_id=chat_id)
+    }
+
+async def get_chat_message_stats(chat_id: int, days: int = 7) -> Dict[str, Any]:
+    """从按小时汇总的统计中查询群组最近几天的消息数和触发最多的关键词"""
+    return await run_db(_query_chat_message_stats, chat_id, days)
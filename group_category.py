@@ -0,0 +1,20 @@
+from typing import Optional
+from config import GROUP_CATEGORY_RULES, DEFAULT_GROUP_CATEGORY
+from utils.keyword_matcher import KeywordMatcher
+
+# 分类规则编译成一个关键词自动机，规则顺序即优先级
+_category_matcher = KeywordMatcher(
+    (keyword, category) for category, keywords in GROUP_CATEGORY_RULES for keyword in keywords
+)
+
+def classify_group(description: Optional[str]) -> str:
+    """
+    根据群组描述计算群组分类。
+
+    Args:
+        description: 群组描述
+
+    Returns:
+        第一个命中的分类规则对应的分类，没有命中时返回 DEFAULT_GROUP_CATEGORY
+    """
+    return _category_matcher.match(description) or DEFAULT_GROUP_CATEGORY
@@ -0,0 +1,166 @@
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# 各字段命中时的得分，关键词完全匹配的群组排在最前面
+SCORE_KEYWORD_EXACT = 100
+SCORE_KEYWORD = 50
+SCORE_NAME = 20
+SCORE_DESCRIPTION = 10
+
+# 参与全文检索的字段
+TEXT_FIELDS = ("keywords", "name", "description")
+
+def _grams(text: str) -> Set[str]:
+    """返回文本的所有单字和双字片段（中文关键词通常只有两个字，因此使用 1-gram 和 2-gram）"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+def _query_grams(query: str) -> Set[str]:
+    """查询词用于筛选候选的片段：长度大于 1 时使用双字片段，否则使用单字"""
+    if len(query) == 1:
+        return {query}
+    return {query[i:i + 2] for i in range(len(query) - 1)}
+
+def _number_key(number: str):
+    """群组编号排序键，纯数字编号按数值大小排序"""
+    return (len(number), number) if number.isdigit() else (float("inf"), number)
+
+class GroupSearchIndex:
+    """
+    群组搜索索引。
+
+    对群组名称、描述和关键词建立 n-gram 倒排索引，支持与 ILIKE '%关键词%' 相同的
+    子串匹配语义，按命中字段打分排序。索引可以按群组增量更新，所有操作都是线程安全的。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # {群组ID: 群组信息}
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        # {群组ID: {字段: 小写文本}}
+        self._texts: Dict[int, Dict[str, str]] = {}
+        # {字段: {片段: {群组ID}}}
+        self._postings: Dict[str, Dict[str, Set[int]]] = {field: defaultdict(set) for field in TEXT_FIELDS}
+        # {小写关键词: {群组ID}}
+        self._exact_keywords: Dict[str, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, group_id: int) -> bool:
+        return group_id in self._docs
+
+    def upsert(self, group: Dict[str, Any]) -> None:
+        """
+        添加或更新一个群组。
+
+        Args:
+            group: 群组信息，包含 id, number, name, description, link, keywords
+        """
+        group_id = group["id"]
+        keywords = [kw.lower() for kw in group.get("keywords") or []]
+        texts = {
+            # 关键词之间用不会出现在查询中的字符分隔，避免片段跨越两个关键词
+            "keywords": "\x00".join(keywords),
+            "name": (group.get("name") or "").lower(),
+            "description": (group.get("description") or "").lower()
+        }
+
+        with self._lock:
+            self._remove_locked(group_id)
+            self._docs[group_id] = group
+            self._texts[group_id] = texts
+            for field, text in texts.items():
+                postings = self._postings[field]
+                for gram in _grams(text):
+                    postings[gram].add(group_id)
+            for keyword in keywords:
+                self._exact_keywords[keyword].add(group_id)
+
+    def remove(self, group_id: int) -> None:
+        """从索引中删除一个群组"""
+        with self._lock:
+            self._remove_locked(group_id)
+
+    def _remove_locked(self, group_id: int) -> None:
+        texts = self._texts.pop(group_id, None)
+        if texts is None:
+            return
+        self._docs.pop(group_id, None)
+        for field, text in texts.items():
+            postings = self._postings[field]
+            for gram in _grams(text):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(group_id)
+                    if not ids:
+                        del postings[gram]
+        for keyword in texts["keywords"].split("\x00"):
+            ids = self._exact_keywords.get(keyword)
+            if ids is not None:
+                ids.discard(group_id)
+                if not ids:
+                    del self._exact_keywords[keyword]
+
+    def rebuild(self, groups: Iterable[Dict[str, Any]]) -> None:
+        """用给定的群组重建整个索引"""
+        with self._lock:
+            self._docs.clear()
+            self._texts.clear()
+            for postings in self._postings.values():
+                postings.clear()
+            self._exact_keywords.clear()
+            for group in groups:
+                self.upsert(group)
+
+    def _candidates(self, field: str, query: str) -> Set[int]:
+        """返回字段中包含查询词所有片段的群组ID（可能包含误匹配，需要再次校验）"""
+        postings = self._postings[field]
+        result: Optional[Set[int]] = None
+        # 从最短的倒排列表开始求交集
+        for ids in sorted((postings.get(gram, set()) for gram in _query_grams(query)), key=len):
+            result = set(ids) if result is None else result & ids
+            if not result:
+                return set()
+        return result or set()
+
+    def search(self, query: str, limit: Optional[int] = None,
+               after: Optional[Tuple[int, str]] = None) -> List[Dict[str, Any]]:
+        """
+        搜索群组。
+
+        Args:
+            query: 搜索词，匹配群组关键词、名称或描述中的子串（不区分大小写）
+            limit: 最多返回的群组数量
+            after: 上一页最后一个群组的 (得分, 编号)，只返回排在它之后的群组
+
+        Returns:
+            按得分从高到低、群组编号从小到大排序的群组信息列表，每项包含 score 字段
+        """
+        query = (query or "").strip().lower()
+        if not query:
+            return []
+
+        with self._lock:
+            scores: Dict[int, int] = defaultdict(int)
+            for group_id in self._exact_keywords.get(query, ()):
+                scores[group_id] += SCORE_KEYWORD_EXACT
+            for field, score in (("keywords", SCORE_KEYWORD), ("name", SCORE_NAME), ("description", SCORE_DESCRIPTION)):
+                for group_id in self._candidates(field, query):
+                    if query in self._texts[group_id][field]:
+                        scores[group_id] += score
+
+            def sort_key(item):
+                return (-item[1], _number_key(self._docs[item[0]]["number"]))
+
+            ranked = sorted(scores.items(), key=sort_key)
+            if after is not None:
+                after_score, after_number = after
+                start = bisect_right(ranked, (-after_score, _number_key(after_number)), key=sort_key)
+                ranked = ranked[start:]
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [{**self._docs[group_id], "score": score} for group_id, score in ranked]
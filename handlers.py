@@ -1,21 +1,86 @@
+import hashlib
 import logging
 import re
-from datetime import datetime
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
-from bot.responses import get_response_for_keyword
-from bot.helpers import is_user_admin
-from config import PRIVATE_CHAT_WELCOME, CHANNEL_INFO, GROUP_DATABASE
+from bot.responses import find_keyword_response
+from utils.group_category import classify_group
+from bot.helpers import is_user_admin, is_admin_member, invalidate_admin_cache
+from bot.update_log import annotate_update
+from bot.data_access import (
+    find_group_by_number, search_groups_page, is_group_muted, set_group_mute_state,
+    get_bot_settings, get_channels, watch_group_changes
+)
+from config import (
+    PRIVATE_CHAT_WELCOME, CHANNEL_INFO, GROUP_DATABASE, GROUP_SEARCH_PAGE_SIZE,
+    GROUP_LOOKUP_CACHE_SIZE, GROUP_LOOKUP_CACHE_TTL, GROUP_LOOKUP_NEGATIVE_TTL
+)
+from utils.cache import TTLCache, cache_event_counter
+from utils.metrics import Counter
 
 # 导入 app 模块以访问机器人状态
 try:
     from app import bot_status
 except ImportError:
     # 如果导入失败，创建一个假的状态对象以防止错误
-    bot_status = {"messages_processed": 0, "is_running": True}
+    bot_status = {"is_running": True}
+
+# 各处理器处理的消息数和群消息各处理阶段的计数（按线程分片，计数时不加锁）
+_messages_processed = bot_status.setdefault("messages_processed", Counter(("handler",)))
+_auto_reply_stages = bot_status.setdefault("auto_reply_stages", Counter(("stage",)))
+# 群组编号查询缓存统计
+_group_lookup_stats = bot_status.setdefault("group_lookup_cache", cache_event_counter("hits", "misses"))
 
 logger = logging.getLogger(__name__)
 
+# 翻页按钮的回调数据前缀，格式为 "spage|页码|游标|关键词"，不能与其他按钮的回调数据（如 search_group）冲突
+SEARCH_PAGE_PREFIX = "spage|"
+# Telegram 限制 callback_data 最多 64 字节
+CALLBACK_DATA_LIMIT = 64
+# 过长的搜索关键词无法放入 callback_data，以短哈希引用 {"#哈希": 关键词}
+_search_keywords = TTLCache(maxsize=10000, ttl=86400)
+
+# 群组编号查询结果缓存 {群组编号: (回复HTML, 群组名称)}，不存在的编号缓存为 _GROUP_NOT_FOUND
+_group_reply_cache = TTLCache(maxsize=GROUP_LOOKUP_CACHE_SIZE, ttl=GROUP_LOOKUP_CACHE_TTL)
+_GROUP_NOT_FOUND = object()
+_group_reply_cache_state = {"watching": False}
+
+# 私聊主菜单：主要联系按钮和查看频道按钮
+MAIN_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("好旺公群", url="https://t.me/hwgq")],
+    [InlineKeyboardButton("查看频道", callback_data="view_channels")]
+])
+
+# 数据库中没有频道时显示的默认频道
+DEFAULT_CHANNELS = [
+    {"name": "好旺公群", "username": "hwgq"},
+    {"name": "供求信息", "username": "hwtb2"},
+    {"name": "新开公群", "username": "xinqun"},
+    {"name": "核心大群", "username": "daqun"},
+    {"name": "防骗指南", "username": "hwtb22"},
+    {"name": "担保教程", "username": "hwtb33"},
+    {"name": "联系好旺担保", "username": "hwdb"}
+]
+
+# 频道列表按钮缓存 {"channels": 生成按钮的频道列表, "keyboard": 按钮}
+# get_channels 在频道变更前总是返回同一个列表对象，列表对象变化时重新生成按钮
+_channel_keyboard_cache = {"channels": None, "keyboard": None}
+
+def _channel_keyboard(channels) -> InlineKeyboardMarkup:
+    """获取频道列表的按钮（每个频道一个链接按钮，加上查看全部频道和返回主菜单按钮）"""
+    cache = _channel_keyboard_cache
+    keyboard = cache["keyboard"]
+    if cache["channels"] is not channels or keyboard is None:
+        buttons = [
+            [InlineKeyboardButton(channel["name"], url=f"https://t.me/{channel['username']}")]
+            for channel in channels
+        ]
+        buttons.append([InlineKeyboardButton("查看频道", callback_data="view_all_channels")])
+        buttons.append([InlineKeyboardButton("返回主菜单", callback_data="main_menu")])
+        keyboard = InlineKeyboardMarkup(buttons)
+        cache["channels"], cache["keyboard"] = channels, keyboard
+    return keyboard
+
 async def welcome_new_members(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Welcome new members when they join the group."""
     new_members = update.message.new_chat_members
@@ -38,6 +103,21 @@ async def welcome_new_members(update: Update, context: ContextTypes.DEFAULT_TYPE
         await update.message.reply_text(welcome_message)
         logger.info(f"Welcomed new member: {member.first_name} ({member.id}) to {chat_title}")
 
+async def track_chat_member_updates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """群成员身份变化时，使该群组的管理员缓存失效"""
+    member_update = update.chat_member or update.my_chat_member
+    if not member_update:
+        return
+    
+    was_admin = is_admin_member(member_update.old_chat_member)
+    is_admin = is_admin_member(member_update.new_chat_member)
+    if was_admin != is_admin or member_update.new_chat_member.user.id == context.bot.id:
+        invalidate_admin_cache(member_update.chat.id)
+        logger.info(
+            f"群组 {member_update.chat.title} ({member_update.chat.id}) 管理员变动，已刷新管理员缓存 | "
+            f"用户: {member_update.new_chat_member.user.id}"
+        )
+
 async def handle_private_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """处理私聊消息，提供群组搜索和导航功能"""
     if not update.message or not update.message.text:
@@ -51,7 +131,7 @@ async def handle_private_chat(update: Update, context: ContextTypes.DEFAULT_TYPE
     message_text = update.message.text.strip()
     
     # 更新处理消息计数
-    bot_status["messages_processed"] += 1
+    _messages_processed.inc("handle_private_chat")
     
     # 记录用户查询
     username = f"@{user.username}" if user and user.username else f"{user.first_name}" if user else "未知用户"
@@ -59,19 +139,13 @@ async def handle_private_chat(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     # 处理首次私聊或/start命令
     if message_text.lower() == "/start":
-        # 创建主要联系按钮，和查看频道按钮
-        hwgq_button = InlineKeyboardButton("好旺公群", url="https://t.me/hwgq")
-        channel_button = InlineKeyboardButton("查看频道", callback_data="view_channels")
-        keyboard = InlineKeyboardMarkup([
-            [hwgq_button],
-            [channel_button]
-        ])
+        # 主要联系按钮和查看频道按钮
+        keyboard = MAIN_MENU_KEYBOARD
         
         # 获取机器人设置中的欢迎消息，如果数据库中有的话
         try:
-            from models import BotSettings
-            settings = BotSettings.query.first()
-            welcome_text = settings.private_chat_welcome if settings else PRIVATE_CHAT_WELCOME
+            settings = await get_bot_settings()
+            welcome_text = settings["private_chat_welcome"] if settings else PRIVATE_CHAT_WELCOME
         except Exception:
             # 如果出现异常（如数据库未初始化），使用默认欢迎消息
             welcome_text = PRIVATE_CHAT_WELCOME
@@ -106,73 +180,90 @@ async def handle_private_chat(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     # 处理关键词搜索
     # 先检查是否有自动回复的关键词
-    keyword_response = get_response_for_keyword(message_text)
+    keyword_response = await find_keyword_response(message_text)
     if keyword_response:
-        await update.message.reply_text(keyword_response)
+        annotate_update(trigger_keyword=keyword_response[0])
+        await update.message.reply_text(keyword_response[1])
         return
     
     # 如果没有匹配到关键词回复，尝试进行群组关键词搜索
     await search_groups_by_keyword(update, message_text)
 
-async def search_group_by_number(update: Update, group_number: str) -> None:
-    """通过群组编号搜索并返回群组信息，使用美观的格式，参考示例截图样式"""
+def invalidate_group_reply_cache(changed_ids=None, deleted_ids=()) -> None:
+    """
+    群组发生变化时清空编号查询缓存（新增的群组也需要清除不存在的缓存）。
+    本进程的修改提交后立即调用，其他进程的修改在群组索引定时同步时调用。
+    """
+    _group_reply_cache.clear()
+
+def _render_group_reply(group_number: str, group_info: dict) -> str:
+    """构建群组编号查询的 HTML 回复"""
+    # 根据截图样式创建带有背景颜色的标题
+    # 数据库中的群组在写入时已计算好分类，配置文件中的群组按描述计算
+    group_category = group_info.get("category") or classify_group(group_info["description"])
+    
+    # 使用HTML格式创建美观的响应，完全参考截图样式
+    # 顶部有群类型，然后是群号
+    return (
+        f"<b>{group_category}</b>\n"
+        f"<b>{group_number}</b>\n\n"
+        f"<a href='{group_info['link']}'>{group_info['link']}</a>\n\n"
+        f"<b>Telegram</b>\n"  # Telegram标签
+        f"公群{group_number} {group_info['description']}\n"  # 使用完整描述
+    )
+
+async def _lookup_group_reply(group_number: str):
+    """
+    查询群组编号对应的回复，结果按编号缓存。
+
+    Returns:
+        (回复HTML, 群组名称)，群组不存在时返回 None
+    """
+    cached = _group_reply_cache.get(group_number)
+    if cached is not None:
+        _group_lookup_stats.inc("hits")
+        return None if cached is _GROUP_NOT_FOUND else cached
+    _group_lookup_stats.inc("misses")
+    
     group_info = None
+    db_failed = False
     
     # 首先尝试从数据库中查找群组
     try:
-        from app import app
-        with app.app_context():
-            from models import Group
-            db_group = Group.query.filter_by(group_number=group_number).first()
-            
-            if db_group:
-                group_info = {
-                    "name": db_group.name,
-                    "link": db_group.link,
-                    "description": db_group.description
-                }
-                logger.debug(f"从数据库找到群组: {group_number}")
+        if not _group_reply_cache_state["watching"]:
+            watch_group_changes(invalidate_group_reply_cache)
+            _group_reply_cache_state["watching"] = True
+        group_info = await find_group_by_number(group_number)
+        if group_info:
+            logger.debug(f"从数据库找到群组: {group_number}")
     except Exception as e:
         # 如果数据库查询失败，记录错误
         logger.warning(f"数据库群组查询失败: {str(e)}")
+        db_failed = True
     
     # 如果数据库中没有找到，尝试从配置文件中查找
     if not group_info and group_number in GROUP_DATABASE["数字编号"]:
         group_info = GROUP_DATABASE["数字编号"][group_number]
         logger.debug(f"从配置文件找到群组: {group_number}")
     
+    if not group_info:
+        # 数据库查询失败时不缓存，避免把暂时的错误当成群组不存在
+        if not db_failed:
+            _group_reply_cache.set(group_number, _GROUP_NOT_FOUND, ttl=GROUP_LOOKUP_NEGATIVE_TTL)
+        return None
+    
+    result = (_render_group_reply(group_number, group_info), group_info["name"])
+    if not db_failed:
+        _group_reply_cache.set(group_number, result)
+    return result
+
+async def search_group_by_number(update: Update, group_number: str) -> None:
+    """通过群组编号搜索并返回群组信息，使用美观的格式，参考示例截图样式"""
+    group_reply = await _lookup_group_reply(group_number)
+    
     # 如果找到群组信息，显示详情
-    if group_info:
-        # 根据截图样式创建带有背景颜色的标题
-        # 根据群组描述设置分类
-        group_category = "钱钱"  # 默认分类
-        
-        # 尝试从群组描述或关键词中获取更合适的分类
-        description_lower = group_info['description'].lower()
-        if any(kw in description_lower for kw in ["卡商", "pos机"]):
-            group_category = "卡商"
-        elif any(kw in description_lower for kw in ["代收", "代付", "支付"]):
-            group_category = "代收代付"
-        elif any(kw in description_lower for kw in ["白资"]):
-            group_category = "白资"
-        elif any(kw in description_lower for kw in ["承兑", "usdt", "互换"]):
-            group_category = "承兑"
-        elif any(kw in description_lower for kw in ["换汇", "货币"]):
-            group_category = "换汇"
-        elif any(kw in description_lower for kw in ["包网", "搭建"]):
-            group_category = "包网"
-        elif any(kw in description_lower for kw in ["技术", "开发"]):
-            group_category = "技术"
-            
-        # 使用HTML格式创建美观的响应，完全参考截图样式
-        # 顶部有群类型，然后是群号
-        response = (
-            f"<b>{group_category}</b>\n"
-            f"<b>{group_number}</b>\n\n"
-            f"<a href='{group_info['link']}'>{group_info['link']}</a>\n\n"
-            f"<b>Telegram</b>\n"  # Telegram标签
-            f"公群{group_number} {group_info['description']}\n"  # 使用完整描述
-        )
+    if group_reply:
+        response, group_name = group_reply
         
         # 尝试使用引用回复发送消息
         try:
@@ -191,24 +282,10 @@ async def search_group_by_number(update: Update, group_number: str) -> None:
                 disable_web_page_preview=False
             )
         
-        logger.info(f"成功查询群组编号: {group_number} | 群组: {group_info['name']}")
+        logger.info(f"成功查询群组编号: {group_number} | 群组: {group_name}")
         
-        # 记录消息日志
-        try:
-            from app import app, db
-            with app.app_context():
-                from models import MessageLog
-                log = MessageLog(
-                    chat_id=update.effective_chat.id,
-                    chat_type="private",
-                    user_id=update.effective_user.id if update.effective_user else None,
-                    username=update.effective_user.username if update.effective_user and update.effective_user.username else None,
-                    message_text=f"查询群组编号:{group_number}"
-                )
-                db.session.add(log)
-                db.session.commit()
-        except Exception as e:
-            logger.warning(f"记录消息日志失败: {str(e)}")
+        # 在更新日志中记录查询的群组编号
+        annotate_update(trigger_keyword=f"查询群组编号:{group_number}")
     else:
         # 创建返回主菜单按钮
         main_menu_button = InlineKeyboardButton("返回主菜单", callback_data="main_menu")
@@ -230,85 +307,113 @@ async def search_group_by_number(update: Update, group_number: str) -> None:
         )
         logger.info(f"查询了不存在的群组编号: {group_number}")
 
-async def search_groups_by_keyword(update: Update, keyword: str) -> None:
-    """通过关键词搜索并返回相关群组列表，使用美观的格式"""
+def _search_page_callback(keyword: str, page: int, cursor: str) -> str:
+    """生成"下一页"按钮的回调数据，关键词过长时改为引用短哈希"""
+    prefix = f"{SEARCH_PAGE_PREFIX}{page}|{cursor}|"
+    if not keyword.startswith("#") and len((prefix + keyword).encode("utf-8")) <= CALLBACK_DATA_LIMIT:
+        return prefix + keyword
+    ref = "#" + hashlib.sha1(keyword.encode("utf-8")).hexdigest()[:10]
+    _search_keywords.set(ref, keyword)
+    return prefix + ref
+
+def _parse_search_page_callback(data: str):
+    """
+    解析翻页回调数据，返回 (关键词, 页码, 游标)，关键词引用已过期时关键词为 None。
+    回调数据格式不正确时返回 None。
+    """
+    if not data.startswith(SEARCH_PAGE_PREFIX):
+        return None
+    parts = data[len(SEARCH_PAGE_PREFIX):].split("|", 2)
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[2]:
+        return None
+    page, cursor, keyword = parts
+    if keyword.startswith("#"):
+        keyword = _search_keywords.get(keyword)
+    return keyword, int(page), cursor
+
+def _search_config_groups(keyword: str) -> list:
+    """在配置文件的关键词索引中查找匹配的群组"""
     found_groups = []
+    seen_numbers = set()
+    for key in GROUP_DATABASE["关键词"]:
+        if keyword.lower() in key.lower() or key.lower() in keyword.lower():
+            group_numbers = GROUP_DATABASE["关键词"][key]
+            for number in group_numbers:
+                if number in GROUP_DATABASE["数字编号"] and number not in seen_numbers:
+                    seen_numbers.add(number)
+                    group_info = GROUP_DATABASE["数字编号"][number]
+                    found_groups.append({
+                        "number": number,
+                        "name": group_info["name"],
+                        "description": group_info["description"],
+                        "link": group_info["link"]
+                    })
+    return found_groups
+
+async def _find_search_page(keyword: str, page: int, cursor: str = ""):
+    """
+    查找一页搜索结果。
+
+    游标为空表示第一页；以 c 开头的游标表示配置文件中的结果，按页码计算偏移，
+    其他游标由数据访问层生成。
+
+    Returns:
+        (群组列表, 下一页游标)，没有下一页时游标为空字符串
+    """
+    if cursor != "c":
+        # 首先尝试从数据库中查询关键词和群组
+        try:
+            found_groups, next_cursor = await search_groups_page(keyword, cursor or None)
+            logger.debug(f"从数据库搜索关键词 '{keyword}' 第 {page} 页找到 {len(found_groups)} 个群组")
+            if found_groups or cursor:
+                return found_groups, next_cursor or ""
+        except Exception as e:
+            # 如果数据库查询失败，记录错误
+            logger.warning(f"数据库关键词搜索失败: {str(e)}")
+            if cursor:
+                return [], ""
+
+    # 如果数据库中没有找到，尝试从配置文件中查找
+    found_groups = _search_config_groups(keyword)
+    logger.debug(f"从配置文件搜索关键词 '{keyword}' 找到 {len(found_groups)} 个群组")
+    offset = (page - 1) * GROUP_SEARCH_PAGE_SIZE
+    next_cursor = "c" if len(found_groups) > offset + GROUP_SEARCH_PAGE_SIZE else ""
+    return found_groups[offset:offset + GROUP_SEARCH_PAGE_SIZE], next_cursor
+
+def _render_search_page(keyword: str, page: int, found_groups: list, next_cursor: str):
+    """构建一页搜索结果的 HTML 消息和按钮"""
+    title = f"<b>🔍 关键词「{keyword}」搜索结果：</b>"
+    if page > 1 or next_cursor:
+        title += f"（第 {page} 页）"
+    response = title + "\n\n"
     
-    # 首先尝试从数据库中查询关键词和群组
-    try:
-        from app import app
-        with app.app_context():
-            from models import Group, Keyword
-            
-            # 查找包含关键词的群组
-            db_keywords = Keyword.query.filter(Keyword.word.ilike(f"%{keyword}%")).all()
-            if db_keywords:
-                for kw in db_keywords:
-                    for group in kw.groups:
-                        if group.group_number not in [g.get("number") for g in found_groups]:
-                            found_groups.append({
-                                "number": group.group_number,
-                                "name": group.name,
-                                "description": group.description,
-                                "link": group.link
-                            })
-            
-            # 如果没有找到，再尝试搜索群组名称和描述
-            if not found_groups:
-                db_groups = Group.query.filter(
-                    (Group.name.ilike(f"%{keyword}%")) | 
-                    (Group.description.ilike(f"%{keyword}%"))
-                ).all()
-                
-                for group in db_groups:
-                    if group.group_number not in [g.get("number") for g in found_groups]:
-                        found_groups.append({
-                            "number": group.group_number,
-                            "name": group.name,
-                            "description": group.description,
-                            "link": group.link
-                        })
-            
-            logger.debug(f"从数据库搜索关键词 '{keyword}' 找到 {len(found_groups)} 个群组")
-    except Exception as e:
-        # 如果数据库查询失败，记录错误
-        logger.warning(f"数据库关键词搜索失败: {str(e)}")
+    # 为每个找到的群组创建按钮
+    keyboard = []
     
-    # 如果数据库中没有找到，尝试从配置文件中查找
-    if not found_groups:
-        # 在关键词索引中查找匹配项
-        for key in GROUP_DATABASE["关键词"]:
-            if keyword.lower() in key.lower() or key.lower() in keyword.lower():
-                group_numbers = GROUP_DATABASE["关键词"][key]
-                for number in group_numbers:
-                    if number in GROUP_DATABASE["数字编号"] and number not in [g.get("number") for g in found_groups]:
-                        group_info = GROUP_DATABASE["数字编号"][number]
-                        found_groups.append({
-                            "number": number,
-                            "name": group_info["name"],
-                            "description": group_info["description"],
-                            "link": group_info["link"]
-                        })
-        logger.debug(f"从配置文件搜索关键词 '{keyword}' 找到 {len(found_groups)} 个群组")
+    start = (page - 1) * GROUP_SEARCH_PAGE_SIZE + 1
+    for idx, group in enumerate(found_groups, start):
+        response += f"<b>{idx}. {group['name']}</b> (编号: {group['number']})\n"
+        response += f"   {group['description']}\n\n"
+        
+        # 添加群组按钮
+        join_button = InlineKeyboardButton(f"加入 {group['name']}", url=group['link'])
+        keyboard.append([join_button])
+    
+    # 还有更多结果时添加下一页按钮
+    if next_cursor:
+        callback_data = _search_page_callback(keyword, page + 1, next_cursor)
+        keyboard.append([InlineKeyboardButton("下一页 ▶", callback_data=callback_data)])
+    
+    # 添加返回主菜单的按钮
+    keyboard.append([InlineKeyboardButton("返回主菜单", callback_data="main_menu")])
+    return response, InlineKeyboardMarkup(keyboard)
+
+async def search_groups_by_keyword(update: Update, keyword: str) -> None:
+    """通过关键词搜索并返回相关群组列表，使用美观的格式，结果较多时分页显示"""
+    found_groups, next_cursor = await _find_search_page(keyword, 1)
     
     if found_groups:
-        # 构建HTML格式的响应消息
-        response = f"<b>🔍 关键词「{keyword}」搜索结果：</b>\n\n"
-        
-        # 为每个找到的群组创建按钮
-        keyboard = []
-        
-        for idx, group in enumerate(found_groups, 1):
-            response += f"<b>{idx}. {group['name']}</b> (编号: {group['number']})\n"
-            response += f"   {group['description']}\n\n"
-            
-            # 添加群组按钮
-            join_button = InlineKeyboardButton(f"加入 {group['name']}", url=group['link'])
-            keyboard.append([join_button])
-        
-        # 添加返回主菜单的按钮
-        keyboard.append([InlineKeyboardButton("返回主菜单", callback_data="main_menu")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        response, reply_markup = _render_search_page(keyword, 1, found_groups, next_cursor)
         
         # 发送美观的搜索结果
         await update.message.reply_text(
@@ -316,7 +421,7 @@ async def search_groups_by_keyword(update: Update, keyword: str) -> None:
             reply_markup=reply_markup,
             parse_mode="HTML"  # 启用HTML格式
         )
-        logger.info(f"关键词搜索成功 | 关键词: '{keyword}' | 找到 {len(found_groups)} 个群组")
+        logger.info(f"关键词搜索成功 | 关键词: '{keyword}' | 第 1 页 {len(found_groups)} 个群组")
     else:
         # 创建返回主菜单按钮
         main_menu_button = InlineKeyboardButton("返回主菜单", callback_data="main_menu")
@@ -338,25 +443,49 @@ async def search_groups_by_keyword(update: Update, keyword: str) -> None:
         )
         logger.info(f"关键词搜索无结果 | 关键词: '{keyword}'")
 
+async def show_search_page(query, data: str) -> None:
+    """处理搜索结果的"下一页"按钮，在原消息上显示下一页"""
+    parsed = _parse_search_page_callback(data)
+    if parsed is None:
+        logger.warning(f"无效的翻页回调数据: {data}")
+        return
+    keyword, page, cursor = parsed
+    found_groups = []
+    next_cursor = ""
+    if keyword:
+        found_groups, next_cursor = await _find_search_page(keyword, page, cursor)
+    
+    if not found_groups:
+        # 关键词引用已过期或结果已变化
+        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("返回主菜单", callback_data="main_menu")]])
+        await query.message.edit_text(
+            "<b>没有更多搜索结果了。</b>\n\n请重新发送关键词进行搜索。",
+            reply_markup=keyboard,
+            parse_mode="HTML"
+        )
+        return
+    
+    response, reply_markup = _render_search_page(keyword, page, found_groups, next_cursor)
+    await query.message.edit_text(
+        response,
+        reply_markup=reply_markup,
+        parse_mode="HTML"
+    )
+    logger.info(f"关键词搜索翻页 | 关键词: '{keyword}' | 第 {page} 页 {len(found_groups)} 个群组")
+
 async def handle_button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """处理按钮回调查询"""
     query = update.callback_query
     await query.answer()  # 通知 Telegram 客户端回调已处理
     
     if query.data == "main_menu":
-        # 创建主要联系按钮
-        hwgq_button = InlineKeyboardButton("好旺公群", url="https://t.me/hwgq")
-        channel_button = InlineKeyboardButton("查看频道", callback_data="view_channels")
-        keyboard = InlineKeyboardMarkup([
-            [hwgq_button],
-            [channel_button]
-        ])
+        # 主要联系按钮和查看频道按钮
+        keyboard = MAIN_MENU_KEYBOARD
         
         # 尝试从数据库获取欢迎消息
         try:
-            from models import BotSettings
-            settings = BotSettings.query.first()
-            welcome_text = settings.private_chat_welcome if settings else PRIVATE_CHAT_WELCOME
+            settings = await get_bot_settings()
+            welcome_text = settings["private_chat_welcome"] if settings else PRIVATE_CHAT_WELCOME
         except Exception:
             # 如果出现异常（如数据库未初始化），使用默认欢迎消息
             welcome_text = PRIVATE_CHAT_WELCOME
@@ -369,61 +498,21 @@ async def handle_button_callback(update: Update, context: ContextTypes.DEFAULT_T
         )
     
     elif query.data == "view_channels":
-        # 显示频道列表
-        # 为每个官方频道创建对应的按钮
-        buttons = []
-        
-        # 尝试从数据库获取频道信息
+        # 显示频道列表，数据库中没有频道或读取失败时使用默认频道
         try:
-            from models import Channel
-            
-            # 获取频道信息并按display_order排序
-            channels_db = Channel.query.order_by(Channel.display_order).all()
-            
-            if channels_db:
-                channels = [(c.name, c.username) for c in channels_db]
-            else:
-                # 如果数据库中没有数据，使用默认值
-                channels = [
-                    ("好旺公群", "hwgq"),
-                    ("供求信息", "hwtb2"),
-                    ("新开公群", "xinqun"),
-                    ("核心大群", "daqun"),
-                    ("防骗指南", "hwtb22"),
-                    ("担保教程", "hwtb33"),
-                    ("联系好旺担保", "hwdb")
-                ]
+            channels = await get_channels() or DEFAULT_CHANNELS
         except Exception:
-            # 如果出现异常，使用默认值
-            channels = [
-                ("好旺公群", "hwgq"),
-                ("供求信息", "hwtb2"),
-                ("新开公群", "xinqun"),
-                ("核心大群", "daqun"),
-                ("防骗指南", "hwtb22"),
-                ("担保教程", "hwtb33"),
-                ("联系好旺担保", "hwdb")
-            ]
+            channels = DEFAULT_CHANNELS
+        keyboard = _channel_keyboard(channels)
         
         # 尝试从数据库获取频道信息展示文本
         try:
-            from models import BotSettings
-            settings = BotSettings.query.first()
-            channel_info = settings.channel_info if settings else CHANNEL_INFO
+            settings = await get_bot_settings()
+            channel_info = settings["channel_info"] if settings else CHANNEL_INFO
         except Exception:
             # 出现异常时使用默认配置
             channel_info = CHANNEL_INFO
         
-        # 使用美观的频道列表消息，与欢迎消息保持一致风格
-        # 添加每个频道的按钮
-        for name, username in channels:
-            buttons.append([InlineKeyboardButton(name, url=f"https://t.me/{username}")])
-        
-        # 添加返回主菜单按钮和查看全部频道按钮
-        buttons.append([InlineKeyboardButton("查看频道", callback_data="view_all_channels")])
-        buttons.append([InlineKeyboardButton("返回主菜单", callback_data="main_menu")])
-        keyboard = InlineKeyboardMarkup(buttons)
-        
         # 发送美观的频道列表
         await query.message.edit_text(
             channel_info,
@@ -431,8 +520,19 @@ async def handle_button_callback(update: Update, context: ContextTypes.DEFAULT_T
             parse_mode="HTML"  # 允许使用HTML格式
         )
     
+    elif query.data and query.data.startswith(SEARCH_PAGE_PREFIX):
+        # 搜索结果翻页
+        await show_search_page(query, query.data)
+    
     # 其他回调操作可在此处理
 
+async def _reply_verify_group(update: Update, response: str) -> None:
+    """回复验群消息，任何用户都可以触发"""
+    _auto_reply_stages.inc("public_reply")
+    await update.message.reply_text(response)
+    user = update.effective_user
+    logger.info(f"验群消息回复 | 触发用户: {user.username if user and user.username else '未知用户'}")
+
 async def auto_reply(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """自动回复包含特定关键词的消息。只有群组管理员可以使用此功能。"""
     # 检查消息是否存在且有文本内容
@@ -445,142 +545,97 @@ async def auto_reply(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     user_id = user.id if user else None
     message_text = update.message.text
     
-    # 更新处理消息计数
-    bot_status["messages_processed"] += 1
-    
-    # 如果是私聊，则交由私聊处理器处理
+    # 如果是私聊，则交由私聊处理器处理（由私聊处理器计数）
     if chat_type == "private":
         await handle_private_chat(update, context)
         return
     
-    # 以下是群组聊天的处理逻辑
-    is_admin = False
+    # 更新处理消息计数
+    _messages_processed.inc("auto_reply")
+    
+    # 以下是群组聊天的处理逻辑，按开销从低到高分阶段处理，尽早丢弃无需回复的消息
+    _auto_reply_stages.inc("received")
+    message_lower = message_text.lower()
+    
+    # 阶段一：关键词匹配（纯内存操作），大部分群消息在这里结束
+    found = await find_keyword_response(message_text)
+    if not found:
+        _auto_reply_stages.inc("no_keyword")
+        return
+    trigger_keyword, response = found
+    annotate_update(trigger_keyword=trigger_keyword)
     
+    # "验群"是安全验证功能，任何用户都可以触发，无需检查管理员身份。
+    # 同时包含"禁言"时可能是管理员的关群/开群命令，需要先检查管理员身份，非管理员在阶段三仍然得到验群回复
+    is_verify_group = "验群" in message_lower
+    if is_verify_group and "禁言" not in message_lower:
+        await _reply_verify_group(update, response)
+        return
+    
+    # 阶段二：检查群组是否处于禁言状态
+    is_muted = False
+    try:
+        is_muted = await is_group_muted(chat_id)
+    except Exception:
+        pass
+    
+    # 阶段三：检查用户是否是管理员（需要调用 Bot API，有缓存）
+    is_admin = False
     if user_id:
-        # 检查用户是否是管理员
         is_admin = await is_user_admin(context.bot, chat_id, user_id)
+        annotate_update(is_admin=is_admin)
     
-    # 获取关键词回复
-    response = get_response_for_keyword(message_text)
-    
-    if response:
-        # 只有管理员可以触发机器人（除了验群关键词）
-        if is_admin:
-            # 处理关群和开群命令
-            if "禁言" in message_text.lower() and "解除" not in message_text.lower():
-                # 关群命令
-                try:
-                    # 获取或创建群组设置
-                    from app import app
-                    with app.app_context():
-                        from models import GroupChatSettings
-                        
-                        chat_title = update.effective_chat.title
-                        # 检查群组是否已存在设置
-                        group_settings = GroupChatSettings.query.filter_by(chat_id=chat_id).first()
-                        
-                        if group_settings:
-                            # 更新现有设置
-                            group_settings.is_muted = True
-                            group_settings.muted_at = datetime.utcnow()
-                            group_settings.muted_by = user_id
-                            group_settings.chat_title = chat_title  # 更新群组名称
-                        else:
-                            # 创建新的群组设置
-                            group_settings = GroupChatSettings(
-                                chat_id=chat_id,
-                                chat_title=chat_title,
-                                is_muted=True,
-                                muted_at=datetime.utcnow(),
-                                muted_by=user_id
-                            )
-                            from app import db
-                            db.session.add(group_settings)
-                        
-                        # 保存更改
-                        from app import db
-                        db.session.commit()
-                        
-                        logger.info(f"群组 {chat_title} ({chat_id}) 已被管理员 {user_id} 设置为禁言状态")
-                except Exception as e:
-                    logger.error(f"设置群组禁言状态时出错: {str(e)}")
-                
-            elif "解除禁言" in message_text.lower():
-                # 开群命令
-                try:
-                    # 获取或创建群组设置
-                    from app import app
-                    with app.app_context():
-                        from models import GroupChatSettings
-                        
-                        chat_title = update.effective_chat.title
-                        # 检查群组是否已存在设置
-                        group_settings = GroupChatSettings.query.filter_by(chat_id=chat_id).first()
-                        
-                        if group_settings:
-                            # 更新现有设置
-                            group_settings.is_muted = False
-                            group_settings.unmuted_at = datetime.utcnow()
-                            group_settings.unmuted_by = user_id
-                            group_settings.chat_title = chat_title  # 更新群组名称
-                        else:
-                            # 创建新的群组设置（默认为非禁言状态）
-                            group_settings = GroupChatSettings(
-                                chat_id=chat_id,
-                                chat_title=chat_title,
-                                is_muted=False,
-                                unmuted_at=datetime.utcnow(),
-                                unmuted_by=user_id
-                            )
-                            from app import db
-                            db.session.add(group_settings)
-                        
-                        # 保存更改
-                        from app import db
-                        db.session.commit()
-                        
-                        logger.info(f"群组 {chat_title} ({chat_id}) 已被管理员 {user_id} 解除禁言状态")
-                except Exception as e:
-                    logger.error(f"解除群组禁言状态时出错: {str(e)}")
-            
-            # 根据用户名称个性化回复（如果可用）
-            if user and user.first_name:
-                # 如果响应中没有称呼，且不是系统性的响应（如规则通知），可以加上称呼
-                if not any(keyword in response for keyword in ["命令", "规则", "功能", "/", "使用", "禁言"]):
-                    # 20%的概率在回复前面加上用户称呼
-                    import random
-                    if random.random() < 0.2:
-                        response = f"{user.first_name}，{response}"
-            
-            # 发送回复
-            await update.message.reply_text(response)
-            
-            # 记录详细日志
-            username = f"@{user.username}" if user and user.username else "未知用户"
-            chat_name = update.effective_chat.title
-            
-            logger.info(
-                f"自动回复消息 | 聊天: {chat_name} | "
-                f"用户: {username} | 触发文本: '{message_text[:20]}...' 如果较长"
-            )
-        elif "验群" in message_text.lower():
-            # 即使不是管理员，也允许"验群"关键词，因为这是安全验证功能
-            await update.message.reply_text(response)
-            logger.info(f"验群消息回复 | 由非管理员触发: {user.username if user and user.username else '未知用户'}")
-        else:
-            # 检查群组是否处于禁言状态
-            try:
-                from app import app
-                with app.app_context():
-                    from models import GroupChatSettings
-                    group_settings = GroupChatSettings.query.filter_by(chat_id=chat_id).first()
-                    
-                    if group_settings and group_settings.is_muted:
-                        # 如果群组处于禁言状态，不提示用户关于管理员限制
-                        return
-            except Exception:
-                pass
-                
-            # 告知用户只有管理员可以使用机器人
-            await update.message.reply_text("抱歉，只有群组管理员可以使用机器人功能。")
-            logger.info(f"非管理员尝试使用机器人 | 用户: {user.username if user and user.username else '未知用户'}")
+    # 只有管理员可以触发机器人（除了验群关键词）
+    if not is_admin:
+        if is_verify_group:
+            await _reply_verify_group(update, response)
+            return
+        
+        if is_muted:
+            # 如果群组处于禁言状态，不提示用户关于管理员限制
+            _auto_reply_stages.inc("muted_silenced")
+            return
+        
+        # 告知用户只有管理员可以使用机器人
+        _auto_reply_stages.inc("not_admin")
+        await update.message.reply_text("抱歉，只有群组管理员可以使用机器人功能。")
+        logger.info(f"非管理员尝试使用机器人 | 用户: {user.username if user and user.username else '未知用户'}")
+        return
+    
+    # 阶段四：管理员消息，处理关群/开群命令并回复
+    _auto_reply_stages.inc("admin_reply")
+    if "解除禁言" in message_lower:
+        mute = False  # 开群命令
+    elif "禁言" in message_lower and "解除" not in message_lower:
+        mute = True  # 关群命令
+    else:
+        mute = None
+    if mute is not None:
+        chat_title = update.effective_chat.title
+        action = "设置为禁言状态" if mute else "解除禁言状态"
+        try:
+            await set_group_mute_state(chat_id, chat_title, user_id, mute)
+            logger.info(f"群组 {chat_title} ({chat_id}) 已被管理员 {user_id} {action}")
+        except Exception as e:
+            logger.error(f"{action}时出错: {str(e)}")
+    
+    # 根据用户名称个性化回复（如果可用）
+    if user and user.first_name:
+        # 如果响应中没有称呼，且不是系统性的响应（如规则通知），可以加上称呼
+        if not any(keyword in response for keyword in ["命令", "规则", "功能", "/", "使用", "禁言"]):
+            # 20%的概率在回复前面加上用户称呼
+            import random
+            if random.random() < 0.2:
+                response = f"{user.first_name}，{response}"
+    
+    # 发送回复
+    await update.message.reply_text(response)
+    
+    # 记录详细日志
+    username = f"@{user.username}" if user and user.username else "未知用户"
+    chat_name = update.effective_chat.title
+    
+    logger.info(
+        f"自动回复消息 | 聊天: {chat_name} | "
+        f"用户: {username} | 触发文本: '{message_text[:20]}...' 如果较长"
+    )
@@ -1,5 +1,13 @@
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, FrozenSet
 from telegram import Bot, ChatMember, ChatMemberAdministrator, ChatMemberOwner
+from config import ADMIN_CACHE_TTL, ADMIN_CACHE_MAX_CHATS
+from utils.cache import TTLCache
+
+# 群组管理员ID缓存 {chat_id: frozenset(管理员ID)}
+_admin_cache = TTLCache(maxsize=ADMIN_CACHE_MAX_CHATS, ttl=ADMIN_CACHE_TTL)
+# 正在加载管理员列表的群组，避免同一群组并发重复请求
+_admin_cache_locks: Dict[int, asyncio.Lock] = {}
 
 async def get_group_admins(bot: Bot, chat_id: int) -> List[Dict[str, Any]]:
     """
@@ -29,10 +37,57 @@ async def get_group_admins(bot: Bot, chat_id: int) -> List[Dict[str, Any]]:
         print(f"获取管理员列表错误 (Error retrieving admins): {e}")
         return []
 
+async def get_admin_ids(bot: Bot, chat_id: int) -> FrozenSet[int]:
+    """
+    Get the IDs of all administrators in a group, cached per chat.
+
+    The admin set is loaded with a single get_chat_administrators call and
+    kept for ADMIN_CACHE_TTL seconds, or until invalidate_admin_cache is called.
+
+    Args:
+        bot: The bot instance
+        chat_id: The ID of the chat/group
+
+    Returns:
+        A frozenset of admin user IDs
+    """
+    admin_ids = _admin_cache.get(chat_id)
+    if admin_ids is not None:
+        return admin_ids
+
+    lock = _admin_cache_locks.setdefault(chat_id, asyncio.Lock())
+    async with lock:
+        # 等待期间可能已经被其他请求加载
+        admin_ids = _admin_cache.get(chat_id)
+        if admin_ids is None:
+            try:
+                administrators = await bot.get_chat_administrators(chat_id)
+                admin_ids = frozenset(admin.user.id for admin in administrators)
+                _admin_cache.set(chat_id, admin_ids)
+            finally:
+                _admin_cache_locks.pop(chat_id, None)
+    return admin_ids
+
+def invalidate_admin_cache(chat_id: int) -> None:
+    """
+    Drop the cached admin set of a group.
+
+    Args:
+        chat_id: The ID of the chat/group
+    """
+    _admin_cache.pop(chat_id)
+
+def is_admin_member(chat_member: ChatMember) -> bool:
+    """Check if a chat member object represents an admin or the owner."""
+    return isinstance(chat_member, (ChatMemberAdministrator, ChatMemberOwner))
+
 async def is_user_admin(bot: Bot, chat_id: int, user_id: int) -> bool:
     """
     Check if a user is an admin in the group.
     
+    Uses the cached admin set of the group; falls back to a single
+    get_chat_member call if the admin list cannot be loaded.
+    
     Args:
         bot: The bot instance
         chat_id: The ID of the chat/group
@@ -41,9 +96,14 @@ async def is_user_admin(bot: Bot, chat_id: int, user_id: int) -> bool:
     Returns:
         True if the user is an admin, False otherwise
     """
+    try:
+        return user_id in await get_admin_ids(bot, chat_id)
+    except Exception as e:
+        print(f"获取管理员列表错误 (Error retrieving admins): {e}")
+
     try:
         chat_member = await bot.get_chat_member(chat_id, user_id)
-        return isinstance(chat_member, (ChatMemberAdministrator, ChatMemberOwner))
+        return is_admin_member(chat_member)
     except Exception as e:
         print(f"检查管理员状态错误 (Error checking admin status): {e}")
         return False
@@ -0,0 +1,123 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class KeywordMatcher:
+    """
+    基于 Aho-Corasick 自动机的多关键词匹配器。
+
+    关键词按传入顺序确定优先级（越靠前优先级越高），匹配时只需对文本扫描一遍，
+    返回文本中出现的优先级最高的关键词对应的值，与关键词数量无关。
+    匹配不区分大小写（关键词和文本都会转为小写）。
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, str]]):
+        """
+        编译关键词自动机。
+
+        Args:
+            items: (关键词, 回复) 序列，按优先级从高到低排列。
+        """
+        # goto 表：每个节点的子节点 {字符: 节点编号}
+        self._goto: List[Dict[str, int]] = [{}]
+        # 每个节点（含失败链）能匹配到的最高优先级，None 表示没有
+        self._best: List[Optional[int]] = [None]
+        self._values: List[str] = []
+        self._keywords: List[str] = []
+
+        for keyword, value in items:
+            if keyword is None:
+                continue
+            keyword_lower = keyword.lower()
+            node = 0
+            for char in keyword_lower:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._best.append(None)
+                node = next_node
+            # 重复的关键词只保留优先级最高的一个
+            if self._best[node] is None:
+                self._best[node] = len(self._values)
+            self._values.append(value)
+            self._keywords.append(keyword)
+
+        self._fail: List[int] = [0] * len(self._goto)
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        """按广度优先顺序计算失败指针，并把失败链上的最高优先级合并到每个节点"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._best[child] = self._min_rank(self._best[child], self._best[0])
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._best[child] = self._min_rank(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    @staticmethod
+    def _min_rank(a: Optional[int], b: Optional[int]) -> Optional[int]:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a if a < b else b
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def find(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        查找文本中优先级最高的关键词。
+
+        Args:
+            text: 要检查的文本。
+
+        Returns:
+            (关键词, 回复)，如果没有匹配则返回 None。
+        """
+        if not self._values or text is None:
+            return None
+
+        goto = self._goto
+        fail = self._fail
+        best_of = self._best
+        best = best_of[0]
+        node = 0
+
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            rank = best_of[node]
+            if rank is not None and (best is None or rank < best):
+                best = rank
+                if best == 0:
+                    # 已经匹配到最高优先级的关键词，无需继续扫描
+                    break
+
+        if best is None:
+            return None
+        return self._keywords[best], self._values[best]
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        返回文本中优先级最高的关键词对应的回复。
+
+        Args:
+            text: 要检查的文本。
+
+        Returns:
+            匹配到的回复，如果没有匹配则返回 None。
+        """
+        found = self.find(text)
+        return found[1] if found else None
@@ -0,0 +1,154 @@
+"""
+消息日志异步批量写入
+处理消息时只把日志放入有界队列，由后台任务定期批量写入数据库，
+避免每条日志都在回复路径上等待一次数据库提交。
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import MESSAGE_LOG_QUEUE_SIZE, MESSAGE_LOG_BATCH_SIZE, MESSAGE_LOG_FLUSH_INTERVAL
+from bot.data_access import run_db
+
+logger = logging.getLogger(__name__)
+
+# 队列满时每丢弃多少条日志记录一次警告
+DROP_WARNING_EVERY = 1000
+
+def _insert_message_logs(rows: List[Dict[str, Any]]) -> None:
+    """一次 INSERT 写入多条日志（驱动使用 executemany 或多行 VALUES）"""
+    from app import db
+    from models import MessageLog
+    db.session.execute(db.insert(MessageLog), rows)
+    db.session.commit()
+
+class MessageLogWriter:
+    """
+    消息日志后台写入器。
+
+    日志先进入有界队列，后台任务每凑满 batch_size 条或每隔 flush_interval 秒批量写入一次。
+    队列已满时丢弃新日志并计数，不阻塞消息处理；停止时写完队列中剩余的日志。
+    """
+
+    def __init__(self, queue_size: int = MESSAGE_LOG_QUEUE_SIZE, batch_size: int = MESSAGE_LOG_BATCH_SIZE,
+                 flush_interval: float = MESSAGE_LOG_FLUSH_INTERVAL, stats: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            queue_size: 队列最多容纳的日志条数
+            batch_size: 每次写入的最多条数
+            flush_interval: 队列中有日志时最长等待多久写入（秒）
+            stats: 用于记录入队/写入/丢弃/失败条数的字典
+        """
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.stats = stats if stats is not None else {}
+        for key in ("queued", "written", "dropped", "failed"):
+            self.stats.setdefault(key, 0)
+
+    def add(self, **fields) -> bool:
+        """
+        添加一条消息日志，字段与 MessageLog 模型一致。必须在事件循环中调用。
+
+        Returns:
+            是否成功放入队列，队列已满或写入器已停止时返回 False
+        """
+        if self._closing:
+            self._drop()
+            return False
+        if self._task is None:
+            self.start()
+
+        fields.setdefault("processed_at", datetime.utcnow())
+        try:
+            self._queue.put_nowait(fields)
+        except asyncio.QueueFull:
+            self._drop()
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def _drop(self) -> None:
+        self.stats["dropped"] += 1
+        if self.stats["dropped"] % DROP_WARNING_EVERY == 1:
+            logger.warning(f"消息日志队列已满或写入器已停止，已丢弃 {self.stats['dropped']} 条日志")
+
+    def start(self) -> None:
+        """在当前事件循环中启动后台写入任务"""
+        if self._task is not None:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="message-log-writer")
+
+    async def stop(self, timeout: float = 10) -> None:
+        """停止写入器，等待队列中剩余的日志写入数据库"""
+        if self._task is None:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"消息日志写入超时，{self._queue.qsize()} 条日志未写入")
+        finally:
+            self._task = None
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        """取出下一批日志：凑满 batch_size 条，或从第一条开始最多等待 flush_interval 秒"""
+        batch = []
+        if self._closing:
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            return batch
+
+        loop = asyncio.get_running_loop()
+        try:
+            # 空闲时定期醒来检查是否需要停止
+            batch.append(await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval))
+        except asyncio.TimeoutError:
+            return batch
+
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size and not self._closing:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await run_db(_insert_message_logs, batch)
+            self.stats["written"] += len(batch)
+        except Exception as e:
+            # 写入失败的日志直接丢弃，避免失败的批次在队列中堆积
+            self.stats["failed"] += len(batch)
+            logger.warning(f"批量写入 {len(batch)} 条消息日志失败: {str(e)}")
+
+    async def _run(self) -> None:
+        while not (self._closing and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+# 导入 app 模块以记录写入统计
+try:
+    from app import bot_status
+    _stats = bot_status.setdefault("message_log", {})
+except ImportError:
+    # 如果导入失败，统计只保存在写入器中
+    _stats = None
+
+# 全局消息日志写入器
+message_log_writer = MessageLogWriter(stats=_stats)
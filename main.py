@@ -1,6 +1,7 @@
 import logging
 import os
 import threading
+from telegram import Update
 from bot import create_bot
 from app import app, bot_status
 from datetime import datetime
@@ -27,7 +28,7 @@ def start_bot():
     # 创建并启动机器人
     logger.info("开始启动好旺公群机器人...")
     bot = create_bot(token)
-    bot.run_polling()
+    bot.run_polling(allowed_updates=Update.ALL_TYPES)
     
     # 保持机器人运行
     bot.idle()
@@ -55,7 +56,7 @@ def main():
         
         # 创建并启动机器人
         bot = create_bot(token)
-        bot.run_polling()
+        bot.run_polling(allowed_updates=Update.ALL_TYPES)
         
         # 保持机器人运行
         bot.idle()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+消息统计汇总脚本
+把原始消息日志按小时汇总到 message_stats 表（按群组、聊天类型、触发关键词和是否管理员分组），
+统计查询只读汇总表。每次汇总都会重新汇总最近 MESSAGE_STATS_ROLLUP_LOOKBACK_HOURS 个小时，
+计入已汇总之后才写入的日志；早于这段时间的原始日志在超过保留期后由 migrate_message_log.py 的维护任务删除。
+机器人运行时每小时自动汇总一次，也可以手动运行。
+
+运行方式：
+    python message_stats.py
+"""
+
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app import app, db
+from models import MessageLog, MessageStats
+from config import MESSAGE_STATS_ROLLUP_LOOKBACK_HOURS
+
+logger = logging.getLogger(__name__)
+
+# 只汇总结束时间早于当前时间减去该延迟的小时，留出时间让后台写入的日志入库
+ROLLUP_DELAY = timedelta(minutes=5)
+HOUR = timedelta(hours=1)
+# 每次汇总时重新汇总的最近时间段
+ROLLUP_LOOKBACK = timedelta(hours=MESSAGE_STATS_ROLLUP_LOOKBACK_HOURS)
+
+def _hour_start(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def rolled_up_until():
+    """返回已汇总到的时间（不含），还没有汇总过时返回 None"""
+    last_hour = db.session.query(func.max(MessageStats.hour)).scalar()
+    return last_hour + HOUR if last_hour else None
+
+def settled_until():
+    """
+    返回不会再重新汇总的时间（不含），还没有汇总过时返回 None。
+    早于该时间的原始日志已经计入统计，可以删除；之后的日志在下次汇总时还会重新读取。
+    """
+    rolled_until = rolled_up_until()
+    return rolled_until - ROLLUP_LOOKBACK if rolled_until else None
+
+def _rollup_hour(hour):
+    """重新汇总一个小时的日志（先删除该小时已有的统计，可以重复执行）"""
+    keyword = func.coalesce(MessageLog.trigger_keyword, "")
+    is_admin = func.coalesce(MessageLog.is_admin, False)
+    rows = (
+        db.session.query(
+            MessageLog.chat_id, MessageLog.chat_type, keyword, is_admin,
+            func.count(MessageLog.id), func.coalesce(func.sum(MessageLog.duration_ms), 0)
+        )
+        .filter(MessageLog.processed_at >= hour, MessageLog.processed_at < hour + HOUR)
+        .group_by(MessageLog.chat_id, MessageLog.chat_type, keyword, is_admin)
+        .all()
+    )
+
+    MessageStats.query.filter(MessageStats.hour == hour).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(db.insert(MessageStats), [
+            {
+                "hour": hour,
+                "chat_id": chat_id,
+                "chat_type": chat_type,
+                "trigger_keyword": trigger_keyword,
+                "is_admin": bool(admin),
+                "message_count": count,
+                "total_duration_ms": float(duration or 0)
+            }
+            for chat_id, chat_type, trigger_keyword, admin, count, duration in rows
+        ])
+    db.session.commit()
+    return len(rows)
+
+def rollup_message_stats(now=None):
+    """
+    汇总上次汇总之后所有已结束的小时，并重新汇总之前 ROLLUP_LOOKBACK 内的小时，
+    计入在所属小时汇总之后才写入的日志。每个小时单独提交，中断后下次从中断处继续。
+    需要在应用上下文中调用。
+
+    Returns:
+        汇总的小时数
+    """
+    limit = _hour_start((now or datetime.utcnow()) - ROLLUP_DELAY)
+    hour = settled_until()
+    if hour is None:
+        hour = datetime.min
+
+    hours = 0
+    while hour < limit:
+        # 跳过没有日志的小时
+        next_log = (
+            db.session.query(func.min(MessageLog.processed_at))
+            .filter(MessageLog.processed_at >= hour, MessageLog.processed_at < limit)
+            .scalar()
+        )
+        if next_log is None:
+            break
+        hour = _hour_start(next_log)
+        _rollup_hour(hour)
+        hours += 1
+        hour += HOUR
+
+    if hours:
+        logger.info(f"消息统计汇总完成，共汇总 {hours} 个小时")
+    return hours
+
+def count_messages(since, chat_id=None):
+    """统计 since 之后（按小时）的消息数，可以只统计某个群组"""
+    query = db.session.query(func.coalesce(func.sum(MessageStats.message_count), 0)).filter(
+        MessageStats.hour >= _hour_start(since)
+    )
+    if chat_id is not None:
+        query = query.filter(MessageStats.chat_id == chat_id)
+    return int(query.scalar())
+
+def top_keywords(since, chat_id=None, limit=5):
+    """返回 since 之后触发次数最多的关键词 [(关键词, 次数)]"""
+    total = func.sum(MessageStats.message_count)
+    query = (
+        db.session.query(MessageStats.trigger_keyword, total)
+        .filter(MessageStats.hour >= _hour_start(since), MessageStats.trigger_keyword != "")
+    )
+    if chat_id is not None:
+        query = query.filter(MessageStats.chat_id == chat_id)
+    return [(keyword, int(count)) for keyword, count in query.group_by(MessageStats.trigger_keyword).order_by(total.desc()).limit(limit)]
+
+if __name__ == "__main__":
+    # 配置日志
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("开始汇总消息统计...")
+    with app.app_context():
+        rollup_message_stats()
+    logger.info("消息统计汇总完成!")
@@ -0,0 +1,221 @@
+"""
+运行指标
+提供按线程分片的计数器和直方图：机器人线程和数据库线程池写入时各写各的分片，互不竞争，
+Flask 读取时再合并。指标注册到全局的 registry 后由 /metrics 接口统一输出为 Prometheus 文本格式。
+"""
+
+import bisect
+import itertools
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# 处理器耗时直方图的默认分桶上限（秒）
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _ThreadShards:
+    """
+    按线程分片的计数存储：每个线程只写自己的分片，写入时不需要加锁；
+    读取时复制并合并所有分片。线程结束后它的分片仍然保留，计数不会丢失
+    （机器人只有事件循环线程和固定大小的数据库线程池，分片数量有限）。
+    """
+
+    def __init__(self, factory: Callable[[], dict]):
+        self._factory = factory
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def local(self) -> dict:
+        """返回当前线程的分片，第一次调用时创建"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def copies(self) -> List[dict]:
+        """
+        返回所有分片的副本（dict.copy 在持有 GIL 时一次完成，不会读到写了一半的分片）。
+        副本是浅复制，分片中的值必须是不可变对象，写入时整体替换而不是原地修改。
+        """
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+class Counter:
+    """
+    按标签分组的计数器，写入只修改当前线程的分片。
+
+    inc 按 labelnames 的顺序传入标签值，例如 Counter(("handler",)).inc("auto_reply")。
+    """
+
+    def __init__(self, labelnames: Sequence[str] = (), known: Iterable[Tuple[str, ...]] = ()):
+        """
+        Args:
+            labelnames: 标签名称
+            known: 预先出现的标签值组合，没有计数时也以 0 显示
+        """
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._known = [tuple(values) for values in known] or ([()] if not self.labelnames else [])
+        self._shards = _ThreadShards(dict)
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """增加计数"""
+        shard = self._shards.local()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """合并所有线程的分片，返回 {标签值: 计数}"""
+        totals: Dict[Tuple[str, ...], float] = dict.fromkeys(self._known, 0)
+        for shard in self._shards.copies():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def by_label(self) -> Dict[str, float]:
+        """单个标签的计数器返回 {标签值: 计数}"""
+        return {key[0]: value for key, value in self.values().items()}
+
+    def total(self) -> float:
+        """所有标签的计数之和"""
+        return sum(self.values().values())
+
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        return [(dict(zip(self.labelnames, key)), value) for key, value in self.values().items()]
+
+class Histogram:
+    """
+    按标签分组的累计直方图，记录观测值落在各个分桶中的次数、总和与总次数。
+    与 Counter 一样按线程分片，observe 不需要加锁。
+    """
+
+    def __init__(self, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Args:
+            labelnames: 标签名称
+            buckets: 递增的分桶上限，最后自动追加 +Inf
+        """
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        # 每个标签值对应 (各分桶次数..., 观测值总和)；元组不可变，每次写入整体替换，
+        # 这样分片的浅复制读到的每一项都是某次写入完成后的状态，分桶次数与总和一致
+        self._shards = _ThreadShards(dict)
+        self._empty = (0,) * len(self.buckets) + (0.0,)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """记录一个观测值"""
+        index = bisect.bisect_left(self.buckets, value)
+        shard = self._shards.local()
+        entry = shard.get(label_values, self._empty)
+        shard[label_values] = entry[:index] + (entry[index] + 1,) + entry[index + 1:-1] + (entry[-1] + value,)
+
+    def snapshots(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        """
+        合并所有线程的分片。
+
+        Returns:
+            {标签值: (各分桶的累计次数, 观测值总和, 总次数)}
+        """
+        merged: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._shards.copies():
+            for key, entry in shard.items():
+                entry = list(entry)
+                total = merged.get(key)
+                if total is None:
+                    merged[key] = entry
+                else:
+                    for index, value in enumerate(entry):
+                        total[index] += value
+
+        result = {}
+        for key, entry in merged.items():
+            cumulative = list(itertools.accumulate(entry[:-1]))
+            result[key] = (cumulative, entry[-1], cumulative[-1])
+        return result
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_metric(name: str, metric_type: str, help_text: str,
+                  samples: Iterable[Tuple[Optional[Dict[str, str]], float]]) -> str:
+    """
+    生成一个指标的 Prometheus 文本。
+
+    Args:
+        name: 指标名称
+        metric_type: counter、gauge 等
+        help_text: 指标说明
+        samples: [(标签, 数值)]
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+def render_histogram(name: str, help_text: str, histogram: Histogram) -> str:
+    """
+    生成直方图指标的 Prometheus 文本（_bucket、_sum、_count），每个标签值一组。
+
+    Args:
+        name: 指标名称
+        help_text: 指标说明
+        histogram: 直方图
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, (cumulative, total_sum, count) in histogram.snapshots().items():
+        labels = dict(zip(histogram.labelnames, key))
+        for upper, bucket_count in zip(histogram.buckets, cumulative):
+            bucket_labels = {**labels, "le": _format_value(upper)}
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {bucket_count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total_sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+class MetricsRegistry:
+    """指标注册表，按注册顺序输出所有指标"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Tuple[str, Union[Counter, Histogram]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, help_text: str, metric):
+        """
+        注册指标并原样返回，同一名称只能注册一次
+
+        Args:
+            name: 指标名称，计数器以 _total 结尾
+            help_text: 指标说明
+            metric: Counter 或 Histogram
+        """
+        with self._lock:
+            if name in self._metrics:
+                raise ValueError(f"指标已注册: {name}")
+            self._metrics[name] = (help_text, metric)
+        return metric
+
+    def render(self) -> str:
+        """合并各线程的分片，生成所有已注册指标的 Prometheus 文本"""
+        with self._lock:
+            metrics = list(self._metrics.items())
+        parts = []
+        for name, (help_text, metric) in metrics:
+            if isinstance(metric, Histogram):
+                parts.append(render_histogram(name, help_text, metric))
+            else:
+                parts.append(render_metric(name, "counter", help_text, metric.samples()))
+        return "".join(parts)
+
+# 全局指标注册表
+registry = MetricsRegistry()
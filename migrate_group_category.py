@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+群组分类迁移脚本
+为 group 表添加 category 列，并根据 GROUP_CATEGORY_RULES 计算所有群组的分类。
+修改分类规则后重新运行本脚本即可重新计算。
+
+运行方式：
+    python migrate_group_category.py            # 重新计算所有群组的分类
+    python migrate_group_category.py --missing  # 只计算还没有分类的群组
+"""
+
+import sys
+import logging
+from sqlalchemy import inspect, text
+from app import app, db
+from models import Group
+from utils.group_category import classify_group
+
+logger = logging.getLogger(__name__)
+
+# 每批更新的群组数量
+BATCH_SIZE = 500
+
+def ensure_category_column():
+    """group 表没有 category 列时添加该列（db.create_all 不会修改已存在的表）"""
+    columns = {column["name"] for column in inspect(db.engine).get_columns(Group.__tablename__)}
+    if "category" in columns:
+        return False
+    with db.engine.begin() as connection:
+        connection.execute(text(f'ALTER TABLE "{Group.__tablename__}" ADD COLUMN category VARCHAR(20)'))
+    logger.info("已为群组表添加 category 列")
+    return True
+
+def backfill_group_categories(only_missing=False):
+    """
+    计算并保存群组分类。
+
+    Args:
+        only_missing: 为 True 时只处理还没有分类的群组
+
+    Returns:
+        分类发生变化的群组数量
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        query = Group.query.filter(Group.id > last_id)
+        if only_missing:
+            query = query.filter(Group.category.is_(None))
+        groups = query.order_by(Group.id).limit(BATCH_SIZE).all()
+        if not groups:
+            break
+
+        for group in groups:
+            category = classify_group(group.description)
+            if group.category != category:
+                group.category = category
+                updated += 1
+        db.session.commit()
+        last_id = groups[-1].id
+    return updated
+
+def migrate(only_missing=False):
+    """添加 category 列并回填群组分类"""
+    with app.app_context():
+        added = ensure_category_column()
+        # 新添加的列全部为空，只需处理缺失的分类
+        updated = backfill_group_categories(only_missing=only_missing or added)
+        logger.info(f"已更新 {updated} 个群组的分类")
+        return updated
+
+if __name__ == "__main__":
+    # 配置日志
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("开始迁移群组分类...")
+    migrate(only_missing="--missing" in sys.argv)
+    logger.info("群组分类迁移完成!")
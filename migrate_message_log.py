@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+消息日志表迁移和维护脚本
+1. 为 message_log 表补充缺少的列和索引（db.create_all 不会修改已存在的表）；
+2. PostgreSQL 上把 message_log 转换为按 processed_at 按月分区的表，另有一个默认分区，
+   接收还没有对应月分区的日志，维护任务没有及时创建分区时写入也不会失败；
+3. 维护：提前创建之后几个月的分区，并删除超过保留期且已汇总到 message_stats 的日志
+   （分区表直接删除过期分区，其他数据库分批删除过期的行）。
+应用启动时会自动补充列和索引并提前创建分区，机器人运行时会定期执行维护。
+
+运行方式：
+    python migrate_message_log.py              # 补充列和索引
+    python migrate_message_log.py --partition  # PostgreSQL：转换为分区表（会复制全部日志，请在低峰期执行）
+    python migrate_message_log.py --maintain   # 创建分区并清理过期日志
+"""
+
+import re
+import sys
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, text
+from app import app, db
+from models import MessageLog
+from message_stats import settled_until
+from config import MESSAGE_LOG_RETENTION_DAYS, MESSAGE_LOG_PARTITION_MONTHS_AHEAD
+
+logger = logging.getLogger(__name__)
+
+# 需要补充的列 {列名: 列定义}
+MESSAGE_LOG_COLUMNS = {
+    "handler_name": "VARCHAR(50)",
+    "duration_ms": "FLOAT",
+}
+
+# 非分区表分批删除过期日志时每批的行数
+PURGE_BATCH_SIZE = 5000
+
+TABLE_NAME = MessageLog.__tablename__
+# 月分区命名：message_log_p202401
+PARTITION_NAME_PATTERN = re.compile(rf"^{TABLE_NAME}_p(\d{{4}})(\d{{2}})$")
+# 默认分区，接收没有对应月分区的日志
+DEFAULT_PARTITION = f"{TABLE_NAME}_default"
+
+def ensure_message_log_columns():
+    """添加 message_log 表缺少的列，返回添加的列名列表"""
+    existing = {column["name"] for column in inspect(db.engine).get_columns(TABLE_NAME)}
+    missing = [name for name in MESSAGE_LOG_COLUMNS if name not in existing]
+    if missing:
+        with db.engine.begin() as connection:
+            for name in missing:
+                connection.execute(text(f'ALTER TABLE "{TABLE_NAME}" ADD COLUMN {name} {MESSAGE_LOG_COLUMNS[name]}'))
+        logger.info(f"已为消息日志表添加列: {', '.join(missing)}")
+    return missing
+
+def ensure_message_log_indexes():
+    """创建模型中定义但数据库中还不存在的索引（分区表上创建的索引会自动应用到所有分区）"""
+    with db.engine.begin() as connection:
+        for index in MessageLog.__table__.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+# ---- PostgreSQL 分区 ----
+
+def _is_postgresql():
+    return db.engine.dialect.name == "postgresql"
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1)
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def _partition_name(month):
+    return f"{TABLE_NAME}_p{month.year:04d}{month.month:02d}"
+
+def is_partitioned(connection):
+    """message_log 是否已经是分区表"""
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND relkind IN ('r', 'p')"),
+        {"name": TABLE_NAME}
+    ).scalar()
+    return relkind == "p"
+
+def _create_default_partition(connection):
+    connection.execute(text(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{TABLE_NAME}" DEFAULT'))
+
+def _create_partition(connection, month):
+    """
+    创建一个月分区。默认分区中已有该月的日志时，创建分区会因为违反默认分区的约束而失败，
+    因此先把这些日志移到临时表，创建分区后再写回（会写入新分区）。
+    """
+    name = _partition_name(month)
+    if connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar():
+        return
+
+    bounds = {"start": month, "end": _add_months(month, 1)}
+    in_month = "processed_at >= :start AND processed_at < :end"
+    moved_table = f"{TABLE_NAME}_moved"
+    moved = connection.execute(
+        text(f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_month})'), bounds
+    ).scalar()
+    if moved:
+        connection.execute(text(f'CREATE TEMPORARY TABLE "{moved_table}" (LIKE "{TABLE_NAME}")'))
+        connection.execute(text(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_month} RETURNING *) '
+            f'INSERT INTO "{moved_table}" SELECT * FROM moved'
+        ), bounds)
+
+    connection.execute(text(
+        f'CREATE TABLE "{name}" PARTITION OF "{TABLE_NAME}" '
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+    ))
+
+    if moved:
+        count = connection.execute(text(f'INSERT INTO "{TABLE_NAME}" SELECT * FROM "{moved_table}"')).rowcount
+        connection.execute(text(f'DROP TABLE "{moved_table}"'))
+        logger.info(f"已把默认分区中的 {count} 条日志移到分区 {name}")
+
+def ensure_partitions(connection, months_ahead=MESSAGE_LOG_PARTITION_MONTHS_AHEAD, since=None):
+    """创建默认分区，以及从 since（默认本月）到之后 months_ahead 个月的分区"""
+    _create_default_partition(connection)
+    month = _month_start(since or datetime.utcnow())
+    last = _add_months(_month_start(datetime.utcnow()), months_ahead)
+    while month <= last:
+        _create_partition(connection, month)
+        month = _add_months(month, 1)
+
+def partition_message_log():
+    """
+    把普通的 message_log 表转换为按月分区的表，已有日志会复制到对应的分区中。
+
+    Returns:
+        是否执行了转换
+    """
+    if not _is_postgresql():
+        logger.info("当前数据库不是 PostgreSQL，不支持分区")
+        return False
+
+    old_table = f"{TABLE_NAME}_unpartitioned"
+    columns = ", ".join(f'"{column.name}"' for column in MessageLog.__table__.columns)
+    # DDL 在 PostgreSQL 中是事务性的，转换失败时整体回滚
+    with db.engine.begin() as connection:
+        if is_partitioned(connection):
+            logger.info("消息日志表已经是分区表")
+            return False
+
+        connection.execute(text(f'ALTER TABLE "{TABLE_NAME}" RENAME TO "{old_table}"'))
+        connection.execute(text(f'ALTER TABLE "{old_table}" RENAME CONSTRAINT "{TABLE_NAME}_pkey" TO "{old_table}_pkey"'))
+        for index in MessageLog.__table__.indexes:
+            connection.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+
+        # 分区表的主键必须包含分区键；id 仍然由原来的序列生成
+        connection.execute(text(
+            f'CREATE TABLE "{TABLE_NAME}" (LIKE "{old_table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f"PARTITION BY RANGE (processed_at)"
+        ))
+        connection.execute(text(f'UPDATE "{old_table}" SET processed_at = NOW() WHERE processed_at IS NULL'))
+        connection.execute(text(f'ALTER TABLE "{TABLE_NAME}" ADD PRIMARY KEY (id, processed_at)'))
+
+        oldest = connection.execute(text(f'SELECT MIN(processed_at) FROM "{old_table}"')).scalar()
+        ensure_partitions(connection, since=oldest)
+        connection.execute(text(
+            f'INSERT INTO "{TABLE_NAME}" ({columns}) SELECT {columns} FROM "{old_table}"'
+        ))
+
+        sequence = connection.execute(text(f"SELECT pg_get_serial_sequence('{old_table}', 'id')")).scalar()
+        if sequence:
+            connection.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE_NAME}".id'))
+        connection.execute(text(f'DROP TABLE "{old_table}"'))
+
+        for index in MessageLog.__table__.indexes:
+            index.create(bind=connection)
+
+    logger.info("消息日志表已转换为按月分区的表")
+    return True
+
+def drop_expired_partitions(connection, cutoff):
+    """删除所有日志都早于 cutoff 的月分区，返回删除的分区名列表。默认分区中的过期日志由 purge_default_partition 删除"""
+    partitions = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :name"
+    ), {"name": TABLE_NAME}).scalars().all()
+
+    dropped = []
+    for name in partitions:
+        match = PARTITION_NAME_PATTERN.match(name)
+        if not match:
+            continue
+        month = datetime(int(match.group(1)), int(match.group(2)), 1)
+        if _add_months(month, 1) <= cutoff:
+            connection.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    return dropped
+
+def purge_default_partition(connection, cutoff):
+    """删除默认分区中早于 cutoff 的日志（只有分区没有及时创建时才会有日志写入默认分区），返回删除的行数"""
+    return connection.execute(
+        text(f'DELETE FROM "{DEFAULT_PARTITION}" WHERE processed_at < :cutoff'), {"cutoff": cutoff}
+    ).rowcount
+
+# ---- 维护 ----
+
+def purge_expired_rows(cutoff, batch_size=PURGE_BATCH_SIZE):
+    """分批删除早于 cutoff 的日志，每批单独提交以避免长事务，返回删除的行数"""
+    deleted = 0
+    while True:
+        expired_ids = db.session.query(MessageLog.id).filter(MessageLog.processed_at < cutoff).limit(batch_size)
+        count = MessageLog.query.filter(MessageLog.id.in_(expired_ids.scalar_subquery())).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+def maintain_message_log(retention_days=MESSAGE_LOG_RETENTION_DAYS):
+    """
+    消息日志维护：提前创建分区，删除超过保留期的日志。需要在应用上下文中调用。
+    还没有汇总到 message_stats、或者还会重新汇总的日志不会被删除。
+
+    Returns:
+        {"partitions_dropped": [...], "rows_deleted": 删除的行数}
+    """
+    result = {"partitions_dropped": [], "rows_deleted": 0}
+    cutoff = datetime.utcnow() - timedelta(days=retention_days) if retention_days > 0 else None
+    if cutoff:
+        settled = settled_until()
+        cutoff = min(cutoff, settled) if settled else None
+
+    partitioned = False
+    if _is_postgresql():
+        with db.engine.begin() as connection:
+            partitioned = is_partitioned(connection)
+            if partitioned:
+                ensure_partitions(connection)
+                if cutoff:
+                    result["partitions_dropped"] = drop_expired_partitions(connection, cutoff)
+                    result["rows_deleted"] = purge_default_partition(connection, cutoff)
+
+    # 分区按月删除，不足一个月的过期日志保留在分区中，等整个分区过期后再删除
+    if cutoff and not partitioned:
+        result["rows_deleted"] = purge_expired_rows(cutoff)
+
+    if result["partitions_dropped"] or result["rows_deleted"]:
+        logger.info(
+            f"消息日志维护完成 | 删除分区: {', '.join(result['partitions_dropped']) or '无'} | "
+            f"删除日志: {result['rows_deleted']} 条"
+        )
+    return result
+
+def upgrade_message_log():
+    """
+    应用启动时执行：补充列和索引。
+    PostgreSQL 上如果消息日志表已经是分区表，创建默认分区和之后几个月的分区；
+    如果还是空的普通表，直接转换为分区表（不需要复制数据）。
+    """
+    ensure_message_log_columns()
+    ensure_message_log_indexes()
+    if not _is_postgresql():
+        return
+    with db.engine.begin() as connection:
+        if is_partitioned(connection):
+            ensure_partitions(connection)
+            return
+        empty = connection.execute(text(f'SELECT NOT EXISTS (SELECT 1 FROM "{TABLE_NAME}")')).scalar()
+    if empty:
+        partition_message_log()
+    else:
+        logger.info("消息日志表尚未分区，可以在低峰期运行 python migrate_message_log.py --partition")
+
+def migrate():
+    """执行消息日志表迁移"""
+    with app.app_context():
+        ensure_message_log_columns()
+        ensure_message_log_indexes()
+        if "--partition" in sys.argv:
+            partition_message_log()
+        if "--maintain" in sys.argv:
+            maintain_message_log()
+
+if __name__ == "__main__":
+    # 配置日志
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("开始迁移消息日志表...")
+    migrate()
+    logger.info("消息日志表迁移完成!")
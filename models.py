@@ -1,7 +1,36 @@
+import logging
+import threading
+from collections import defaultdict
 from datetime import datetime
+from sqlalchemy import DateTime, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
 # 从 app.py 导入 db 对象
 from app import db
 
+class db_utcnow(FunctionElement):
+    """
+    数据库服务器的当前 UTC 时间。
+    用作 updated_at 的默认值时，所有进程写入的时间都来自数据库的时钟，
+    其他进程按 updated_at 增量同步时不会因为某个写入进程的时钟偏慢而漏掉它的修改。
+    """
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(db_utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    # SQLite 的 CURRENT_TIMESTAMP 就是 UTC 时间
+    return "CURRENT_TIMESTAMP"
+
+@compiles(db_utcnow, "postgresql")
+def _compile_utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+@compiles(db_utcnow, "mysql")
+def _compile_utcnow_mysql(element, compiler, **kw):
+    return "UTC_TIMESTAMP()"
+
 class Group(db.Model):
     """群组信息模型"""
     id = db.Column(db.Integer, primary_key=True)
@@ -9,8 +38,10 @@ class Group(db.Model):
     name = db.Column(db.String(100), nullable=False)
     link = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
+    category = db.Column(db.String(20), nullable=True)  # 群组分类，写入时由 classify_group 根据描述计算
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 使用数据库时间，搜索索引按该列增量同步其他进程的修改
+    updated_at = db.Column(db.DateTime, default=db_utcnow(), onupdate=db_utcnow())
     
     # 与关键词的关系
     keywords = db.relationship('Keyword', secondary='group_keyword', back_populates='groups')
@@ -26,6 +57,7 @@ class Group(db.Model):
             'name': self.name,
             'link': self.link,
             'description': self.description,
+            'category': self.category,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'keywords': [kw.word for kw in self.keywords]
@@ -101,6 +133,14 @@ class Channel(db.Model):
 
 class MessageLog(db.Model):
     """消息日志模型"""
+    # 与实际查询对应的索引：按时间倒序浏览，按群组、用户、触发关键词统计某段时间内的消息
+    __table_args__ = (
+        db.Index("ix_message_log_processed_at", "processed_at"),
+        db.Index("ix_message_log_chat_processed", "chat_id", "processed_at"),
+        db.Index("ix_message_log_user_processed", "user_id", "processed_at"),
+        db.Index("ix_message_log_keyword_processed", "trigger_keyword", "processed_at"),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     chat_id = db.Column(db.BigInteger, nullable=False)
     chat_type = db.Column(db.String(20), nullable=False)
@@ -110,6 +150,8 @@ class MessageLog(db.Model):
     message_text = db.Column(db.Text, nullable=True)
     trigger_keyword = db.Column(db.String(50), nullable=True)
     is_admin = db.Column(db.Boolean, default=False)
+    handler_name = db.Column(db.String(50), nullable=True)  # 处理该更新的处理器
+    duration_ms = db.Column(db.Float, nullable=True)  # 处理耗时（毫秒）
     processed_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -127,9 +169,43 @@ class MessageLog(db.Model):
             'message_text': self.message_text,
             'trigger_keyword': self.trigger_keyword,
             'is_admin': self.is_admin,
+            'handler_name': self.handler_name,
+            'duration_ms': self.duration_ms,
             'processed_at': self.processed_at.isoformat() if self.processed_at else None
         }
 
+class MessageStats(db.Model):
+    """消息统计模型 - 消息日志按小时、群组、聊天类型、触发关键词和是否管理员汇总"""
+    __table_args__ = (
+        db.UniqueConstraint("hour", "chat_id", "chat_type", "trigger_keyword", "is_admin", name="uq_message_stats_bucket"),
+        db.Index("ix_message_stats_chat_hour", "chat_id", "hour"),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, nullable=False)  # 统计小时的开始时间（UTC）
+    chat_id = db.Column(db.BigInteger, nullable=False)
+    chat_type = db.Column(db.String(20), nullable=False)
+    trigger_keyword = db.Column(db.String(50), nullable=False, default="")  # 没有触发关键词时为空字符串
+    is_admin = db.Column(db.Boolean, nullable=False, default=False)
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    total_duration_ms = db.Column(db.Float, nullable=False, default=0)  # 处理耗时之和（毫秒）
+
+    def __repr__(self):
+        return f'<MessageStats {self.hour} {self.chat_id}: {self.message_count}>'
+    
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'hour': self.hour.isoformat() if self.hour else None,
+            'chat_id': self.chat_id,
+            'chat_type': self.chat_type,
+            'trigger_keyword': self.trigger_keyword,
+            'is_admin': self.is_admin,
+            'message_count': self.message_count,
+            'total_duration_ms': self.total_duration_ms
+        }
+
 class BotSettings(db.Model):
     """机器人设置模型 - 单例模式"""
     id = db.Column(db.Integer, primary_key=True)
@@ -162,7 +238,8 @@ class PhoneVerification(db.Model):
     is_verified = db.Column(db.Boolean, default=False)
     verification_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 使用数据库时间，各进程按该列增量同步验证记录缓存
+    updated_at = db.Column(db.DateTime, default=db_utcnow(), onupdate=db_utcnow())
 
     def __repr__(self):
         return f'<PhoneVerification {self.id} - {self.phone_number}>'
@@ -180,6 +257,27 @@ class PhoneVerification(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
         
+class VerificationCode(db.Model):
+    """手机验证码模型 - 每个用户只保留最近一次发送的验证码，过期后由定时任务删除"""
+    user_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    code = db.Column(db.String(10), nullable=False)
+    phone_number = db.Column(db.String(20), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # 过期时间（UTC）
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<VerificationCode {self.user_id}: {self.expires_at}>'
+
+class RateLimitBucket(db.Model):
+    """限流令牌桶模型 - 验证码发送和验证尝试按用户、手机号限流，令牌恢复满后由定时任务删除"""
+    key = db.Column(db.String(100), primary_key=True)  # 如 send_user:123、send_phone:+8613800000000
+    tokens = db.Column(db.Float, nullable=False)  # 上次更新时剩余的令牌数
+    updated_at = db.Column(db.Float, nullable=False)  # 上次更新时间（Unix 时间戳，便于在 SQL 中计算恢复的令牌）
+    full_at = db.Column(db.Float, nullable=False, index=True)  # 令牌恢复满的时间（Unix 时间戳）
+
+    def __repr__(self):
+        return f'<RateLimitBucket {self.key}: {self.tokens}>'
+
 class GroupChatSettings(db.Model):
     """群组聊天设置模型 - 用于存储群聊设置，如禁言状态等"""
     id = db.Column(db.Integer, primary_key=True)
@@ -191,7 +289,8 @@ class GroupChatSettings(db.Model):
     unmuted_at = db.Column(db.DateTime, nullable=True)  # 解除禁言时间
     unmuted_by = db.Column(db.BigInteger, nullable=True)  # 解除禁言操作执行者ID
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 使用数据库时间，各进程按该列增量同步禁言状态
+    updated_at = db.Column(db.DateTime, default=db_utcnow(), onupdate=db_utcnow())
     
     def __repr__(self):
         mute_status = "已禁言" if self.is_muted else "正常"
@@ -210,4 +309,75 @@ class GroupChatSettings(db.Model):
             "unmuted_by": self.unmuted_by,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+# 数据变更跟踪 - 事务提交后递增被修改表的版本号，并通知注册的监听函数，供进程内缓存判断是否需要重建
+_data_versions = defaultdict(int)
+_data_versions_lock = threading.Lock()
+_change_listeners = defaultdict(list)
+
+def get_data_version(table_name):
+    """获取指定表当前的数据版本号"""
+    return _data_versions[table_name]
+
+def on_data_change(table_name, listener):
+    """
+    注册数据变更监听函数，包含该表变更的事务提交后调用。
+    
+    Args:
+        table_name: 表名
+        listener: 监听函数 listener(changed_ids, deleted_ids)，参数为被新增/修改和被删除的行ID集合；
+                  批量更新无法得知具体的行，此时 changed_ids 为 None
+    """
+    _change_listeners[table_name].append(listener)
+
+def _changes(session):
+    return session.info.setdefault("data_changes", {})
+
+def _mark_changed(session, table_name, row_id=None, deleted=False):
+    changed_ids, deleted_ids = _changes(session).setdefault(table_name, (set(), set()))
+    if row_id is None:
+        # 批量操作，无法确定具体的行
+        changed_ids.add(None)
+    elif deleted:
+        deleted_ids.add(row_id)
+    else:
+        changed_ids.add(row_id)
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_changes(session, flush_context):
+    """记录本次 flush 中新增、修改或删除的行"""
+    for objects, deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            table_name = getattr(obj, "__tablename__", None)
+            if table_name:
+                _mark_changed(session, table_name, getattr(obj, "id", None), deleted)
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_changes(orm_execute_state):
+    """记录 query.update() / query.delete() 和 insert() 语句（包括 upsert）等批量操作修改的表"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert) and orm_execute_state.bind_mapper:
+        _mark_changed(orm_execute_state.session, orm_execute_state.bind_mapper.class_.__tablename__)
+
+@event.listens_for(Session, "after_commit")
+def _publish_data_changes(session):
+    """事务提交后递增被修改表的版本号并通知监听函数"""
+    changes = session.info.pop("data_changes", None)
+    if not changes:
+        return
+    with _data_versions_lock:
+        for table_name in changes:
+            _data_versions[table_name] += 1
+    for table_name, (changed_ids, deleted_ids) in changes.items():
+        if None in changed_ids:
+            changed_ids = None
+        for listener in _change_listeners.get(table_name, ()):
+            try:
+                listener(changed_ids, deleted_ids)
+            except Exception as e:
+                logging.warning(f"数据变更监听函数执行失败 ({table_name}): {str(e)}")
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_tracked_changes(session, previous_transaction):
+    """事务回滚后丢弃记录的变更"""
+    session.info.pop("data_changes", None)
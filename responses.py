@@ -56,58 +56,113 @@ KEYWORD_RESPONSES = {
     "笑话": "抱歉，我不会讲笑话，但你可以在群里分享有趣的事情！"
 }
 
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 import logging
+from utils.cache import VersionedSnapshot, cache_event_counter
+from utils.keyword_matcher import KeywordMatcher
+from bot.data_access import run_db
 
 # 导入配置中的额外关键词回复
 try:
-    from config import ADDITIONAL_KEYWORD_RESPONSES
+    from config import ADDITIONAL_KEYWORD_RESPONSES, KEYWORD_CACHE_TTL
 except ImportError:
     logging.warning("Could not import ADDITIONAL_KEYWORD_RESPONSES from config.py")
     ADDITIONAL_KEYWORD_RESPONSES = {}
+    KEYWORD_CACHE_TTL = 300
+
+# 导入 app 模块以记录缓存统计
+try:
+    from app import bot_status
+except ImportError:
+    bot_status = {}
 
 # 合并基础关键词和配置文件中的额外关键词
 ALL_KEYWORD_RESPONSES: Dict[str, str] = {**KEYWORD_RESPONSES, **ADDITIONAL_KEYWORD_RESPONSES}
 
-def get_response_for_keyword(message_text: str) -> Optional[str]:
+def build_keyword_matcher(db_items: List[Tuple[str, str]]) -> KeywordMatcher:
     """
-    检查消息是否包含任何关键词并返回相应的回复。
+    将数据库关键词和配置文件关键词编译为一个匹配器。
+    数据库关键词排在前面，因此优先级高于配置文件中的关键词。
+    
+    Args:
+        db_items: 数据库中活跃的 (关键词, 回复) 列表。
+        
+    Returns:
+        编译好的关键词匹配器。
+    """
+    return KeywordMatcher(list(db_items) + list(ALL_KEYWORD_RESPONSES.items()))
+
+# 仅包含配置文件关键词的匹配器，数据库不可用时使用
+_config_matcher = build_keyword_matcher([])
+
+def _load_keyword_matcher() -> KeywordMatcher:
+    """从数据库加载活跃的关键词回复并编译匹配器"""
+    from app import app
+    with app.app_context():
+        from models import KeywordResponse
+        
+        # 获取所有活跃的关键词响应
+        keyword_responses = KeywordResponse.query.filter_by(is_active=True).all()
+        db_items = [(kr.keyword, kr.response) for kr in keyword_responses]
+    
+    matcher = build_keyword_matcher(db_items)
+    logging.info(f"关键词匹配器已重新编译，共 {len(matcher)} 个关键词")
+    return matcher
+
+def _keyword_response_version() -> int:
+    """关键词回复表的数据版本号"""
+    from models import KeywordResponse, get_data_version
+    return get_data_version(KeywordResponse.__tablename__)
+
+# 活跃关键词回复的进程内快照，只在 KeywordResponse 发生变更或超过 TTL 时重建
+keyword_cache = VersionedSnapshot(
+    _load_keyword_matcher,
+    _keyword_response_version,
+    ttl=KEYWORD_CACHE_TTL,
+    stats=bot_status.setdefault("keyword_cache", cache_event_counter("hits", "misses", "rebuilds")),
+    name="关键词回复"
+)
+
+async def find_keyword_response(message_text: str) -> Optional[Tuple[str, str]]:
+    """
+    查找消息中优先级最高的关键词及其回复。
     优先从数据库中获取关键词回复，如果没有找到或者数据库访问出错，则使用配置文件中的关键词。
+    所有关键词被编译为一个 Aho-Corasick 自动机并缓存在进程内，匹配只需扫描一遍消息文本。
+    匹配器有效时不访问数据库；需要重建时在数据库线程池中查询和编译，不阻塞事件循环。
     
     Args:
         message_text: 要检查关键词的文本消息。
         
     Returns:
-        找到的第一个关键词的回复，如果没有找到关键词则返回 None。
+        (关键词, 回复)，如果没有找到关键词则返回 None。
     """
     if not message_text:
         return None
-        
-    message_lower = message_text.lower()
     
-    # 尝试从数据库中获取关键词回复
+    fresh, matcher = keyword_cache.peek()
     try:
-        # 导入数据库模型
-        from app import app
-        with app.app_context():
-            from models import KeywordResponse
-            
-            # 获取所有活跃的关键词响应
-            keyword_responses = KeywordResponse.query.filter_by(is_active=True).all()
-            
-            # 优先检查是否包含任何数据库中的关键词
-            for kr in keyword_responses:
-                if kr.keyword.lower() in message_lower:
-                    logging.debug(f"从数据库匹配到关键词 '{kr.keyword}'")
-                    return kr.response
+        if not fresh:
+            matcher = await run_db(keyword_cache.get)
     except Exception as e:
         # 如果数据库访问出错，记录错误并回退到配置文件
-        logging.warning(f"数据库关键词查询失败: {str(e)}, 使用配置文件中的关键词")
+        logging.warning(f"数据库关键词查询失败: {str(e) or type(e).__name__}, 使用配置文件中的关键词")
+        matcher = _config_matcher
+    
+    # 数据库关键词优先，其次是配置文件中的关键词
+    found = matcher.find(message_text)
+    if found:
+        logging.debug(f"匹配到关键词 '{found[0]}'")
+    return found
+
+async def get_response_for_keyword(message_text: str) -> Optional[str]:
+    """
+    检查消息是否包含任何关键词并返回相应的回复。
     
-    # 如果没有从数据库匹配到，或者出现异常，使用配置文件中的关键词
-    for keyword, response in ALL_KEYWORD_RESPONSES.items():
-        if keyword.lower() in message_lower:
-            logging.debug(f"从配置文件匹配到关键词 '{keyword}'")
-            return response
-            
-    return None
+    Args:
+        message_text: 要检查关键词的文本消息。
+        
+    Returns:
+        找到的第一个关键词的回复，如果没有找到关键词则返回 None。
+    """
+    found = await find_keyword_response(message_text)
+    return found[1] if found else None
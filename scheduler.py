@@ -0,0 +1,55 @@
+"""
+定时任务
+优先使用 python-telegram-bot 的 JobQueue（需要安装 python-telegram-bot[job-queue]），
+没有安装时在事件循环中用后台任务代替。
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+# JobQueue 不可用时创建的后台任务
+_tasks: List[asyncio.Task] = []
+
+async def _run_safely(callback: Callable[[], Awaitable], name: str) -> None:
+    try:
+        await callback()
+    except Exception as e:
+        logger.warning(f"定时任务 {name} 执行失败: {str(e)}")
+
+async def _repeat(callback: Callable[[], Awaitable], interval: float, first: float, name: str) -> None:
+    await asyncio.sleep(first)
+    while True:
+        await _run_safely(callback, name)
+        await asyncio.sleep(interval)
+
+def run_repeating(application: Application, callback: Callable[[], Awaitable],
+                  interval: float, first: float = 0, name: str = None) -> None:
+    """
+    定期执行异步函数，任务失败只记录警告，不影响下一次执行。必须在事件循环运行后调用（如 post_init）。
+
+    Args:
+        application: 机器人应用
+        callback: 无参数的异步函数
+        interval: 执行间隔（秒）
+        first: 第一次执行前等待的时间（秒）
+        name: 任务名称，用于日志
+    """
+    name = name or getattr(callback, "__name__", "job")
+    if application.job_queue is not None:
+        async def job(context) -> None:
+            await _run_safely(callback, name)
+        application.job_queue.run_repeating(job, interval=interval, first=first, name=name)
+        return
+    _tasks.append(asyncio.get_running_loop().create_task(_repeat(callback, interval, first, name), name=name))
+
+async def stop() -> None:
+    """停止 JobQueue 不可用时创建的后台任务（JobQueue 由 Application 负责停止）"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -1,7 +1,12 @@
 import os
+import asyncio
 import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from config import SMS_PROVIDER, SMS_MAX_CONCURRENCY, SMS_TIMEOUT
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
@@ -12,37 +17,75 @@ TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER")
 
-def send_sms(to_phone_number, message):
+class SMSProvider(ABC):
+    """短信服务商接口，send 返回 {"success": bool, "message": 提示信息, ...}"""
+
+    name = "base"
+
+    @abstractmethod
+    async def send(self, to_phone_number: str, message: str) -> Dict[str, Any]:
+        """发送一条短信"""
+
+    async def close(self) -> None:
+        """释放连接等资源"""
+
+class TwilioSMSProvider(SMSProvider):
     """
-    使用Twilio发送短信
-    
-    Args:
-        to_phone_number (str): 接收短信的电话号码 (格式: +国家代码电话号码，例如 +8613812345678)
-        message (str): 短信内容
-        
-    Returns:
-        dict: 包含发送状态和信息的字典
+    使用 Twilio 发送短信。
+    Twilio 客户端和底层的 aiohttp 连接池在第一次发送时创建，之后所有短信共用，不再每次新建客户端。
     """
-    # 检查是否配置了Twilio密钥
-    if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER]):
-        logger.error("Twilio配置不完整，缺少必要的环境变量")
-        return {
-            "success": False,
-            "message": "短信服务配置不完整，请联系管理员",
-            "error": "缺少Twilio配置"
-        }
-    
-    # 创建Twilio客户端
-    try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        
-        # 发送短信
-        twilio_message = client.messages.create(
-            body=message,
-            from_=TWILIO_PHONE_NUMBER,
-            to=to_phone_number
-        )
-        
+
+    name = "twilio"
+
+    def __init__(self, account_sid: Optional[str], auth_token: Optional[str], from_number: Optional[str]):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._http_client: Optional[AsyncTwilioHttpClient] = None
+        self._client: Optional[Client] = None
+
+    def _get_client(self) -> Client:
+        # aiohttp 的连接池需要在事件循环中创建
+        if self._client is None:
+            self._http_client = AsyncTwilioHttpClient()
+            self._client = Client(self.account_sid, self.auth_token, http_client=self._http_client)
+        return self._client
+
+    async def send(self, to_phone_number: str, message: str) -> Dict[str, Any]:
+        # 检查是否配置了Twilio密钥
+        if not all([self.account_sid, self.auth_token, self.from_number]):
+            logger.error("Twilio配置不完整，缺少必要的环境变量")
+            return {
+                "success": False,
+                "message": "短信服务配置不完整，请联系管理员",
+                "error": "缺少Twilio配置"
+            }
+
+        try:
+            twilio_message = await self._get_client().messages.create_async(
+                body=message,
+                from_=self.from_number,
+                to=to_phone_number
+            )
+        except TwilioRestException as e:
+            logger.error(f"Twilio错误: {str(e)}")
+
+            # 提供友好的错误消息
+            error_message = "短信发送失败"
+            if e.code == 21211:
+                error_message = "无效的电话号码格式，请确保包含国家代码 (例如: +8613800138000)"
+            elif e.code == 21608:
+                error_message = "该号码不是有效的手机号码"
+            elif e.code == 21610:
+                error_message = "该号码已选择不接收短信"
+
+            return {
+                "success": False,
+                "message": error_message,
+                "error": str(e),
+                "code": e.code
+            }
+
         logger.info(f"短信发送成功: SID={twilio_message.sid}, 状态={twilio_message.status}")
         return {
             "success": True,
@@ -50,30 +93,108 @@ def send_sms(to_phone_number, message):
             "sid": twilio_message.sid,
             "status": twilio_message.status
         }
-    
-    except TwilioRestException as e:
-        logger.error(f"Twilio错误: {str(e)}")
-        
-        # 提供友好的错误消息
-        error_message = "短信发送失败"
-        if e.code == 21211:
-            error_message = "无效的电话号码格式，请确保包含国家代码 (例如: +8613800138000)"
-        elif e.code == 21608:
-            error_message = "该号码不是有效的手机号码"
-        elif e.code == 21610:
-            error_message = "该号码已选择不接收短信"
-        
-        return {
-            "success": False,
-            "message": error_message,
-            "error": str(e),
-            "code": e.code
-        }
-    
-    except Exception as e:
-        logger.error(f"发送短信时出现错误: {str(e)}")
-        return {
-            "success": False,
-            "message": "发送短信时出现未知错误",
-            "error": str(e)
-        }
\ No newline at end of file
+
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.close()
+            self._http_client = None
+            self._client = None
+
+class FakeSMSProvider(SMSProvider):
+    """本地测试用的短信服务商，不发送短信，只记录并在日志中输出短信内容"""
+
+    name = "fake"
+
+    def __init__(self, delay: float = 0):
+        """
+        Args:
+            delay: 模拟每条短信的发送耗时（秒）
+        """
+        self.delay = delay
+        self.sent: List[Dict[str, str]] = []
+
+    async def send(self, to_phone_number: str, message: str) -> Dict[str, Any]:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append({"to": to_phone_number, "message": message})
+        logger.info(f"[测试短信] 发送至 {to_phone_number}: {message}")
+        return {"success": True, "message": "短信发送成功（测试）"}
+
+class SMSGateway:
+    """
+    异步短信网关：限制同时发送的短信数量，并为每条短信设置超时时间，
+    大量用户同时验证时只会排队等待，不会阻塞机器人的事件循环。
+    """
+
+    def __init__(self, provider: SMSProvider, max_concurrency: int = SMS_MAX_CONCURRENCY,
+                 timeout: float = SMS_TIMEOUT):
+        """
+        Args:
+            provider: 短信服务商
+            max_concurrency: 最多同时发送的短信数量
+            timeout: 单条短信的发送超时时间（秒）
+        """
+        self.provider = provider
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def send(self, to_phone_number: str, message: str) -> Dict[str, Any]:
+        """
+        发送短信，任何错误都以失败结果返回，不抛出异常
+
+        Args:
+            to_phone_number: 接收短信的电话号码 (格式: +国家代码电话号码，例如 +8613812345678)
+            message: 短信内容
+
+        Returns:
+            包含发送状态和信息的字典
+        """
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(self.provider.send(to_phone_number, message), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"发送短信超时 ({self.timeout} 秒): {to_phone_number}")
+                return {
+                    "success": False,
+                    "message": "短信发送超时，请稍后重试",
+                    "error": "timeout"
+                }
+            except Exception as e:
+                logger.error(f"发送短信时出现错误: {str(e)}")
+                return {
+                    "success": False,
+                    "message": "发送短信时出现未知错误",
+                    "error": str(e)
+                }
+
+    async def close(self) -> None:
+        await self.provider.close()
+
+def create_sms_provider(name: str) -> SMSProvider:
+    """
+    根据配置创建短信服务商
+
+    Args:
+        name: twilio 或 fake
+    """
+    if name == "twilio":
+        return TwilioSMSProvider(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER)
+    if name == "fake":
+        return FakeSMSProvider()
+    raise ValueError(f"未知的短信服务商: {name}")
+
+# 全局短信网关
+sms_gateway = SMSGateway(create_sms_provider(SMS_PROVIDER))
+
+async def send_sms(to_phone_number, message):
+    """
+    通过全局短信网关发送短信
+
+    Args:
+        to_phone_number (str): 接收短信的电话号码 (格式: +国家代码电话号码，例如 +8613812345678)
+        message (str): 短信内容
+
+    Returns:
+        dict: 包含发送状态和信息的字典
+    """
+    return await sms_gateway.send(to_phone_number, message)
@@ -0,0 +1,41 @@
+"""
+测试配置
+测试使用临时的 SQLite 数据库和测试短信服务商，环境变量需要在导入 app 和 config 之前设置。
+设置 TEST_DATABASE_URL 时使用指定的数据库（例如 PostgreSQL），测试会写入和删除数据，不要指向生产数据库。
+
+代码按部署后的目录结构导入模块（bot.*、utils.* 以及顶层的 app、models 等），
+在仓库中直接运行测试时，把 bot 和 utils 映射到仓库根目录。
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+for package in ("bot", "utils"):
+    if importlib.util.find_spec(package) is None:
+        module = types.ModuleType(package)
+        module.__path__ = [ROOT]
+        sys.modules[package] = module
+
+_db_dir = tempfile.mkdtemp(prefix="bot-test-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ["SMS_PROVIDER"] = "fake"
+os.environ["VERIFICATION_CODE_STORE"] = "database"
+
+import pytest
+
+# 先导入 app 完成建表和初始化；迁移脚本在导入时会导入 app，app 又会导入迁移脚本
+import app  # noqa: E402,F401
+
+@pytest.fixture
+def app_context():
+    """在 Flask 应用上下文中运行测试，测试结束后回滚未提交的修改"""
+    from app import app, db
+    with app.app_context():
+        yield db
+        db.session.rollback()
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import event
+
+import app as app_module
+from config import DASHBOARD_KEYWORDS_PER_PAGE
+
+@pytest.fixture
+def client(app_context):
+    app_module._dashboard_cache.clear()
+    yield app_module.app.test_client()
+    app_module._dashboard_cache.clear()
+
+def test_dashboard_served_from_cache(client, app_context):
+    """缓存期内再次打开管理面板不查询数据库"""
+    assert client.get("/").status_code == 200
+    statements = []
+
+    def count(*args):
+        statements.append(args)
+
+    event.listen(app_context.engine, "before_cursor_execute", count)
+    try:
+        response = client.get("/")
+    finally:
+        event.remove(app_context.engine, "before_cursor_execute", count)
+    assert response.status_code == 200
+    assert "运行中" in response.get_data(as_text=True)
+    assert statements == []
+
+def test_dashboard_keyword_page_is_clamped(client):
+    from models import KeywordResponse
+    pages = max(1, -(-KeywordResponse.query.count() // DASHBOARD_KEYWORDS_PER_PAGE))
+    for kw_page, expected in (("999", pages), ("0", 1), ("abc", 1)):
+        text = client.get(f"/?kw_page={kw_page}").get_data(as_text=True)
+        assert f"{expected} / {pages}（共" in text
+
+def test_healthz(client):
+    assert client.get("/healthz").get_json() == {"status": "ok"}
+
+def test_readyz_follows_bot_heartbeat(client, monkeypatch):
+    monkeypatch.setitem(app_module.bot_status, "heartbeat_at", None)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["checks"] == {"database": "ok", "bot": "not started"}
+
+    monkeypatch.setitem(app_module.bot_status, "heartbeat_at", app_module.time.monotonic())
+    monkeypatch.setitem(app_module.bot_status, "polling", True)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "ok"
+
+    monkeypatch.setitem(app_module.bot_status, "polling", False)
+    assert client.get("/readyz").get_json()["checks"]["bot"] == "not polling"
+
+def test_metrics_text_format(client):
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert "# TYPE telegram_bot_up gauge\ntelegram_bot_up 1\n" in text
+    assert 'telegram_bot_cache_events_total{cache="channel",event="hits"}' in text
+    assert "telegram_bot_db_timeouts_total " in text
+    assert '# TYPE telegram_bot_handler_duration_seconds histogram' in text
@@ -0,0 +1,36 @@
+import threading
+
+from utils.bloom_filter import BloomFilter
+
+def test_added_items_are_found():
+    bloom = BloomFilter(1000)
+    for user_id in range(1000):
+        bloom.add(user_id)
+    assert all(user_id in bloom for user_id in range(1000))
+    assert len(bloom) == 1000
+
+def test_false_positive_rate():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for user_id in range(1000):
+        bloom.add(user_id)
+    false_positives = sum(user_id in bloom for user_id in range(10000, 20000))
+    assert false_positives < 300
+
+def test_empty_filter():
+    bloom = BloomFilter(0)
+    assert 1 not in bloom
+    assert len(bloom) == 0
+
+def test_concurrent_add_loses_no_bits():
+    """多个线程同时添加时不会互相覆盖已设置的位"""
+    bloom = BloomFilter(20000)
+    threads = [
+        threading.Thread(target=lambda start=start: [bloom.add(i) for i in range(start, 20000, 4)])
+        for start in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(bloom) == 20000
+    assert all(i in bloom for i in range(20000))
@@ -0,0 +1,116 @@
+import threading
+import types
+
+import pytest
+
+from utils import cache
+from utils.cache import TTLCache, VersionedSnapshot
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可以手动推进的 time.monotonic"""
+    now = [1000.0]
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def _snapshot(ttl=60):
+    state = {"version": 1, "loads": 0, "fail": False}
+
+    def loader():
+        if state["fail"]:
+            raise RuntimeError("数据库不可用")
+        state["loads"] += 1
+        return f"v{state['version']}-{state['loads']}"
+
+    return VersionedSnapshot(loader, lambda: state["version"], ttl=ttl), state
+
+def test_snapshot_reloads_on_version_change(clock):
+    snapshot, state = _snapshot()
+    assert snapshot.peek() == (False, None)
+    assert snapshot.get() == "v1-1"
+    assert snapshot.peek() == (True, "v1-1")
+    assert snapshot.get() == "v1-1"
+
+    state["version"] = 2
+    assert snapshot.peek() == (False, None)
+    assert snapshot.get() == "v2-2"
+    assert snapshot.stats.by_label() == {"hits": 2, "misses": 2, "rebuilds": 2}
+
+def test_snapshot_counts_hits_from_many_threads():
+    """数据库线程池和事件循环同时读取快照时命中数不丢失"""
+    snapshot, state = _snapshot()
+    snapshot.get()
+
+    def read():
+        for _ in range(1000):
+            snapshot.peek()
+            snapshot.get()
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert snapshot.stats.by_label() == {"hits": 8000, "misses": 1, "rebuilds": 1}
+
+def test_snapshot_expires_after_ttl(clock):
+    snapshot, state = _snapshot(ttl=60)
+    snapshot.get()
+    clock[0] += 59
+    assert snapshot.peek()[0]
+    clock[0] += 1
+    assert not snapshot.peek()[0]
+    assert snapshot.get() == "v1-2"
+
+def test_snapshot_invalidate(clock):
+    snapshot, state = _snapshot()
+    snapshot.get()
+    snapshot.invalidate()
+    assert snapshot.get() == "v1-2"
+
+def test_snapshot_keeps_old_value_when_reload_fails(clock):
+    snapshot, state = _snapshot(ttl=60)
+    state["fail"] = True
+    with pytest.raises(RuntimeError):
+        snapshot.get()
+
+    state["fail"] = False
+    assert snapshot.get() == "v1-1"
+    state["fail"] = True
+    state["version"] = 2
+    assert snapshot.get() == "v1-1"
+    # 失败后在 TTL 内不再重试
+    assert snapshot.peek() == (True, "v1-1")
+
+def test_ttl_cache_expiry(clock):
+    store = TTLCache(maxsize=10, ttl=10)
+    store.set("a", 1)
+    store.set("b", 2, ttl=30)
+    clock[0] += 9
+    assert store.get("a") == 1
+    clock[0] += 1
+    assert store.get("a") is None
+    assert store.get("a", "missing") == "missing"
+    assert store.get("b") == 2
+    clock[0] += 20
+    assert store.get("b") is None
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    store = TTLCache(maxsize=2, ttl=10)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+    assert len(store) == 2
+
+def test_ttl_cache_pop_and_clear(clock):
+    store = TTLCache(maxsize=10, ttl=10)
+    store.set("a", 1)
+    assert store.pop("a") == 1
+    assert store.pop("a", "missing") == "missing"
+    store.set("b", 2)
+    store.clear()
+    assert len(store) == 0
@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import code_store
+from utils.code_store import DatabaseCodeStore, MemoryCodeStore, create_code_store
+
+@pytest.fixture(params=["memory", "database"])
+def store(request, app_context):
+    return create_code_store(request.param)
+
+@pytest.fixture
+def key():
+    return f"test:{uuid.uuid4().hex}"
+
+def test_take_token_limits_and_refills(store, key, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(code_store.time, "time", lambda: now[0])
+    assert [store.take_token(key, 2, 60) for _ in range(3)] == [True, True, False]
+    # 每 30 秒恢复一个令牌
+    now[0] += 30
+    assert store.take_token(key, 2, 60)
+    assert not store.take_token(key, 2, 60)
+
+def test_take_token_buckets_are_independent(store, key):
+    assert store.take_token(key, 1, 60)
+    assert not store.take_token(key, 1, 60)
+    assert store.take_token(key + ":other", 1, 60)
+
+def test_database_take_token_when_bucket_created_concurrently(app_context, key, monkeypatch):
+    """第一次取令牌时其他进程同时创建了令牌桶，主键冲突后在已有的令牌桶中扣减"""
+    from models import RateLimitBucket
+    session = app_context.session
+    original_get = session.get
+    raced = []
+
+    def get_after_other_process_insert(model, primary_key):
+        # 模拟另一个进程在本进程 UPDATE 之后、INSERT 之前创建了令牌桶并取走一个令牌
+        if model is RateLimitBucket and not raced:
+            raced.append(primary_key)
+            session.commit()
+            assert DatabaseCodeStore().take_token(primary_key, 2, 60)
+            return None
+        return original_get(model, primary_key)
+
+    monkeypatch.setattr(session, "get", get_after_other_process_insert, raising=False)
+    store = DatabaseCodeStore()
+    assert [store.take_token(key, 2, 60) for _ in range(3)] == [True, False, False]
+    assert raced == [key]
+
+def test_code_set_get_delete(store):
+    expires_at = datetime.utcnow() + timedelta(minutes=10)
+    store.set(42001, "123456", "+8613800000000", expires_at)
+    assert store.get(42001)["code"] == "123456"
+    assert not store.delete(42001, "000000")
+    assert store.delete(42001, "123456")
+    assert store.get(42001) is None
+    assert not store.delete(42001)
+
+def test_expired_code_is_hidden_and_swept(store):
+    store.set(42002, "111111", "+8613800000001", datetime.utcnow() - timedelta(seconds=1))
+    assert store.get(42002) is None
+    assert store.sweep() >= 1
+    assert not store.delete(42002)
+
+def test_memory_sweep_skips_replaced_codes():
+    """重新获取验证码后，堆中旧的过期条目不会删除新的验证码"""
+    store = MemoryCodeStore()
+    now = datetime.utcnow()
+    store.set(1, "111111", "+1", now + timedelta(minutes=1))
+    store.set(1, "222222", "+1", now + timedelta(minutes=10))
+    store.set(2, "333333", "+2", now + timedelta(minutes=1))
+    assert store.sweep(now + timedelta(minutes=5)) == 1
+    assert store.get(1)["code"] == "222222"
+    assert len(store) == 1
+    assert store.sweep(now + timedelta(minutes=11)) == 1
+    assert len(store) == 0
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_code_store("redis")
@@ -0,0 +1,22 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from bot import commands
+
+def _update(text):
+    return SimpleNamespace(
+        message=SimpleNamespace(text=text, reply_text=AsyncMock()),
+        effective_user=SimpleNamespace(id=7, username="tester")
+    )
+
+def test_code_input_when_verification_fails_with_error(monkeypatch):
+    """验证码存储不可用时提示用户稍后重试，继续等待输入验证码"""
+    async def run_db(func, *args, **kwargs):
+        raise TimeoutError()
+
+    monkeypatch.setattr(commands, "run_db", run_db)
+    update = _update("123456")
+    context = SimpleNamespace(user_data={})
+    assert asyncio.run(commands.code_input(update, context)) == commands.CODE_INPUT
+    assert "稍后" in update.message.reply_text.call_args.args[0]
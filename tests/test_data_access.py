@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bot import data_access
+from bot.data_access import run_db
+
+def test_run_db_runs_in_app_context_off_the_event_loop():
+    from flask import current_app
+
+    def query():
+        return current_app.name, threading.current_thread().name
+
+    app_name, thread_name = asyncio.run(run_db(query))
+    assert app_name == "app"
+    assert thread_name.startswith("db-worker")
+
+def test_run_db_propagates_errors():
+    def fail():
+        raise LookupError("没有数据")
+
+    with pytest.raises(LookupError):
+        asyncio.run(run_db(fail))
+
+def test_run_db_timeout():
+    timeouts = data_access._db_pool_stats["timeouts"]
+    with pytest.raises(TimeoutError):
+        asyncio.run(run_db(time.sleep, 0.3, timeout=0.05))
+    assert data_access._db_pool_stats["timeouts"] == timeouts + 1
+    # 超时的查询在线程结束后才从等待数中减去
+    deadline = time.monotonic() + 2
+    while data_access._db_pool_stats["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert data_access._db_pool_stats["pending"] == 0
+
+def _fail_run_db(func, *args, **kwargs):
+    raise AssertionError(f"不应访问数据库: {func}")
+
+def test_bot_settings_served_from_snapshot(app_context, monkeypatch):
+    """快照有效时不占用数据库线程，本进程提交修改后重新加载"""
+    from models import BotSettings
+    settings = asyncio.run(data_access.get_bot_settings())
+    with monkeypatch.context() as patch:
+        patch.setattr(data_access, "run_db", _fail_run_db)
+        assert asyncio.run(data_access.get_bot_settings()) is settings
+
+    row = BotSettings.query.first()
+    original = row.welcome_message
+    row.welcome_message = "新的欢迎消息"
+    app_context.session.commit()
+    try:
+        assert asyncio.run(data_access.get_bot_settings())["welcome_message"] == "新的欢迎消息"
+    finally:
+        row.welcome_message = original
+        app_context.session.commit()
+    assert asyncio.run(data_access.get_bot_settings())["welcome_message"] == original
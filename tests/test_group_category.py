@@ -0,0 +1,35 @@
+from config import DEFAULT_GROUP_CATEGORY
+from utils.group_category import classify_group
+
+def test_classify_group_by_first_rule():
+    assert classify_group("专业卡商，支持代收") == "卡商"
+    assert classify_group("USDT 承兑") == "承兑"
+    assert classify_group("POS机办理") == "卡商"
+
+def test_classify_group_default():
+    assert classify_group("闲聊") == DEFAULT_GROUP_CATEGORY
+    assert classify_group("") == DEFAULT_GROUP_CATEGORY
+    assert classify_group(None) == DEFAULT_GROUP_CATEGORY
+
+def test_backfill_group_categories(app_context):
+    from migrate_group_category import backfill_group_categories
+    from models import Group
+    db = app_context
+    groups = [
+        Group(group_number="92001", name="分类测试一", link="https://t.me/c1", description="白资对接"),
+        Group(group_number="92002", name="分类测试二", link="https://t.me/c2", description="技术开发", category="技术"),
+    ]
+    db.session.add_all(groups)
+    db.session.commit()
+    try:
+        backfill_group_categories(only_missing=True)
+        assert [group.category for group in groups] == ["白资", "技术"]
+        groups[1].description = "换汇"
+        db.session.commit()
+        assert backfill_group_categories(only_missing=True) == 0
+        assert backfill_group_categories() >= 1
+        assert groups[1].category == "换汇"
+    finally:
+        for group in groups:
+            db.session.delete(group)
+        db.session.commit()
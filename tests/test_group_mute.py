@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from sqlalchemy import delete, insert
+
+from bot import data_access
+
+CHAT_ID = -100900001
+OTHER_CHAT_ID = -100900002
+
+@pytest.fixture
+def mute_rows(app_context):
+    """测试结束后删除测试群组的禁言设置并从内存集合中移除"""
+    from models import GroupChatSettings
+    yield GroupChatSettings
+    with app_context.engine.begin() as connection:
+        connection.execute(delete(GroupChatSettings).where(GroupChatSettings.chat_id.in_([CHAT_ID, OTHER_CHAT_ID])))
+    data_access._muted_chats.difference_update({CHAT_ID, OTHER_CHAT_ID})
+
+def test_mute_state_read_from_memory(mute_rows, monkeypatch):
+    asyncio.run(data_access.sync_muted_chats())
+    asyncio.run(data_access.set_group_mute_state(CHAT_ID, "测试群", 7, True))
+    # 写入后直接更新内存集合，查询禁言状态不访问数据库
+    monkeypatch.setattr(data_access, "run_db", None)
+    assert asyncio.run(data_access.is_group_muted(CHAT_ID))
+    assert not asyncio.run(data_access.is_group_muted(OTHER_CHAT_ID))
+
+def test_mute_sync_picks_up_changes_from_other_writers(mute_rows, app_context):
+    """其他进程的修改由定时同步按 updated_at 读取"""
+    asyncio.run(data_access.sync_muted_chats())
+    with app_context.engine.begin() as connection:
+        connection.execute(insert(mute_rows).values(chat_id=OTHER_CHAT_ID, chat_title="其他群", is_muted=True))
+    assert not asyncio.run(data_access.is_group_muted(OTHER_CHAT_ID))
+    assert asyncio.run(data_access.sync_muted_chats()) == 1
+    assert asyncio.run(data_access.is_group_muted(OTHER_CHAT_ID))
+    assert asyncio.run(data_access.sync_muted_chats()) == 0
+
+def test_mute_state_without_upsert_support(mute_rows, app_context, monkeypatch):
+    """不支持 ON CONFLICT 的数据库先更新再插入，同样更新内存集合"""
+    monkeypatch.setattr(app_context.engine.dialect, "name", "generic")
+    asyncio.run(data_access.set_group_mute_state(CHAT_ID, "测试群", 7, True))
+    assert asyncio.run(data_access.is_group_muted(CHAT_ID))
+    asyncio.run(data_access.set_group_mute_state(CHAT_ID, "测试群", 7, False))
+    assert not asyncio.run(data_access.is_group_muted(CHAT_ID))
+    assert mute_rows.query.filter_by(chat_id=CHAT_ID).count() == 1
+
+def test_mute_toggle_upserts_one_row(mute_rows, app_context):
+    """重复切换禁言状态只更新同一行，并记录操作者"""
+    for is_muted in (True, True, False, True):
+        asyncio.run(data_access.set_group_mute_state(CHAT_ID, "测试群", 8, is_muted))
+    app_context.session.expire_all()
+    rows = mute_rows.query.filter_by(chat_id=CHAT_ID).all()
+    assert len(rows) == 1
+    assert rows[0].is_muted
+    assert rows[0].muted_by == 8 and rows[0].unmuted_by == 8
+    assert asyncio.run(data_access.is_group_muted(CHAT_ID))
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, update
+
+from bot import data_access
+from bot.data_access import _query_groups_page, _search_groups, _sync_group_index
+from config import GROUP_SEARCH_PAGE_SIZE
+from utils.group_search import SCORE_DESCRIPTION, SCORE_KEYWORD, SCORE_KEYWORD_EXACT, SCORE_NAME, GroupSearchIndex
+
+GROUP_COUNT = GROUP_SEARCH_PAGE_SIZE * 2 + 3
+
+def _doc(group_id, number, name="", description="", keywords=()):
+    return {"id": group_id, "number": number, "name": name, "description": description,
+            "link": f"https://t.me/g{group_id}", "keywords": list(keywords)}
+
+def _numbers(rows):
+    return [row["number"] for row in rows]
+
+def test_index_substring_match_and_ranking():
+    index = GroupSearchIndex()
+    index.rebuild([
+        _doc(1, "30", name="卡商交流"),
+        _doc(2, "4", description="这里有卡商"),
+        _doc(3, "200", keywords=["卡商"]),
+        _doc(4, "100", keywords=["卡商大群"], name="卡商"),
+        _doc(5, "5", name="卡"),
+    ])
+    rows = index.search("卡商")
+    assert _numbers(rows) == ["200", "100", "30", "4"]
+    assert [row["score"] for row in rows] == [
+        SCORE_KEYWORD_EXACT + SCORE_KEYWORD, SCORE_KEYWORD + SCORE_NAME, SCORE_NAME, SCORE_DESCRIPTION
+    ]
+    assert _numbers(index.search("卡")) == ["100", "200", "5", "30", "4"]
+    assert index.search("   ") == []
+
+def test_index_keywords_do_not_match_across_keywords():
+    index = GroupSearchIndex()
+    index.upsert(_doc(1, "1", keywords=["好旺", "卡商"]))
+    assert index.search("旺卡") == []
+
+def test_index_upsert_and_remove():
+    index = GroupSearchIndex()
+    index.upsert(_doc(1, "1", name="承兑群"))
+    index.upsert(_doc(1, "1", name="代收群"))
+    assert index.search("承兑") == []
+    assert _numbers(index.search("代收")) == ["1"]
+    index.remove(1)
+    index.remove(1)
+    assert len(index) == 0
+    assert index.search("代收") == []
+
+def test_index_pages_with_after():
+    index = GroupSearchIndex()
+    index.rebuild(_doc(i, str(i), name="测试") for i in range(1, 6))
+    first = index.search("测试", limit=2)
+    rest = index.search("测试", after=(first[-1]["score"], first[-1]["number"]))
+    assert _numbers(first) == ["1", "2"]
+    assert _numbers(rest) == ["3", "4", "5"]
+
+@pytest.fixture
+def groups(app_context):
+    """创建 GROUP_COUNT 个带"云测试"关键词的群组和 2 个只有名称匹配"星测试"的群组"""
+    from models import Group, Keyword
+    db = app_context
+    keyword = Keyword(word="云测试")
+    created = [
+        Group(group_number=str(90000 + i), name=f"测试群{i}", link=f"https://t.me/test{i}", keywords=[keyword])
+        for i in range(GROUP_COUNT)
+    ]
+    created += [
+        Group(group_number=str(91000 + i), name=f"星测试群{i}", link=f"https://t.me/star{i}")
+        for i in range(2)
+    ]
+    db.session.add_all(created)
+    db.session.commit()
+    yield created
+    for group in created:
+        db.session.delete(group)
+    db.session.delete(keyword)
+    db.session.commit()
+
+def test_search_uses_database_until_index_is_built(groups, monkeypatch):
+    """索引还没有构建时查询数据库，用户搜索不会触发全量构建"""
+    monkeypatch.setitem(data_access._group_index_state, "built", False)
+    page, cursor = _search_groups("星测试")
+    assert _numbers(page) == ["91000", "91001"]
+    assert not data_access._group_index_state["built"]
+
+def test_index_applies_changes_committed_in_process(groups, app_context):
+    _sync_group_index()
+    groups[0].name = "改名后的月测试群"
+    app_context.session.commit()
+    page, cursor = _search_groups("月测试")
+    assert _numbers(page) == ["90000"]
+
+def test_index_sync_picks_up_changes_from_other_writers(groups, app_context):
+    """不经过本进程 ORM 事件的修改（如其他进程）由定时同步按 updated_at 读取"""
+    from models import Group
+    _sync_group_index()
+    # 直接通过连接执行，不经过 ORM 会话
+    with app_context.engine.begin() as connection:
+        connection.execute(update(Group).where(Group.group_number == "90001").values(name="外部改名的雪测试群"))
+    assert _search_groups("雪测试")[0] == []
+    asyncio.run(data_access.sync_group_index())
+    assert _numbers(_search_groups("雪测试")[0]) == ["90001"]
+
+def test_database_matches_keywords_in_one_query(groups, app_context):
+    statements = []
+
+    def count(*args):
+        statements.append(args)
+
+    event.listen(app_context.engine, "before_cursor_execute", count)
+    try:
+        page, cursor = _query_groups_page("云测试", page_size=None)
+    finally:
+        event.remove(app_context.engine, "before_cursor_execute", count)
+    assert _numbers(page) == [str(90000 + i) for i in range(GROUP_COUNT)]
+    assert cursor is None
+    assert len(statements) == 1
+
+def test_database_falls_back_to_names(groups):
+    page, cursor = _query_groups_page("星测试")
+    assert _numbers(page) == ["91000", "91001"]
+    assert cursor is None
+    assert _query_groups_page("不存在的群") == ([], None)
+
+def _all_pages(search, keyword):
+    numbers, cursors = [], []
+    page, cursor = search(keyword, None)
+    while True:
+        assert len(page) <= GROUP_SEARCH_PAGE_SIZE
+        numbers += _numbers(page)
+        if cursor is None:
+            return numbers, cursors
+        cursors.append(cursor)
+        page, cursor = search(keyword, cursor)
+
+def test_database_cursor_round_trip(groups):
+    numbers, cursors = _all_pages(_query_groups_page, "云测试")
+    assert numbers == [str(90000 + i) for i in range(GROUP_COUNT)]
+    assert len(cursors) == 2
+    assert all(cursor.startswith("k") for cursor in cursors)
+
+def test_database_rejects_invalid_cursor(groups):
+    for cursor in ("x90001", "k", "i100.90001"):
+        with pytest.raises(ValueError):
+            _query_groups_page("云测试", cursor)
+
+def test_index_cursor_round_trip(groups):
+    _sync_group_index()
+    numbers, cursors = _all_pages(_search_groups, "云测试")
+    assert numbers == [str(90000 + i) for i in range(GROUP_COUNT)]
+    assert len(cursors) == 2
+    assert all(cursor.startswith("i") for cursor in cursors)
+    with pytest.raises(ValueError):
+        _search_groups("云测试", "i100")
+
+def test_database_cursor_keeps_paging_after_index_is_built(groups, monkeypatch):
+    """翻页期间索引构建完成时，数据库游标的翻页继续查询数据库"""
+    monkeypatch.setitem(data_access._group_index_state, "built", False)
+    page, cursor = _search_groups("云测试")
+    assert cursor.startswith("k")
+    monkeypatch.setitem(data_access._group_index_state, "built", True)
+    numbers = _numbers(page)
+    while cursor:
+        page, cursor = _search_groups("云测试", cursor)
+        numbers += _numbers(page)
+    assert numbers == [str(90000 + i) for i in range(GROUP_COUNT)]
@@ -0,0 +1,165 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from bot import handlers
+
+def _update(text, chat_type="supergroup"):
+    return SimpleNamespace(
+        message=SimpleNamespace(text=text, reply_text=AsyncMock()),
+        effective_chat=SimpleNamespace(id=-100123, type=chat_type, title="测试群"),
+        effective_user=SimpleNamespace(id=7, username="tester", first_name="测试")
+    )
+
+@pytest.fixture
+def chat(monkeypatch):
+    """关键词总是命中，群组未禁言，用户是否为管理员由 chat["admin"] 决定"""
+    state = {"admin": False, "muted": False, "admin_checks": 0, "mute_changes": []}
+
+    async def find_keyword_response(text):
+        return ("验群", "本群是真群") if "验群" in text else ("禁言", "已禁言")
+
+    async def is_user_admin(bot, chat_id, user_id):
+        state["admin_checks"] += 1
+        return state["admin"]
+
+    async def is_group_muted(chat_id):
+        return state["muted"]
+
+    async def set_group_mute_state(chat_id, chat_title, user_id, is_muted):
+        state["mute_changes"].append(is_muted)
+
+    monkeypatch.setattr(handlers, "find_keyword_response", find_keyword_response)
+    monkeypatch.setattr(handlers, "is_user_admin", is_user_admin)
+    monkeypatch.setattr(handlers, "is_group_muted", is_group_muted)
+    monkeypatch.setattr(handlers, "set_group_mute_state", set_group_mute_state)
+    # 管理员回复有一定概率加上称呼，测试中关闭
+    monkeypatch.setattr("random.random", lambda: 1.0)
+    return state
+
+def _reply(update, chat):
+    asyncio.run(handlers.auto_reply(update, SimpleNamespace(bot=None)))
+    return [call.args[0] for call in update.message.reply_text.call_args_list]
+
+def test_verify_group_replies_to_anyone_without_admin_check(chat):
+    update = _update("帮我验群")
+    assert _reply(update, chat) == ["本群是真群"]
+    assert chat["admin_checks"] == 0
+
+def test_verify_group_replies_when_group_is_muted(chat):
+    chat["muted"] = True
+    assert _reply(_update("验群"), chat) == ["本群是真群"]
+
+def test_verify_group_with_mute_command_from_non_admin(chat):
+    """同时包含"禁言"的验群消息，非管理员仍然得到验群回复，不会改变禁言状态"""
+    chat["muted"] = True
+    assert _reply(_update("验群 禁言"), chat) == ["本群是真群"]
+    assert chat["admin_checks"] == 1
+    assert chat["mute_changes"] == []
+
+def test_mute_command_from_admin(chat):
+    chat["admin"] = True
+    assert _reply(_update("验群 禁言"), chat) == ["本群是真群"]
+    assert chat["mute_changes"] == [True]
+
+def test_non_admin_keyword_is_refused(chat):
+    assert _reply(_update("禁言"), chat) == ["抱歉，只有群组管理员可以使用机器人功能。"]
+    chat["muted"] = True
+    assert _reply(_update("禁言"), chat) == []
+
+def test_search_page_callback_round_trip():
+    data = handlers._search_page_callback("卡商", 2, "k123")
+    assert data.startswith(handlers.SEARCH_PAGE_PREFIX)
+    assert handlers._parse_search_page_callback(data) == ("卡商", 2, "k123")
+
+def test_long_keyword_is_referenced_by_hash():
+    keyword = "很长的关键词" * 10
+    data = handlers._search_page_callback(keyword, 3, "i50.123")
+    assert len(data.encode("utf-8")) <= handlers.CALLBACK_DATA_LIMIT
+    assert handlers._parse_search_page_callback(data) == (keyword, 3, "i50.123")
+
+@pytest.mark.parametrize("data", ["search_group", "spage|", "spage|x|k1|卡商", "spage|2|k1", "spage|2|k1|"])
+def test_malformed_search_page_callback_is_rejected(data):
+    assert handlers._parse_search_page_callback(data) is None
+
+def test_search_group_button_is_not_a_search_page():
+    """search_group 按钮不会被当作翻页按钮处理"""
+    query = SimpleNamespace(data="search_group", answer=AsyncMock(), message=SimpleNamespace(edit_text=AsyncMock()))
+    asyncio.run(handlers.handle_button_callback(SimpleNamespace(callback_query=query), None))
+    query.answer.assert_awaited_once()
+    query.message.edit_text.assert_not_awaited()
+
+@pytest.fixture
+def reply_group(app_context):
+    from models import Group
+    db = app_context
+    group = Group(group_number="93001", name="缓存测试群", link="https://t.me/old", description="旧描述")
+    db.session.add(group)
+    db.session.commit()
+    handlers._group_reply_cache.clear()
+    yield group
+    db.session.delete(group)
+    db.session.commit()
+
+def _lookup(number):
+    return asyncio.run(handlers._lookup_group_reply(number))
+
+def test_group_reply_is_cached_and_cleared_on_change(reply_group, app_context):
+    assert "https://t.me/old" in _lookup("93001")[0]
+    hits = handlers.bot_status["group_lookup_cache"].by_label()["hits"]
+    assert "https://t.me/old" in _lookup("93001")[0]
+    assert handlers.bot_status["group_lookup_cache"].by_label()["hits"] == hits + 1
+
+    reply_group.link = "https://t.me/new"
+    app_context.session.commit()
+    assert "https://t.me/new" in _lookup("93001")[0]
+
+def test_missing_group_is_cached_until_created(reply_group, app_context):
+    from models import Group
+    assert _lookup("93002") is None
+    group = Group(group_number="93002", name="新群", link="https://t.me/g93002", description="新")
+    app_context.session.add(group)
+    app_context.session.commit()
+    try:
+        assert _lookup("93002")[1] == "新群"
+    finally:
+        app_context.session.delete(group)
+        app_context.session.commit()
+
+def test_group_reply_cache_cleared_by_index_sync(reply_group, app_context):
+    """其他进程（如 add_groups.py）修改的群组在群组索引同步后不再使用旧的回复"""
+    from sqlalchemy import update
+    from bot import data_access
+    from models import Group
+    asyncio.run(data_access.sync_group_index())
+    assert "https://t.me/old" in _lookup("93001")[0]
+    with app_context.engine.begin() as connection:
+        connection.execute(update(Group).where(Group.group_number == "93001").values(link="https://t.me/external"))
+    assert "https://t.me/old" in _lookup("93001")[0]
+    asyncio.run(data_access.sync_group_index())
+    assert "https://t.me/external" in _lookup("93001")[0]
+
+def test_channel_keyboard_built_once_per_channel_list(app_context):
+    """频道未变更时 get_channels 返回同一个列表，按钮只生成一次；频道变更后重新生成"""
+    from bot.data_access import get_channels
+    from models import Channel
+    channels = asyncio.run(get_channels())
+    keyboard = handlers._channel_keyboard(channels)
+    assert asyncio.run(get_channels()) is channels
+    assert handlers._channel_keyboard(asyncio.run(get_channels())) is keyboard
+
+    channel = Channel(name="测试频道", username="test_channel_cache", link="https://t.me/test_channel_cache",
+                      display_order=999)
+    app_context.session.add(channel)
+    app_context.session.commit()
+    try:
+        changed = asyncio.run(get_channels())
+        assert changed is not channels
+        rebuilt = handlers._channel_keyboard(changed)
+        assert rebuilt is not keyboard
+        assert rebuilt.inline_keyboard[-3][0].url == "https://t.me/test_channel_cache"
+    finally:
+        app_context.session.delete(channel)
+        app_context.session.commit()
@@ -0,0 +1,37 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot import helpers
+from bot.helpers import invalidate_admin_cache, is_user_admin
+
+class FakeBot:
+    """记录 get_chat_administrators 调用次数的机器人"""
+
+    def __init__(self, admin_ids):
+        self.admin_ids = admin_ids
+        self.calls = 0
+
+    async def get_chat_administrators(self, chat_id):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return [SimpleNamespace(user=SimpleNamespace(id=admin_id)) for admin_id in self.admin_ids]
+
+def test_admin_set_is_cached_per_chat():
+    bot = FakeBot([1, 2])
+
+    async def check():
+        return await asyncio.gather(*(is_user_admin(bot, -4001, user_id) for user_id in (1, 2, 3, 1)))
+
+    assert asyncio.run(check()) == [True, True, False, True]
+    # 并发的检查只请求一次管理员列表
+    assert bot.calls == 1
+
+def test_invalidate_admin_cache():
+    bot = FakeBot([1])
+    assert not asyncio.run(is_user_admin(bot, -4002, 2))
+    bot.admin_ids = [1, 2]
+    assert not asyncio.run(is_user_admin(bot, -4002, 2))
+    invalidate_admin_cache(-4002)
+    assert asyncio.run(is_user_admin(bot, -4002, 2))
+    assert bot.calls == 2
+    assert -4002 not in helpers._admin_cache_locks
@@ -0,0 +1,36 @@
+from utils.keyword_matcher import KeywordMatcher
+
+def test_no_match():
+    matcher = KeywordMatcher([("你好", "回复")])
+    assert matcher.find("今天天气不错") is None
+    assert matcher.find("") is None
+    assert KeywordMatcher([]).find("你好") is None
+
+def test_case_insensitive():
+    matcher = KeywordMatcher([("Hello", "hi")])
+    assert matcher.find("HELLO there") == ("Hello", "hi")
+
+def test_priority_follows_order_not_position():
+    """文本中出现多个关键词时返回优先级最高的，与出现位置无关"""
+    matcher = KeywordMatcher([("规则", "a"), ("你好", "b")])
+    assert matcher.find("你好，请问群规则是什么") == ("规则", "a")
+
+def test_overlapping_keywords():
+    """重叠的关键词（一个是另一个的子串或后缀）按优先级选择"""
+    matcher = KeywordMatcher([("群规", "a"), ("规则", "b"), ("群规则", "c")])
+    assert matcher.find("群规则") == ("群规", "a")
+
+    matcher = KeywordMatcher([("群规则", "c"), ("规则", "b")])
+    assert matcher.find("看看群规则") == ("群规则", "c")
+    assert matcher.find("看看规则") == ("规则", "b")
+
+def test_suffix_found_through_failure_link():
+    """低优先级的长关键词部分匹配后，仍能通过失败指针找到它的后缀关键词"""
+    matcher = KeywordMatcher([("bc", "high"), ("abd", "low")])
+    assert matcher.find("abc") == ("bc", "high")
+
+def test_duplicate_keyword_keeps_first():
+    """重复的关键词保留优先级最高（靠前）的回复，数据库关键词覆盖配置文件关键词"""
+    matcher = KeywordMatcher([("帮助", "数据库"), ("帮助", "配置文件")])
+    assert matcher.find("需要帮助") == ("帮助", "数据库")
+    assert matcher.match("需要帮助") == "数据库"
@@ -0,0 +1,67 @@
+import asyncio
+
+from bot import log_writer
+from bot.log_writer import MessageLogWriter
+
+def _run(writer, count, wait=0.0):
+    async def main():
+        for i in range(count):
+            writer.add(chat_id=-5000, chat_type="supergroup", message_text=f"消息{i}")
+        if wait:
+            await asyncio.sleep(wait)
+        await writer.stop()
+    asyncio.run(main())
+
+def test_logs_are_written_in_batches(monkeypatch):
+    batches = []
+    monkeypatch.setattr(log_writer, "_insert_message_logs", lambda rows: batches.append(len(rows)))
+    writer = MessageLogWriter(batch_size=2, flush_interval=0.05)
+    _run(writer, 5, wait=0.2)
+    assert batches == [2, 2, 1]
+    assert writer.stats == {"queued": 5, "written": 5, "dropped": 0, "failed": 0}
+
+def test_full_queue_drops_logs(monkeypatch):
+    monkeypatch.setattr(log_writer, "_insert_message_logs", lambda rows: None)
+    writer = MessageLogWriter(queue_size=3, batch_size=10, flush_interval=0.05)
+    _run(writer, 5)
+    assert writer.stats == {"queued": 3, "written": 3, "dropped": 2, "failed": 0}
+
+def test_stopped_writer_drops_logs(monkeypatch):
+    monkeypatch.setattr(log_writer, "_insert_message_logs", lambda rows: None)
+    writer = MessageLogWriter(flush_interval=0.05)
+
+    async def main():
+        writer.add(chat_id=-5000, chat_type="supergroup")
+        await writer.stop()
+        assert not writer.add(chat_id=-5000, chat_type="supergroup")
+
+    asyncio.run(main())
+    assert writer.stats["dropped"] == 1
+
+def test_failed_batch_is_counted(monkeypatch):
+    def fail(rows):
+        raise RuntimeError("数据库不可用")
+
+    monkeypatch.setattr(log_writer, "_insert_message_logs", fail)
+    writer = MessageLogWriter(batch_size=10, flush_interval=0.05)
+    _run(writer, 3)
+    assert writer.stats["failed"] == 3
+    assert writer.stats["written"] == 0
+
+def test_logs_reach_the_database(app_context):
+    from models import MessageLog
+    MessageLog.query.filter(MessageLog.chat_id == -5001).delete()
+    app_context.session.commit()
+    writer = MessageLogWriter(batch_size=10, flush_interval=0.05)
+
+    async def main():
+        for i in range(3):
+            writer.add(chat_id=-5001, chat_type="supergroup", message_text=f"消息{i}", trigger_keyword="你好")
+        await writer.stop()
+
+    asyncio.run(main())
+    rows = MessageLog.query.filter(MessageLog.chat_id == -5001).order_by(MessageLog.id).all()
+    assert [row.message_text for row in rows] == ["消息0", "消息1", "消息2"]
+    assert all(row.processed_at is not None for row in rows)
+    MessageLog.query.filter(MessageLog.chat_id == -5001).delete()
+    app_context.session.commit()
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import message_stats
+from message_stats import count_messages, rollup_message_stats, settled_until, top_keywords
+
+T0 = datetime(2024, 1, 1, 10, 0)
+
+@pytest.fixture
+def db(app_context):
+    from models import MessageLog, MessageStats
+    MessageLog.query.delete()
+    MessageStats.query.delete()
+    app_context.session.commit()
+    return app_context
+
+def _log(db, processed_at, chat_id=-100, keyword=None, is_admin=False, duration_ms=10.0):
+    from models import MessageLog
+    db.session.add(MessageLog(
+        chat_id=chat_id, chat_type="supergroup", trigger_keyword=keyword,
+        is_admin=is_admin, duration_ms=duration_ms, processed_at=processed_at
+    ))
+    db.session.commit()
+
+def _stats(db):
+    from models import MessageStats
+    return sorted(
+        (row.hour, row.chat_id, row.trigger_keyword, row.is_admin, row.message_count, row.total_duration_ms)
+        for row in MessageStats.query.all()
+    )
+
+def test_rollup_groups_by_hour_and_dimensions(db):
+    _log(db, T0 + timedelta(minutes=5), keyword="你好")
+    _log(db, T0 + timedelta(minutes=50), keyword="你好")
+    _log(db, T0 + timedelta(minutes=55), is_admin=True)
+    _log(db, T0 + timedelta(hours=2, minutes=1), chat_id=-200)
+    # 当前小时还没有结束，不汇总
+    _log(db, T0 + timedelta(hours=3, minutes=1))
+
+    assert rollup_message_stats(now=T0 + timedelta(hours=3, minutes=30)) == 2
+    assert _stats(db) == [
+        (T0, -100, "", True, 1, 10.0),
+        (T0, -100, "你好", False, 2, 20.0),
+        (T0 + timedelta(hours=2), -200, "", False, 1, 10.0),
+    ]
+    assert count_messages(T0) == 4
+    assert count_messages(T0, chat_id=-200) == 1
+    assert top_keywords(T0) == [("你好", 2)]
+
+def test_rollup_is_idempotent(db):
+    _log(db, T0)
+    now = T0 + timedelta(hours=2)
+    rollup_message_stats(now=now)
+    rollup_message_stats(now=now)
+    assert count_messages(T0) == 1
+
+def test_late_rows_are_counted_by_later_rollup(db):
+    """所属小时已经汇总之后才写入的日志在下一次汇总时计入"""
+    _log(db, T0 + timedelta(minutes=1))
+    _log(db, T0 + timedelta(hours=1, minutes=1))
+    rollup_message_stats(now=T0 + timedelta(hours=2, minutes=10))
+    assert count_messages(T0) == 2
+
+    _log(db, T0 + timedelta(minutes=59))
+    rollup_message_stats(now=T0 + timedelta(hours=3, minutes=10))
+    assert count_messages(T0) == 3
+
+def test_settled_until(db):
+    assert settled_until() is None
+    _log(db, T0)
+    rollup_message_stats(now=T0 + timedelta(hours=2))
+    assert settled_until() == T0 + timedelta(hours=1) - message_stats.ROLLUP_LOOKBACK
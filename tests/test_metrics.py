@@ -0,0 +1,93 @@
+import math
+import threading
+
+import pytest
+
+from utils.metrics import Counter, Histogram, MetricsRegistry, render_histogram, render_metric
+
+def _run_in_threads(target, count=4):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_counter_merges_thread_shards():
+    counter = Counter(("handler",), known=[("auto_reply",), ("private",)])
+    _run_in_threads(lambda: [counter.inc("auto_reply") for _ in range(1000)])
+    counter.inc("command", amount=5)
+    assert counter.by_label() == {"auto_reply": 4000, "private": 0, "command": 5}
+    assert counter.total() == 4005
+
+def test_counter_without_labels():
+    counter = Counter()
+    assert counter.samples() == [({}, 0)]
+    counter.inc()
+    assert counter.samples() == [({}, 1)]
+
+def test_histogram_snapshots():
+    histogram = Histogram(("handler",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, "auto_reply")
+    _run_in_threads(lambda: histogram.observe(0.5, "auto_reply"))
+    cumulative, total, count = histogram.snapshots()[("auto_reply",)]
+    assert cumulative == [2, 7, 8]
+    assert total == pytest.approx(7.65)
+    assert count == 8
+
+def test_histogram_count_matches_sum_under_concurrent_reads():
+    """读取与写入同时进行时，每个快照的总次数与总和一致"""
+    histogram = Histogram(buckets=(1,))
+    stop = threading.Event()
+
+    def observe():
+        while not stop.is_set():
+            histogram.observe(1.0)
+
+    writers = [threading.Thread(target=observe) for _ in range(2)]
+    for writer in writers:
+        writer.start()
+    try:
+        for _ in range(2000):
+            snapshot = histogram.snapshots().get(())
+            if snapshot:
+                cumulative, total, count = snapshot
+                assert total == count
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join()
+
+def test_render_metric():
+    text = render_metric("bot_up", "gauge", "Bot is up", [(None, 1), ({"chat": 'a"b'}, 2.5)])
+    assert text == (
+        "# HELP bot_up Bot is up\n"
+        "# TYPE bot_up gauge\n"
+        "bot_up 1\n"
+        'bot_up{chat="a\\"b"} 2.5\n'
+    )
+
+def test_render_histogram():
+    histogram = Histogram(("handler",), buckets=(0.5,))
+    histogram.observe(0.25, "auto_reply")
+    histogram.observe(2.0, "auto_reply")
+    assert render_histogram("latency_seconds", "Latency", histogram) == (
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{handler="auto_reply",le="0.5"} 1\n'
+        'latency_seconds_bucket{handler="auto_reply",le="+Inf"} 2\n'
+        'latency_seconds_sum{handler="auto_reply"} 2.25\n'
+        'latency_seconds_count{handler="auto_reply"} 2\n'
+    )
+    assert histogram.buckets[-1] == math.inf
+
+def test_registry_renders_in_order_and_rejects_duplicates():
+    registry = MetricsRegistry()
+    counter = registry.register("a_total", "A", Counter())
+    registry.register("b_seconds", "B", Histogram(buckets=(1,)))
+    counter.inc(amount=3)
+    text = registry.render()
+    assert text.index("# TYPE a_total counter") < text.index("# TYPE b_seconds histogram")
+    assert "a_total 3\n" in text
+    with pytest.raises(ValueError):
+        registry.register("a_total", "A", Counter())
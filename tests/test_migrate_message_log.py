@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import migrate_message_log as migration
+from message_stats import rollup_message_stats
+
+@pytest.fixture
+def db(app_context):
+    from models import MessageLog, MessageStats
+    MessageLog.query.delete()
+    MessageStats.query.delete()
+    app_context.session.commit()
+    return app_context
+
+@pytest.fixture
+def postgresql(db):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("分区只在 PostgreSQL 上使用（设置 TEST_DATABASE_URL 运行）")
+    return db
+
+def _log(db, processed_at):
+    from models import MessageLog
+    db.session.add(MessageLog(chat_id=-7001, chat_type="supergroup", processed_at=processed_at))
+    db.session.commit()
+
+def _remaining(db):
+    from models import MessageLog
+    return sorted(row.processed_at for row in MessageLog.query.all())
+
+def test_month_helpers():
+    assert migration._add_months(datetime(2024, 11, 1), 3) == datetime(2025, 2, 1)
+    assert migration._add_months(datetime(2024, 1, 1), -1) == datetime(2023, 12, 1)
+    assert migration._partition_name(datetime(2024, 3, 1)) == "message_log_p202403"
+
+def test_upgrade_is_idempotent(db):
+    migration.upgrade_message_log()
+    assert migration.ensure_message_log_columns() == []
+
+def test_maintenance_keeps_rows_that_are_not_rolled_up(db):
+    old = datetime.utcnow() - timedelta(days=200)
+    _log(db, old)
+    assert migration.maintain_message_log(retention_days=30)["rows_deleted"] == 0
+    assert _remaining(db) == [old]
+
+def test_maintenance_deletes_expired_rolled_up_rows(db):
+    now = datetime.utcnow()
+    old, recent = now - timedelta(days=200), now - timedelta(days=1)
+    _log(db, old)
+    _log(db, recent)
+    rollup_message_stats(now=now)
+    migration.maintain_message_log(retention_days=30)
+    assert _remaining(db) == [recent]
+
+def test_maintenance_disabled_without_retention(db):
+    _log(db, datetime.utcnow() - timedelta(days=200))
+    rollup_message_stats()
+    assert migration.maintain_message_log(retention_days=0)["rows_deleted"] == 0
+
+def _partitions(connection):
+    return set(connection.execute(text(
+        "SELECT child.relname FROM pg_inherits JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid WHERE parent.relname = :name"
+    ), {"name": migration.TABLE_NAME}).scalars())
+
+def test_partitions_are_created_at_startup(postgresql):
+    with postgresql.engine.begin() as connection:
+        assert migration.is_partitioned(connection)
+        partitions = _partitions(connection)
+    month = migration._month_start(datetime.utcnow())
+    expected = {migration._partition_name(migration._add_months(month, i))
+                for i in range(migration.MESSAGE_LOG_PARTITION_MONTHS_AHEAD + 1)}
+    assert migration.DEFAULT_PARTITION in partitions
+    assert expected <= partitions
+
+def test_rows_without_a_partition_go_to_default_and_move(postgresql):
+    """没有对应月分区的日志写入默认分区，创建该月分区时移入新分区"""
+    future = migration._add_months(migration._month_start(datetime.utcnow()), 12) + timedelta(days=3)
+    _log(postgresql, future)
+    with postgresql.engine.begin() as connection:
+        count = text(f'SELECT count(*) FROM "{migration.DEFAULT_PARTITION}"')
+        assert connection.execute(count).scalar() == 1
+        migration.ensure_partitions(connection, months_ahead=12)
+        assert connection.execute(count).scalar() == 0
+        name = migration._partition_name(migration._month_start(future))
+        assert connection.execute(text(f'SELECT count(*) FROM "{name}"')).scalar() == 1
+    assert _remaining(postgresql) == [future]
@@ -0,0 +1,30 @@
+import asyncio
+
+from bot.responses import find_keyword_response, get_response_for_keyword, keyword_cache
+
+def test_keyword_cache_follows_database_changes(app_context):
+    """关键词回复被修改后，下一条消息使用新的回复，未修改时不重建匹配器"""
+    from models import KeywordResponse
+    db = app_context
+    row = KeywordResponse(keyword="测试口令", response="第一版")
+    db.session.add(row)
+    db.session.commit()
+    try:
+        assert asyncio.run(find_keyword_response("说一下测试口令")) == ("测试口令", "第一版")
+        rebuilds = keyword_cache.stats.by_label()["rebuilds"]
+        assert asyncio.run(get_response_for_keyword("测试口令")) == "第一版"
+        assert keyword_cache.stats.by_label()["rebuilds"] == rebuilds
+
+        row.response = "第二版"
+        db.session.commit()
+        assert asyncio.run(get_response_for_keyword("测试口令")) == "第二版"
+
+        row.is_active = False
+        db.session.commit()
+        assert asyncio.run(find_keyword_response("测试口令")) is None
+    finally:
+        db.session.delete(row)
+        db.session.commit()
+
+def test_empty_message():
+    assert asyncio.run(find_keyword_response("")) is None
@@ -0,0 +1,41 @@
+import asyncio
+
+from utils.sms_sender import FakeSMSProvider, SMSGateway, SMSProvider
+
+class FailingSMSProvider(SMSProvider):
+    name = "failing"
+
+    async def send(self, to_phone_number, message):
+        raise ConnectionError("服务商不可用")
+
+def test_gateway_sends_through_provider():
+    provider = FakeSMSProvider()
+    gateway = SMSGateway(provider, max_concurrency=2, timeout=1)
+    result = asyncio.run(gateway.send("+8613800000000", "验证码 123456"))
+    assert result["success"]
+    assert provider.sent == [{"to": "+8613800000000", "message": "验证码 123456"}]
+
+def test_gateway_timeout():
+    gateway = SMSGateway(FakeSMSProvider(delay=1), timeout=0.05)
+    result = asyncio.run(gateway.send("+8613800000000", "验证码"))
+    assert result == {"success": False, "message": "短信发送超时，请稍后重试", "error": "timeout"}
+    assert gateway.provider.sent == []
+
+def test_gateway_returns_provider_errors():
+    result = asyncio.run(SMSGateway(FailingSMSProvider()).send("+8613800000000", "验证码"))
+    assert not result["success"]
+    assert result["error"] == "服务商不可用"
+
+def test_gateway_limits_concurrency():
+    provider = FakeSMSProvider(delay=0.05)
+    gateway = SMSGateway(provider, max_concurrency=2, timeout=1)
+
+    async def send_all():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*(gateway.send(f"+86138000000{i:02d}", "验证码") for i in range(4)))
+        return loop.time() - started
+
+    # 4 条短信、每次最多 2 条，至少需要两轮
+    assert asyncio.run(send_all()) >= 0.1
+    assert len(provider.sent) == 4
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import ApplicationBuilder, CommandHandler, ConversationHandler, MessageHandler, filters
+
+from bot import update_log
+from bot.update_log import annotate_update, install_update_logging, logged_callback
+
+def _update(text="你好"):
+    chat = Chat(id=-6001, type="supergroup", title="日志测试群")
+    user = User(id=7, first_name="测试", is_bot=False, username="tester")
+    message = Message(message_id=1, date=datetime.now(timezone.utc), chat=chat, from_user=user, text=text)
+    return Update(update_id=1, message=message)
+
+def _capture(monkeypatch):
+    logged = []
+    monkeypatch.setattr(update_log, "message_log_writer", SimpleNamespace(add=lambda **fields: logged.append(fields)))
+    return logged
+
+def test_logged_callback_records_update_and_annotations(monkeypatch):
+    logged = _capture(monkeypatch)
+
+    async def auto_reply(update, context):
+        annotate_update(trigger_keyword="你好" * 40, is_admin=True)
+        return "状态"
+
+    wrapped = logged_callback(auto_reply)
+    assert asyncio.run(wrapped(_update(), None)) == "状态"
+    [fields] = logged
+    assert fields["chat_id"] == -6001
+    assert fields["chat_title"] == "日志测试群"
+    assert fields["username"] == "tester"
+    assert fields["message_text"] == "你好"
+    assert fields["handler_name"] == "auto_reply"
+    assert fields["is_admin"] is True
+    assert len(fields["trigger_keyword"]) == 50
+    assert fields["duration_ms"] >= 0
+
+def test_failed_handler_is_still_logged(monkeypatch):
+    logged = _capture(monkeypatch)
+
+    async def broken(update, context):
+        raise RuntimeError("处理失败")
+
+    try:
+        asyncio.run(logged_callback(broken)(_update(), None))
+    except RuntimeError:
+        pass
+    assert [fields["handler_name"] for fields in logged] == ["broken"]
+
+def test_annotate_update_outside_handler_is_ignored():
+    annotate_update(trigger_keyword="你好")
+
+def test_install_update_logging_wraps_every_handler_once():
+    async def start(update, context):
+        pass
+
+    async def phone(update, context):
+        pass
+
+    application = ApplicationBuilder().token("123:TEST").build()
+    command = CommandHandler("start", start)
+    conversation = ConversationHandler(
+        entry_points=[CommandHandler("verify", start)],
+        states={1: [MessageHandler(filters.TEXT, phone)]},
+        fallbacks=[CommandHandler("cancel", start)],
+    )
+    application.add_handler(command)
+    application.add_handler(conversation)
+
+    install_update_logging(application)
+    wrapped = command.callback
+    install_update_logging(application)
+    assert command.callback is wrapped
+    assert wrapped.logged and wrapped.__name__ == "start"
+    state_handler = conversation.states[1][0]
+    assert state_handler.callback.logged and state_handler.callback.__name__ == "phone"
+    assert conversation.entry_points[0].callback.logged
+    assert conversation.fallbacks[0].callback.logged
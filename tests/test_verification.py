@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from utils import sms_sender, verification
+from utils.sms_sender import FakeSMSProvider
+
+@pytest.fixture
+def sent(monkeypatch):
+    """用测试短信服务商发送验证码，返回已发送的短信列表"""
+    provider = FakeSMSProvider()
+    monkeypatch.setattr(sms_sender.sms_gateway, "provider", provider)
+    return provider.sent
+
+def _sent_code(sent):
+    return sent[-1]["message"].split("验证码是 ")[1][:6]
+
+def test_send_and_verify_code(sent, app_context):
+    result = asyncio.run(verification.send_verification_code(51001, "+8613800051001"))
+    assert result["success"]
+    assert sent[0]["to"] == "+8613800051001"
+
+    code = _sent_code(sent)
+    assert not verification.verify_code(51001, "x" + code[1:])["success"]
+    assert verification.verify_code(51001, code) == {"success": True, "message": "验证成功", "phone": "+8613800051001"}
+    # 验证成功后验证码不能重复使用
+    assert not verification.verify_code(51001, code)["success"]
+
+def test_send_rate_limit(sent, app_context):
+    results = [asyncio.run(verification.send_verification_code(51002, "+8613800051002"))["success"]
+               for _ in range(verification.VERIFICATION_SEND_LIMIT + 1)]
+    assert results == [True] * verification.VERIFICATION_SEND_LIMIT + [False]
+    assert len(sent) == verification.VERIFICATION_SEND_LIMIT
+
+def test_store_failure_after_sending(sent, app_context, monkeypatch):
+    """短信已经发出但验证码保存失败时返回失败结果，不抛出异常"""
+    def fail(*args):
+        raise RuntimeError("数据库不可用")
+
+    monkeypatch.setattr(verification.verification_codes, "set", fail)
+    result = asyncio.run(verification.send_verification_code(51003, "+8613800051003"))
+    assert result["success"] is False
+    assert result["message"] == "验证码保存失败，请稍后重新获取验证码"
+    assert len(sent) == 1
+
+def test_rate_limit_failure(sent, app_context, monkeypatch):
+    """限流数据读取失败时不发送短信，返回失败结果"""
+    def fail(*args):
+        raise TimeoutError("数据库繁忙")
+
+    monkeypatch.setattr(verification.verification_codes, "take_token", fail)
+    result = asyncio.run(verification.send_verification_code(51004, "+8613800051004"))
+    assert result["success"] is False
+    assert result["message"] == "验证服务暂时不可用，请稍后再试"
+    assert sent == []
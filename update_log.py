@@ -0,0 +1,120 @@
+"""
+更新处理日志
+在分发层包装所有处理器的回调函数，每处理一个更新就记录一条 MessageLog，
+包括执行的处理器和耗时。处理器可以通过 annotate_update 补充触发关键词、是否管理员等信息。
+日志由 MessageLogWriter 在后台批量写入，不会拖慢处理器。
+"""
+
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import Application, BaseHandler, ConversationHandler
+
+from bot.log_writer import message_log_writer
+from utils.metrics import Histogram
+
+# 导入 app 模块以记录处理耗时
+try:
+    from app import bot_status
+except ImportError:
+    # 如果导入失败，耗时只记录在本模块中
+    bot_status = {}
+
+# 各处理器的处理耗时（秒），按线程分片，记录时不加锁
+_handler_latency = bot_status.setdefault("handler_latency", Histogram(("handler",)))
+
+logger = logging.getLogger(__name__)
+
+# 每条日志最多记录的消息文本长度
+MAX_LOGGED_TEXT = 1000
+
+# 当前正在处理的更新的附加日志字段
+_current_fields: ContextVar[Optional[Dict[str, Any]]] = ContextVar("update_log_fields", default=None)
+
+def annotate_update(**fields) -> None:
+    """
+    为当前正在处理的更新补充日志字段，不在处理器中调用时不做任何事。
+
+    Args:
+        **fields: MessageLog 字段，如 trigger_keyword、is_admin
+    """
+    current = _current_fields.get()
+    if current is not None:
+        current.update(fields)
+
+def _message_text(update: Update) -> Optional[str]:
+    if update.callback_query:
+        return f"[按钮] {update.callback_query.data}"
+    message = update.effective_message
+    if message:
+        text = message.text or message.caption
+        if text:
+            return text[:MAX_LOGGED_TEXT]
+    return None
+
+def _record(update: Any, handler_name: str, duration_ms: float, fields: Dict[str, Any]) -> None:
+    """把一次处理放入日志队列，任何错误都不影响处理器"""
+    if not isinstance(update, Update):
+        return
+    try:
+        chat = update.effective_chat
+        user = update.effective_user
+        log_fields = {
+            "chat_id": chat.id if chat else 0,
+            "chat_type": chat.type if chat else "unknown",
+            "chat_title": chat.title if chat else None,
+            "user_id": user.id if user else None,
+            "username": user.username if user else None,
+            "message_text": _message_text(update),
+            "handler_name": handler_name,
+            "duration_ms": round(duration_ms, 3),
+            **fields
+        }
+        trigger_keyword = log_fields.get("trigger_keyword")
+        if trigger_keyword:
+            log_fields["trigger_keyword"] = trigger_keyword[:50]
+        message_log_writer.add(**log_fields)
+    except Exception as e:
+        logger.warning(f"记录更新日志失败: {str(e)}")
+
+def logged_callback(callback: Callable, handler_name: Optional[str] = None) -> Callable:
+    """包装处理器回调函数，记录处理耗时和结果，返回值保持不变（ConversationHandler 依赖返回的状态）"""
+    name = handler_name or getattr(callback, "__name__", repr(callback))
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        fields: Dict[str, Any] = {}
+        token = _current_fields.set(fields)
+        start = time.perf_counter()
+        try:
+            return await callback(update, context)
+        finally:
+            duration = time.perf_counter() - start
+            _current_fields.reset(token)
+            _handler_latency.observe(duration, name)
+            _record(update, name, duration * 1000, fields)
+
+    wrapper.logged = True
+    return wrapper
+
+def _wrap_handler(handler: BaseHandler) -> None:
+    if isinstance(handler, ConversationHandler):
+        # 对话处理器本身不执行回调，包装其中的各个处理器
+        children = list(handler.entry_points) + list(handler.fallbacks)
+        for state_handlers in handler.states.values():
+            children.extend(state_handlers)
+        for child in children:
+            _wrap_handler(child)
+        return
+    if not getattr(handler.callback, "logged", False):
+        handler.callback = logged_callback(handler.callback)
+
+def install_update_logging(application: Application) -> None:
+    """为应用中已注册的所有处理器启用更新日志，应在添加完处理器后调用"""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            _wrap_handler(handler)
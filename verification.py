@@ -3,13 +3,27 @@ import string
 import logging
 from datetime import datetime, timedelta
 from utils.sms_sender import send_sms
+from utils.code_store import create_code_store
+from config import (
+    VERIFICATION_CODE_STORE, VERIFICATION_SEND_LIMIT, VERIFICATION_SEND_WINDOW,
+    VERIFICATION_PHONE_SEND_LIMIT, VERIFICATION_PHONE_SEND_WINDOW,
+    VERIFICATION_ATTEMPT_LIMIT, VERIFICATION_ATTEMPT_WINDOW
+)
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 存储验证码的字典 {user_id: {'code': '123456', 'expires_at': datetime, 'phone': '+1234567890'}}
-verification_codes = {}
+# 验证码存储 {user_id: {'code': '123456', 'expires_at': datetime, 'phone': '+1234567890'}}，过期时间为 UTC
+# 发送和验证的限流令牌桶也保存在其中
+verification_codes = create_code_store(VERIFICATION_CODE_STORE)
+
+def _allow_send(user_id, phone_number):
+    """检查用户和手机号是否还能发送验证码，限制每个用户和每个手机号的短信数量"""
+    return (
+        verification_codes.take_token(f"send_user:{user_id}", VERIFICATION_SEND_LIMIT, VERIFICATION_SEND_WINDOW)
+        and verification_codes.take_token(f"send_phone:{phone_number}", VERIFICATION_PHONE_SEND_LIMIT, VERIFICATION_PHONE_SEND_WINDOW)
+    )
 
 def generate_verification_code(length=6):
     """
@@ -23,9 +37,9 @@ def generate_verification_code(length=6):
     """
     return ''.join(random.choices(string.digits, k=length))
 
-def send_verification_code(user_id, phone_number, code_length=6, expires_minutes=10):
+async def send_verification_code(user_id, phone_number, code_length=6, expires_minutes=10):
     """
-    生成验证码并发送到指定手机号
+    生成验证码并通过短信网关异步发送到指定手机号
     
     Args:
         user_id (int): 用户ID，用于后续验证
@@ -36,27 +50,49 @@ def send_verification_code(user_id, phone_number, code_length=6, expires_minutes
     Returns:
         dict: 包含操作结果的字典
     """
+    # 限流检查在发送短信之前，超过限制时不产生短信费用（限流数据可能保存在数据库中，在数据库线程池中执行）
+    from bot.data_access import run_db
+    try:
+        allowed = await run_db(_allow_send, user_id, phone_number)
+    except Exception as e:
+        logger.error(f"验证码限流检查失败 | 用户: {user_id} | 错误: {str(e) or type(e).__name__}")
+        return {
+            "success": False,
+            "message": "验证服务暂时不可用，请稍后再试",
+            "error": str(e)
+        }
+    if not allowed:
+        logger.warning(f"验证码发送过于频繁 | 用户: {user_id} | 手机号: {phone_number}")
+        return {
+            "success": False,
+            "message": "获取验证码过于频繁，请稍后再试"
+        }
+    
     # 生成验证码
     verification_code = generate_verification_code(code_length)
     
     # 设置过期时间
-    expires_at = datetime.now() + timedelta(minutes=expires_minutes)
+    expires_at = datetime.utcnow() + timedelta(minutes=expires_minutes)
     
     # 构建短信内容
     message = f"【好旺公群】您的验证码是 {verification_code}，{expires_minutes}分钟内有效。请勿泄露给他人！"
     
     # 发送短信
-    result = send_sms(phone_number, message)
+    result = await send_sms(phone_number, message)
     
     if result["success"]:
-        # 存储验证码信息
-        verification_codes[user_id] = {
-            'code': verification_code,
-            'expires_at': expires_at,
-            'phone': phone_number
-        }
+        # 存储验证码信息，短信已经发出但保存失败时提示用户重新获取
+        try:
+            await run_db(verification_codes.set, user_id, verification_code, phone_number, expires_at)
+        except Exception as e:
+            logger.error(f"保存验证码失败 | 用户: {user_id} | 错误: {str(e) or type(e).__name__}")
+            return {
+                "success": False,
+                "message": "验证码保存失败，请稍后重新获取验证码",
+                "error": str(e)
+            }
         
-        logger.info(f"验证码已发送至 {phone_number}，过期时间: {expires_at}")
+        logger.info(f"验证码已发送至 {phone_number}，过期时间: {expires_at} (UTC)")
         return {
             "success": True,
             "message": f"验证码已发送至 {phone_number}",
@@ -77,30 +113,25 @@ def verify_code(user_id, code):
     Returns:
         dict: 包含验证结果的字典
     """
-    # 检查是否存在该用户的验证码
-    if user_id not in verification_codes:
+    # 限制尝试次数，防止暴力猜测验证码
+    if not verification_codes.take_token(f"attempt_user:{user_id}", VERIFICATION_ATTEMPT_LIMIT, VERIFICATION_ATTEMPT_WINDOW):
+        logger.warning(f"验证码尝试次数过多 | 用户: {user_id}")
         return {
             "success": False,
-            "message": "验证码不存在或已过期，请重新获取验证码"
+            "message": "尝试次数过多，请稍后再试"
         }
     
-    verification_info = verification_codes[user_id]
-    
-    # 检查验证码是否过期
-    if datetime.now() > verification_info['expires_at']:
-        # 删除过期验证码
-        del verification_codes[user_id]
+    # 检查是否存在该用户未过期的验证码（过期的验证码由定时任务清理）
+    verification_info = verification_codes.get(user_id)
+    if verification_info is None:
         return {
             "success": False,
-            "message": "验证码已过期，请重新获取验证码"
+            "message": "验证码不存在或已过期，请重新获取验证码"
         }
     
-    # 验证码是否匹配
-    if code == verification_info['code']:
-        # 验证成功后删除验证码，防止重复使用
+    # 验证码是否匹配，验证成功后删除验证码，防止重复使用（只有成功删除的一方算验证成功）
+    if code == verification_info['code'] and verification_codes.delete(user_id, code):
         phone = verification_info['phone']
-        del verification_codes[user_id]
-        
         return {
             "success": True,
             "message": "验证成功",
@@ -114,21 +145,13 @@ def verify_code(user_id, code):
 
 def clean_expired_codes():
     """
-    清理过期的验证码
+    清理过期的验证码和已恢复满的限流令牌桶，由机器人的定时任务调用
     
     Returns:
-        int: 清理的验证码数量
+        int: 清理的条目数量
     """
-    now = datetime.now()
-    expired_keys = [
-        user_id for user_id, info in verification_codes.items()
-        if now > info['expires_at']
-    ]
-    
-    for user_id in expired_keys:
-        del verification_codes[user_id]
-    
-    if expired_keys:
-        logger.info(f"已清理 {len(expired_keys)} 个过期验证码")
+    removed = verification_codes.sweep()
+    if removed:
+        logger.info(f"已清理 {removed} 条过期验证码和限流记录")
     
-    return len(expired_keys)
\ No newline at end of file
+    return removed